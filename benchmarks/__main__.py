@@ -0,0 +1,394 @@
+"""Benchmarks of typetest.
+
+Times the startup of the typing test against `startup_target`, drawing
+frames of the typing test across test lengths and terminal widths, writing
+the results of a test, creating the least typed and worst words tests and
+drawing every graph of `typetest-analyse`, the last two on generated
+histories of growing size. Timings are printed as json, so they
+can be compared between commits to catch regressions.
+"""
+import os
+import sys
+import json
+import platform
+import subprocess
+import statistics
+
+from time import perf_counter
+from pathlib import Path
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from argparse import ArgumentParser, RawTextHelpFormatter, FileType
+
+from blessed import Terminal
+
+from benchmarks.history import generate, words_file
+
+doc = """example:
+  python -m benchmarks
+  python -m benchmarks draw write
+  python -m benchmarks startup
+  python -m benchmarks plots -n 1000 1000000 --history-dir histories
+  python -m benchmarks -o benchmarks.json
+"""
+test_lengths = [50, 1000, 100000]  # words
+terminal_widths = [40, 80, 200]
+frames = 2000
+test_words = 50  # words of the test whose results are written
+# seconds importing `typetest.__main__` may take before the first frame
+startup_target = 0.5
+
+
+class SizedTerminal(Terminal):
+    """Terminal of a fixed size writing to nowhere."""
+
+    def __init__(self, width, height=24):
+        super().__init__(stream=open(os.devnull, "w"), force_styling=True)
+        self._size = width, height
+
+    @property
+    def width(self):
+        return self._size[0]
+
+    @property
+    def height(self):
+        return self._size[1]
+
+
+def timed(function, repeat, *args):
+    """Calls `function` with `args` `repeat` times and returns the seconds
+    every call took.
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function(*args)
+        times.append(perf_counter() - start)
+    return times
+
+
+def result(suite, name, params, times, unit="s"):
+    """Returns a json result of a benchmark that took `times`."""
+    return {
+        "suite": suite,
+        "name": name,
+        "params": params,
+        "unit": unit,
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+    }
+
+
+def typed_words(count):
+    """Returns `count` common english words."""
+    words = words_file.read_text().split()
+    return [words[i % len(words)] for i in range(count)]
+
+
+def import_times(module):
+    """Imports `module` in a new interpreter and returns a list of
+    `(cumulative seconds, module)` of its direct imports and itself, slowest
+    first.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if len(name) - len(name.lstrip()) <= 3:  # nested at most once
+            times.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(times, reverse=True)
+
+
+def bench_startup(histories, repeat):
+    """Times importing `typetest.__main__`, which the typing test does
+    before drawing its first frame, and prints its slowest imports and
+    whether it stays within `startup_target`.
+    """
+    times = []
+    for _ in range(repeat):
+        imports = import_times("typetest.__main__")
+        times.append(
+            dict((name, s) for s, name in imports)["typetest.__main__"]
+        )
+
+    for seconds, name in imports[:10]:
+        print(f"{seconds * 1000:8.1f}ms  {name}", file=sys.stderr)
+    within = min(times) <= startup_target
+    print(
+        f"startup {min(times) * 1000:.0f}ms,"
+        + f" target {startup_target * 1000:.0f}ms"
+        + ("" if within else ", over the target"),
+        file=sys.stderr,
+    )
+    params = {"target": startup_target, "within_target": within}
+    return [result("startup", "import", params, times)]
+
+
+def bench_draw(histories, repeat):
+    """Times drawing a frame after every key of a test, like the typing test
+    does, in seconds per frame.
+    """
+    from typetest.__main__ import draw
+    from typetest.driver import synthetic_keys
+    from typetest.layout import Layout
+    from typetest.render import Renderer
+    from typetest.session import TypingSession, SUBMIT
+
+    for length in test_lengths:
+        words = typed_words(length)
+        keys = list(synthetic_keys(words, 80, 0.05, seed=0))[:frames]
+        for width in terminal_widths:
+
+            def type_test():
+                terminal = SizedTerminal(width)
+                session = TypingSession(words)
+                layout = Layout(words, width)
+                renderer = Renderer(terminal)
+                colors = {}
+                elapsed = 0
+                for key, time in keys:
+                    if session.feed(key, time) == SUBMIT:
+                        colors[session.word_index - 1] = terminal.green
+                    start = perf_counter()
+                    draw(
+                        terminal,
+                        renderer,
+                        2,
+                        layout,
+                        colors,
+                        session.word_index,
+                        session.user_text,
+                        session.typing_speed_in_wpm,
+                        session.typing_duration,
+                    )
+                    elapsed += perf_counter() - start
+                terminal.stream.close()
+                return elapsed / len(keys)
+
+            times = [type_test() for _ in range(repeat)]
+            yield result(
+                "draw",
+                "frame",
+                {"words": length, "width": width, "frames": len(keys)},
+                times,
+            )
+
+
+def bench_write(histories, repeat):
+    """Times writing the results of a test to csv files, a database and an
+    archive.
+    """
+    from typetest.archive import Archive
+    from typetest.database import connect, write
+    from typetest.driver import replay, synthetic_keys
+    from typetest.results import write_csv
+
+    words = typed_words(test_words)
+    session = replay(words, synthetic_keys(words, 80, 0.05, seed=0))
+    rows = session.rows("21/10/2021 21:21:00", "0" * 40)
+
+    with TemporaryDirectory() as directory:
+
+        def write_database():
+            connection = connect(os.path.join(directory, "results.db"))
+            write(connection, rows)
+            connection.close()
+
+        for name, function in [
+            ("csv", lambda: write_csv(directory, rows)),
+            ("database", write_database),
+            ("archive", lambda: Archive(directory + "/archive").append(rows)),
+        ]:
+            times = timed(function, repeat)
+            yield result("write", name, {"words": test_words}, times)
+
+
+def bench_test_files(histories, repeat):
+    """Times creating the least typed words and worst words tests from a
+    whole history, and updating them from the per-word stats after a test.
+    """
+    from typetest.utils import (
+        create_least_typed_words_and_worst_words_test_files,
+    )
+    from typetest.word_stats import update_test_files
+
+    for rows, directory in histories.items():
+        word_speeds = os.path.join(directory, "word_speeds.csv")
+        with TemporaryDirectory() as output:
+            least_typed = os.path.join(output, "least_typed_words")
+            worst = os.path.join(output, "worst_words")
+            times = timed(
+                create_least_typed_words_and_worst_words_test_files,
+                repeat,
+                word_speeds,
+                least_typed,
+                worst,
+            )
+            yield result("test_files", "from_history", {"rows": rows}, times)
+
+            stats = os.path.join(output, "word_stats.json")
+            test = [["the", 0.2, 90.0, "21/10/2021 21:21:00"]] * test_words
+            times = []
+            for _ in range(repeat):
+                if os.path.exists(stats):
+                    os.remove(stats)
+                times += timed(
+                    update_test_files,
+                    1,
+                    stats,
+                    test,
+                    word_speeds,
+                    least_typed,
+                    worst,
+                )
+            yield result(
+                "test_files", "stats_bootstrap", {"rows": rows}, times
+            )
+
+            times = timed(
+                update_test_files,
+                repeat,
+                stats,
+                test,
+                word_speeds,
+                least_typed,
+                worst,
+            )
+            yield result("test_files", "stats_update", {"rows": rows}, times)
+
+
+def bench_plots(histories, repeat):
+    """Times drawing every graph without showing it. The first drawing of a
+    large history also builds the cache of parsed csv files.
+    """
+    import matplotlib.pyplot as plt
+    from typetest.analyse.__main__ import draw, plots, setup_plotting
+
+    setup_plotting("Agg")
+    for rows, directory in histories.items():
+        paths = {
+            "output": os.path.join(directory, "results.csv"),
+            "mistyped": os.path.join(directory, "mistyped_words.csv"),
+            "char_speeds": os.path.join(directory, "char_speeds.csv"),
+            "word_speeds": os.path.join(directory, "word_speeds.csv"),
+        }
+        for graph in plots:
+            times = timed(
+                lambda: plt.close(draw(graph, paths, show=False)), repeat
+            )
+            yield result("plots", graph, {"rows": rows}, times)
+
+
+suites = {
+    "startup": bench_startup,
+    "draw": bench_draw,
+    "write": bench_write,
+    "test_files": bench_test_files,
+    "plots": bench_plots,
+}
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(names, rows, history_dir, repeat, output, help):
+    """Runs benchmarks of suites with `names`, or all of them, on histories
+    of `rows` typed characters kept in `history_dir`, and writes their
+    timings to `output` as json.
+    """
+    with TemporaryDirectory() as temporary_directory:
+        histories = {}
+        for count in rows:
+            directory = Path(history_dir or temporary_directory) / str(count)
+            if not (directory / "char_speeds.csv").exists():
+                print(f"generating a history of {count} rows", file=sys.stderr)
+                generate(directory, count)
+            histories[count] = str(directory)
+
+        results = []
+        for suite in names or suites:
+            for benchmark in suites[suite](histories, repeat):
+                print(
+                    f"{benchmark['suite']:<12}{benchmark['name']:<16}"
+                    + f"{benchmark['min']:12.6f}s  {benchmark['params']}",
+                    file=sys.stderr,
+                )
+                results.append(benchmark)
+
+    json.dump(
+        {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "benchmarks": results,
+        },
+        output,
+        indent=2,
+    )
+    output.write("\n")
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    default = "(default: %(default)s)"
+    parser.add_argument(
+        "names",
+        metavar="suites",
+        type=str,
+        nargs="*",
+        help="benchmarks to run: " + " ".join(suites) + "\n(default: all)",
+    )
+    parser.add_argument(
+        "-n",
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10 ** 3, 10 ** 4, 10 ** 5],
+        help="typed characters of the histories, from 1000 to 10000000\n"
+        + default,
+    )
+    parser.add_argument(
+        "--history-dir",
+        type=str,
+        default=None,
+        help="directory to keep generated histories in and reuse them from"
+        + "\n(default: a temporary directory)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=3,
+        help="times every benchmark is run " + default,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=FileType("w"),
+        default=sys.stdout,
+        help="file to write the json results to (default: stdout)",
+    )
+
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in suites:
+            parser.error(f"unknown suite {name}, choose from {list(suites)}")
+    return dict(args._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
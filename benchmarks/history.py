@@ -0,0 +1,205 @@
+"""Synthetic typing test histories for benchmarks.
+
+`generate` writes `results.csv`, `char_speeds.csv`, `word_speeds.csv` and
+`mistyped_words.csv` the way `typetest` appends them, as if a typist had
+taken tests of the most common english words for years: words have their
+own speeds, the typist slowly gets faster and mistypes some words.
+"""
+import os
+import sys
+
+from pathlib import Path
+from datetime import datetime, timedelta
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+import numpy as np
+import pandas as pd
+
+from typetest.results import columns
+
+words_file = Path(__file__).parent.parent / "typetest/tests/common_1000"
+hashes = [  # tests of `typetest/tests` the history is made of
+    "da4846a3c2a8469dd77c921ab0b0bcd506b6e9f3",
+    "275eb003c4fba77d7e61893c3d9fa869822e06c8",
+]
+durations = [30, 60, float("inf")]
+block_size = 1 << 20  # characters generated at once
+mistype_rate = 0.05
+letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+first_test = datetime(2020, 1, 1)
+test_interval = timedelta(minutes=10)
+
+filename = os.path.basename(sys.argv[0])
+doc = f"""example:
+  {filename} history/1e5 -n 100000
+"""
+
+
+def generate(directory, rows, seed=0, words=None):
+    """Writes a history of typing tests with `rows` typed characters to csv
+    files in `directory`, appending to files that exist. The other tables
+    get as many rows as such a history has, e.g. about a sixth as many
+    word speeds. Returns the number of rows written to every table.
+    """
+    os.makedirs(directory, exist_ok=True)
+    generator = np.random.default_rng(seed)
+    if words is None:
+        words = words_file.read_text().split()
+    words = np.array(words)
+    lengths = np.char.str_len(words)
+    words_and_spaces = np.char.add(words, " ")
+    word_wpm = 60 * generator.lognormal(0, 0.2, len(words))
+
+    mean_test_length = 50 * (lengths.mean() + 1)
+    total_tests = max(rows / mean_test_length, 1)
+    counts = dict.fromkeys(columns, 0)
+    test_index = 0
+    while counts["char_speeds"] < rows:
+        remaining = rows - counts["char_speeds"]
+        tests = max(int(min(block_size, remaining) / mean_test_length), 1)
+        test_words = generator.integers(20, 81, tests)
+        word_tests = np.repeat(np.arange(tests), test_words)
+        indices = generator.integers(0, len(words), len(word_tests))
+        mistyped = generator.random(len(indices)) < mistype_rate
+
+        # the typist gets about half again as fast over the whole history
+        progress = np.minimum((test_index + word_tests) / total_tests, 1)
+        speeds = word_wpm[indices] * (0.8 + 0.4 * progress)
+
+        word_lengths = lengths[indices] + 1  # with the submitting space
+        chars = np.array(list("".join(words_and_spaces[indices])))
+        char_words = np.repeat(np.arange(len(indices)), word_lengths)
+        char_durations = 12 / (
+            speeds[char_words] * generator.lognormal(0, 0.3, len(chars))
+        )
+        word_starts = np.cumsum(word_lengths) - word_lengths
+        space_durations = char_durations[word_starts + word_lengths - 1]
+        word_durations = (
+            np.add.reduceat(char_durations, word_starts) - space_durations
+        )
+
+        test_durations = np.bincount(
+            word_tests, weights=word_durations + space_durations
+        )
+        correct = np.bincount(
+            word_tests, weights=np.where(mistyped, 1, word_lengths)
+        )
+        typed = np.bincount(word_tests, weights=word_lengths)
+
+        # the last test is cut short to write exactly `rows` characters
+        stop = min(remaining, len(chars))
+        chars, char_words = chars[:stop], char_words[:stop]
+        char_durations = char_durations[:stop]
+        tests = word_tests[char_words[-1]] + 1
+        kept = word_tests < tests
+        word_tests, indices = word_tests[kept], indices[kept]
+        word_durations, mistyped = word_durations[kept], mistyped[kept]
+
+        timestamps = np.array(
+            [
+                (first_test + (test_index + i) * test_interval).strftime(
+                    "%d/%m/%Y %H:%M:%S"
+                )
+                for i in range(tests)
+            ]
+        )
+        test_durations = test_durations[:tests]
+        test_wpm = correct[:tests] * 12 / test_durations
+        tables = {
+            "results": pd.DataFrame(
+                {
+                    "timestamp": timestamps,
+                    "wpm": np.minimum(test_wpm, 999).astype(int),
+                    "accuracy": 100 * correct[:tests] // typed[:tests],
+                    "actual_duration": test_durations,
+                    "duration": generator.choice(durations, tests),
+                    "hash": generator.choice(hashes, tests),
+                }
+            ).astype({"accuracy": int}),
+            "char_speeds": pd.DataFrame(
+                {
+                    "char": chars,
+                    "duration": char_durations,
+                    "wpm": 12 / char_durations,
+                    "timestamp": timestamps[word_tests[char_words]],
+                }
+            ),
+            "word_speeds": pd.DataFrame(
+                {
+                    "word": words[indices][~mistyped],
+                    "duration": word_durations[~mistyped],
+                    "wpm": (lengths[indices] * 12 / word_durations)[~mistyped],
+                    "timestamp": timestamps[word_tests][~mistyped],
+                }
+            ),
+            "mistyped_words": pd.DataFrame(
+                {
+                    "word": words[indices][mistyped],
+                    "mistype": [
+                        mistype(word, generator)
+                        for word in words[indices][mistyped]
+                    ],
+                    "timestamp": timestamps[word_tests][mistyped],
+                }
+            ),
+        }
+        for table, data_frame in tables.items():
+            data_frame.to_csv(
+                os.path.join(directory, f"{table}.csv"),
+                mode="a",
+                header=False,
+                index=False,
+            )
+            counts[table] += len(data_frame)
+        test_index += tests
+    return counts
+
+
+def mistype(word, generator):
+    """Returns `word` with one of its letters replaced by another one."""
+    index = generator.integers(len(word))
+    letter = generator.choice(letters[letters != word[index]])
+    end = index + 1
+    return word[:index] + letter + word[end:]
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(directory, rows, seed, help):
+    """Writes a history of `rows` typed characters to `directory`."""
+    for table, count in generate(directory, rows, seed).items():
+        print(f"{table:<16}{count:>10} rows")
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    default = "(default: %(default)s)"
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="directory to write the csv files to (appended if they exist)",
+    )
+    parser.add_argument(
+        "-n",
+        "--rows",
+        type=int,
+        default=100000,
+        help="number of typed characters in the history\n" + default,
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the random generator\n" + default,
+    )
+
+    return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,182 @@
+import re
+import random
+import unittest
+from collections import deque
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from typetest.analyse import aggregations
+
+is_word = partial(re.match, r"^[a-z]+$")
+
+
+def word_speeds(size=5000, seed=0):
+    generator = random.Random(seed)
+    words = ["the", "of", "and", "Mr", "x1", "it's", "a", "zebra", "quiz"]
+    words += ["w" + str(i) for i in range(60)]
+    words += ["".join(generator.choices("abcdef", k=4)) for _ in range(80)]
+    return pd.DataFrame(
+        {
+            "word": generator.choices(words, k=size),
+            "duration": [generator.random() for _ in range(size)],
+            "wpm": [round(generator.gauss(60, 20), 1) for _ in range(size)],
+            "timestamp": "21/10/2021 21:21:00",
+        }
+    )
+
+
+def char_speeds(size=5000, seed=0):
+    generator = random.Random(seed)
+    return pd.DataFrame(
+        {
+            "char": generator.choices("abcdefgABC ,.;", k=size),
+            "duration": [generator.random() for _ in range(size)],
+            "wpm": [generator.gauss(60, 20) for _ in range(size)],
+            "timestamp": "21/10/2021 21:21:00",
+        }
+    )
+
+
+# implementations of the plots before their aggregations were vectorized
+
+
+def old_word_medians(data_frame, filter_func):
+    grouped_data_frames = list(
+        filter(lambda t: filter_func(t[0]), data_frame.groupby("word"))
+    )
+    return [df["wpm"].median() for word, df in grouped_data_frames]
+
+
+def old_worst_and_best_words(data_frame, n, filter_func):
+    grouped_data_frames = list(
+        filter(lambda t: filter_func(t[0]), data_frame.groupby("word"))
+    )
+    grouped_data_frames = sorted(
+        grouped_data_frames, key=lambda x: x[1]["wpm"].median()
+    )
+
+    first_half = deque(maxlen=n // 2)
+    second_half = deque(maxlen=n // 2)
+    for word, df in grouped_data_frames:
+        if len(first_half) < first_half.maxlen:
+            first_half.append((word, df["wpm"], df["wpm"].mean()))
+        else:
+            second_half.append((word, df["wpm"], df["wpm"].mean()))
+    return list(first_half) + list(second_half)
+
+
+def old_trimmed_char_speeds(data_frame, filter_func):
+    grouped_data_frames = filter(
+        lambda t: filter_func(t[1]["char"].iloc[0]),
+        data_frame.groupby("char"),
+    )
+
+    typing_speeds_in_wpm = []
+    chars = []
+    means = []
+    for char, df in grouped_data_frames:
+        if filter_func(char):
+            q1 = df["wpm"].quantile(0.1)  # noqa
+            q3 = df["wpm"].quantile(0.9)  # noqa
+            typing_speed_in_wpm = df.query("@q1 <= wpm <= @q3")["wpm"]
+            chars.append(char)
+            typing_speeds_in_wpm.append(typing_speed_in_wpm)
+            mean = typing_speed_in_wpm.mean()
+            means.append(mean if mean > 0 else 0)
+    return chars, typing_speeds_in_wpm, means
+
+
+class TestAggregations(unittest.TestCase):
+    def test_word_medians(self):
+        data_frame = word_speeds()
+        for new_filter, old_filter in [(r"^[a-z]+$", is_word), *[(None,) * 2]]:
+            new_filter = new_filter or (lambda w: True)
+            old_filter = old_filter or (lambda w: True)
+            self.assertEqual(
+                aggregations.word_medians(data_frame, new_filter).tolist(),
+                old_word_medians(data_frame, old_filter),
+            )
+
+    def test_worst_and_best_words(self):
+        data_frame = word_speeds()
+        for n in [1, 10, 50, 1000]:
+            new = aggregations.worst_and_best_words(data_frame, n, r"^[a-z]+$")
+            old = old_worst_and_best_words(data_frame, n, is_word)
+            self.assertEqual([w for w, *_ in new], [w for w, *_ in old])
+            for (_, new_speeds, new_mean), (_, old_speeds, old_mean) in zip(
+                new, old
+            ):
+                self.assertEqual(list(new_speeds), list(old_speeds))
+                self.assertAlmostEqual(new_mean, old_mean)
+
+    def test_trimmed_char_speeds(self):
+        data_frame = char_speeds()
+        for filter_func in [str.islower, lambda c: True]:
+            chars, speeds, means = aggregations.trimmed_char_speeds(
+                data_frame, filter_func
+            )
+            old_chars, old_speeds, old_means = old_trimmed_char_speeds(
+                data_frame, filter_func
+            )
+            self.assertEqual(chars, old_chars)
+            for new, old in zip(speeds, old_speeds):
+                np.testing.assert_array_equal(new, old.to_numpy())
+            np.testing.assert_allclose(means, old_means)
+
+    def test_trimmed_char_speeds_of_few_samples(self):
+        data_frame = pd.DataFrame(
+            {"char": ["a", "a", "b", "b", "b"], "wpm": [10, 20, 5, 6, 7]}
+        )
+        chars, speeds, means = aggregations.trimmed_char_speeds(data_frame)
+        old_chars, old_speeds, old_means = old_trimmed_char_speeds(
+            data_frame, lambda c: True
+        )
+        self.assertEqual(chars, old_chars)
+        self.assertEqual(chars, ["a", "b"])
+        self.assertEqual([list(s) for s in speeds], [[], [6.0]])
+        self.assertEqual(
+            [list(s) for s in speeds], [list(s) for s in old_speeds]
+        )
+        self.assertEqual(means, [0, 6.0])
+        self.assertEqual(means, old_means)
+
+    def test_digraph_histograms(self):
+        data_frame = char_speeds(20000)
+        data_frame.loc[10000:, "timestamp"] = "22/10/2021 21:21:00"
+
+        latencies = {}  # transitions one by one
+        rows = list(data_frame.itertuples(index=False))
+        for row, next_row in zip(rows, rows[1:]):
+            if row.timestamp == next_row.timestamp and " " not in (
+                row.char + next_row.char
+            ):
+                digraph = row.char, next_row.char
+                latencies.setdefault(digraph, []).append(row.duration)
+
+        histograms = aggregations.DigraphHistograms()
+        for start in range(0, len(data_frame), 3000):  # in chunks
+            stop = start + 3000
+            histograms.add(data_frame.iloc[start:stop])
+        medians, counts = histograms.matrix()
+
+        self.assertEqual(sorted(medians.index), sorted(set("abcdefgABC,.;")))
+        for (previous, following), values in latencies.items():
+            self.assertEqual(counts.loc[previous, following], len(values))
+            # within the width of a latency bin
+            self.assertAlmostEqual(
+                medians.loc[previous, following],
+                np.median(values),
+                delta=0.06 * np.median(values),
+            )
+        self.assertEqual(
+            counts.to_numpy().sum(), sum(map(len, latencies.values()))
+        )
+
+        medians, _ = histograms.matrix(str.islower)
+        self.assertEqual(list(medians.columns), list("abcdefg"))
+
+
+if __name__ == "__main__":
+    unittest.main()
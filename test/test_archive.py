@@ -0,0 +1,63 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from test.test_results import rows
+from typetest import archive
+from typetest.results import columns, write_csv
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.ttc")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_returns_appended_rows(self):
+        test = rows()
+        archive.Archive(self.path).append(test)
+        self.assertTrue(archive.is_archive(self.path))
+        for table in columns:
+            data_frame = archive.read(self.path, table)
+            self.assertEqual(list(data_frame.columns), columns[table])
+            data_frame["timestamp"] = data_frame["timestamp"].dt.strftime(
+                "%d/%m/%Y %H:%M:%S"
+            )
+            self.assertEqual(
+                data_frame.values.tolist(),
+                [list(row) for row in test[table]],
+            )
+
+    def test_arrays_are_memory_mapped(self):
+        archive.Archive(self.path).append(rows())
+        arrays = archive.arrays(self.path, "char_speeds", last=4)
+        self.assertEqual(len(arrays["wpm"]), 4)
+        self.assertFalse(arrays["wpm"].flags.writeable)
+        chars = archive.read_dictionary(self.path, "char_speeds", "char")
+        self.assertEqual([chars[c] for c in arrays["char"]], list(" cx "))
+
+    def test_uncommitted_rows_are_ignored_and_cut_off(self):
+        archive.Archive(self.path).append(rows())
+        for name in ("char_speeds.wpm", "char_speeds.char.dict"):
+            with open(os.path.join(self.path, name), "ab") as f:
+                f.write(b'"torn')
+        self.assertEqual(len(archive.read(self.path, "char_speeds")), 6)
+
+        archive.Archive(self.path).append(rows("22/10/2021 21:21:00"))
+        data_frame = archive.read(self.path, "char_speeds")
+        self.assertEqual(list(data_frame["char"]), list("ab cx ") * 2)
+        self.assertEqual(
+            [round(wpm) for wpm in data_frame["wpm"]],
+            [120, 60, 40, 120, 60, 24] * 2,
+        )
+
+    def test_convert(self):
+        results = os.path.join(self.directory.name, "results")
+        os.mkdir(results)
+        write_csv(results, rows("21/10/2021 21:21:00"))
+        write_csv(results, rows("22/10/2021 21:21:00"))
+        archive.convert(results, self.path, batch_size=4)
+        self.assertEqual(len(archive.read(self.path, "char_speeds")), 12)
+        self.assertEqual(len(archive.read(self.path, "results")), 2)
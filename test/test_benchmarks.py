@@ -0,0 +1,64 @@
+import io
+import os
+import json
+import sys
+import unittest
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+
+from benchmarks import __main__ as benchmarks
+from benchmarks.history import generate
+from typetest.analyse.loaders import read
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generated_history(self):
+        with TemporaryDirectory() as directory:
+            counts = generate(directory, 5000, seed=1)
+            self.assertEqual(counts["char_speeds"], 5000)
+            for table, count in counts.items():
+                path = os.path.join(directory, f"{table}.csv")
+                self.assertEqual(len(read(table, path)), count)
+
+            results = read("results", os.path.join(directory, "results.csv"))
+            words = read(
+                "word_speeds", os.path.join(directory, "word_speeds.csv")
+            )
+            mistyped = read(
+                "mistyped_words",
+                os.path.join(directory, "mistyped_words.csv"),
+            )
+
+        self.assertTrue(results["accuracy"].between(0, 100).all())
+        self.assertTrue(words["wpm"].gt(0).all())
+        self.assertTrue((mistyped["word"] != mistyped["mistype"]).all())
+        self.assertEqual(
+            set(words["timestamp"]) | set(mistyped["timestamp"]),
+            set(results["timestamp"]),
+        )
+
+    def test_json_output(self):
+        output = io.StringIO()
+        benchmarks.main(["write"], [1000], None, 1, output, None)
+        report = json.loads(output.getvalue())
+        self.assertEqual(
+            [b["name"] for b in report["benchmarks"]],
+            ["csv", "database", "archive"],
+        )
+        for benchmark in report["benchmarks"]:
+            self.assertEqual(benchmark["min"], min(benchmark["times"]))
+
+    def test_startup_is_reported_against_its_target(self):
+        output = io.StringIO()
+        with patch.object(sys, "stderr", io.StringIO()) as stderr:
+            benchmarks.main(["startup"], [1000], None, 1, output, None)
+        [benchmark] = json.loads(output.getvalue())["benchmarks"]
+        self.assertEqual(benchmark["params"]["target"], 0.5)
+        self.assertEqual(
+            benchmark["params"]["within_target"], benchmark["min"] <= 0.5
+        )
+        self.assertIn("typetest.__main__", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
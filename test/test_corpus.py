@@ -0,0 +1,74 @@
+import os
+import unittest
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+
+from typetest import corpus
+from typetest.corpus import Registry, read_words, write_words
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.registry = Registry(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_word_array_round_trip(self):
+        path = os.path.join(self.directory.name, "words")
+        for words in ([], ["a"], ["naïve", "café", "x"], ["the"] * 1000):
+            write_words(path, words)
+            self.assertEqual(read_words(path), words)
+
+    def test_find_by_name_and_hash(self):
+        test_hash = self.registry.add("home row\n  keys  ", "home row")
+        self.assertEqual(self.registry.find("home row"), test_hash)
+        self.assertEqual(self.registry.find(test_hash), test_hash)
+        self.assertEqual(
+            self.registry.load("home row"),
+            (["home", "row", "keys"], test_hash),
+        )
+        with self.assertRaises(KeyError):
+            self.registry.find("top row")
+        with self.assertRaises(KeyError):
+            self.registry.find("index")
+
+    def test_names_of_removed_tests_are_not_found(self):
+        test_hash = self.registry.add("a b c", "abc")
+        os.remove(os.path.join(self.directory.name, test_hash))
+        with self.assertRaises(KeyError):
+            self.registry.load("abc")
+
+    def test_names(self):
+        first = self.registry.add("a b c", "abc")
+        second = self.registry.add("d e f", "def/ghi")
+        self.registry.add("a b c", "first three")
+        self.assertEqual(
+            self.registry.names(), {first: "first three", second: "def/ghi"}
+        )
+
+    def test_bundled_tests_are_registered_when_loaded(self):
+        words, test_hash = self.registry.load("common_300")
+        self.assertEqual(test_hash, "da4846a3c2a8469dd77c921ab0b0bcd506b6e9f3")
+        self.assertEqual(len(words), 300)
+        self.assertEqual(self.registry.names(), {test_hash: "common_300"})
+
+    def test_bundled_tests_are_registered_again_when_changed(self):
+        tests = os.path.join(self.directory.name, "tests")
+        os.makedirs(tests)
+        path = os.path.join(tests, "worst_words")
+        with open(path, "w") as f:
+            f.write("the of")
+        with patch.object(corpus, "tests_directory", tests):
+            first, _ = self.registry.load("worst_words")
+            with open(path, "w") as f:  # rewritten after a test
+                f.write("and to")
+            name = os.path.join(self.directory.name, "names", "worst_words")
+            modified = os.stat(name).st_mtime_ns + 10 ** 9
+            os.utime(path, ns=(modified, modified))
+            second, _ = self.registry.load("worst_words")
+            third, _ = self.registry.load("worst_words")
+        self.assertEqual(first, ["the", "of"])
+        self.assertEqual(second, ["and", "to"])
+        self.assertEqual(third, second)
@@ -0,0 +1,99 @@
+import os
+import time
+import asyncio
+import threading
+import unittest
+from tempfile import TemporaryDirectory
+from concurrent.futures import ThreadPoolExecutor
+
+from test.test_results import rows
+from typetest import daemon, journal
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        root = self.directory.name
+        self.results = os.path.join(root, "results")
+        os.makedirs(self.results)
+        os.makedirs(os.path.join(root, "tests"))
+        self.socket = os.path.join(root, "typetest.sock")
+        self.daemon = daemon.Daemon(self.results)
+        self.thread = threading.Thread(
+            target=asyncio.run, args=(self.daemon.run(self.socket),)
+        )
+        self.thread.start()
+        while not os.path.exists(self.socket):
+            time.sleep(0.01)
+
+    def tearDown(self):
+        if self.thread.is_alive():
+            daemon.request(self.socket, {"command": "stop"})
+        self.thread.join()
+        self.directory.cleanup()
+
+    def test_results_are_written_in_batches(self):
+        with ThreadPoolExecutor(8) as pool:
+            responses = list(
+                pool.map(
+                    lambda _: daemon.submit(self.socket, rows()), range(20)
+                )
+            )
+        self.assertTrue(all(response["ok"] for response in responses))
+
+        response = daemon.request(self.socket, {"command": "flush"})
+        self.assertEqual(response["written"], 20)
+        with open(os.path.join(self.results, "mistyped_words.csv")) as f:
+            self.assertEqual(f.read(), "cd,cx,21/10/2021 21:21:00\n" * 20)
+
+        stats = daemon.request(
+            self.socket, {"command": "stats", "words": ["ab"]}
+        )
+        self.assertLess(stats["batches"], 20)
+        self.assertEqual(stats["mean_wpm"], 60)
+        self.assertEqual(stats["words"]["ab"]["count"], 20)
+        self.assertEqual(stats["worst_words"], ["ab"])
+        with open(os.path.join(self.results, "../tests/worst_words")) as f:
+            self.assertEqual(f.read(), "ab")
+
+    def test_pending_results_are_written_when_stopping(self):
+        daemon.submit(self.socket, rows())
+        daemon.request(self.socket, {"command": "stop"})
+        self.thread.join()
+        self.assertFalse(os.path.exists(self.socket))
+        with open(os.path.join(self.results, "results.csv")) as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+    def test_malformed_results_are_rejected(self):
+        malformed = rows()
+        del malformed["mistyped_words"]
+        response = daemon.submit(self.socket, malformed)
+        self.assertFalse(response["ok"])
+        self.assertIn("mistyped_words", response["error"])
+        malformed = rows()
+        malformed["char_speeds"][0].pop()
+        self.assertFalse(daemon.submit(self.socket, malformed)["ok"])
+
+        self.assertTrue(daemon.submit(self.socket, rows())["ok"])
+        response = daemon.request(self.socket, {"command": "flush"})
+        self.assertEqual((response["written"], response["failed"]), (1, 0))
+
+    def test_results_that_cannot_be_written_are_journaled(self):
+        os.makedirs(os.path.join(self.results, "results.csv"))
+        self.assertTrue(daemon.submit(self.socket, rows())["ok"])
+        response = daemon.request(self.socket, {"command": "flush"})
+        self.assertEqual(response["failed"], 1)
+        path = os.path.join(self.results, journal.journal_name)
+        self.assertEqual(list(journal.records(path)), [rows()])
+
+    def test_bad_requests(self):
+        response = daemon.request(self.socket, {"command": "dance"})
+        self.assertFalse(response["ok"])
+        response = daemon.request(self.socket, {"rows": []})
+        self.assertFalse(response["ok"])
+        with self.assertRaises(OSError):
+            daemon.request(os.path.join(self.directory.name, "x.sock"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from test.test_results import rows
+from typetest import database
+from typetest.results import columns, write_csv
+
+
+class TestDatabase(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.db")
+        self.connection = database.connect(self.path)
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def test_is_database(self):
+        self.assertTrue(database.is_database(self.path))
+        self.assertFalse(database.is_database("test/placeholder"))
+
+    def test_read_returns_csv_columns(self):
+        test = rows()
+        database.write(self.connection, test)
+        for table in columns:
+            data_frame = database.read(self.path, table)
+            self.assertEqual(list(data_frame.columns), columns[table])
+            self.assertEqual(
+                data_frame.values.tolist(),
+                [list(row) for row in test[table]],
+            )
+
+    def test_read_last(self):
+        database.write(self.connection, rows("21/10/2021 21:21:00"))
+        database.write(self.connection, rows("22/10/2021 21:21:00"))
+        data_frame = database.read(self.path, "char_speeds", last=8)
+        self.assertEqual(len(data_frame), 8)
+        self.assertEqual(list(data_frame["char"]), list("x ab cx "))
+        self.assertEqual(
+            data_frame["timestamp"].iloc[-1], "22/10/2021 21:21:00"
+        )
+
+    def test_import_csv(self):
+        write_csv(self.directory.name, rows("21/10/2021 21:21:00"))
+        write_csv(self.directory.name, rows("22/10/2021 21:21:00"))
+        database.import_csv(self.connection, self.directory.name)
+        self.assertEqual(len(database.read(self.path, "results")), 2)
+        counts = self.connection.execute(
+            "SELECT test_id, count(*) FROM char_speeds GROUP BY test_id"
+        ).fetchall()
+        self.assertEqual(counts, [(1, 6), (2, 6)])
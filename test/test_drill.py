@@ -0,0 +1,104 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from typetest import drill
+from typetest.corpus import Registry
+from typetest.database import connect, write
+from typetest import results
+from typetest.results import write_csv
+
+
+def typing_rows(timestamp, text, slow="", fast=0.1, slowed=0.4):
+    """Rows of a test of typing `text`, pausing before every character that
+    follows one of `slow`.
+    """
+    durations = [slowed if char in slow else fast for char in text]
+    return results.test_rows(
+        timestamp, 60, 100, 10, 30, "", text, durations, text.split()
+    )
+
+
+class TestDrill(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = self.directory.name
+        for second in range(5):
+            rows = typing_rows(
+                f"21/10/2021 21:21:0{second}", "the quiz zone is a jam ", "qj"
+            )
+            write_csv(self.path, rows)
+        self.char_speeds = os.path.join(self.path, "char_speeds.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_bigram_latencies(self):
+        rows = typing_rows("21/10/2021 21:21:09", "ab cd ", "a")
+        write_csv(self.path, rows)
+        latencies = drill.bigram_latencies(self.char_speeds)
+        self.assertEqual(latencies["ab"][1], 1)
+        self.assertAlmostEqual(latencies["ab"][0], 0.4, delta=0.03)
+        self.assertAlmostEqual(latencies["cd"][0], 0.1, delta=0.01)
+        # transitions across words and tests are left out
+        self.assertFalse(any(" " in bigram for bigram in latencies))
+        self.assertEqual(sum(c for _, c in latencies.values()), 5 * 11 + 2)
+        self.assertEqual(drill.bigram_latencies(self.path + "/none"), {})
+
+    def test_latencies_are_cached_next_to_the_history(self):
+        drill.bigram_latencies(self.char_speeds)
+        self.assertTrue(os.path.isfile(self.char_speeds + ".digraphs"))
+        rows = typing_rows("21/10/2021 21:21:09", "jj ", "j")
+        write_csv(self.path, rows)  # only appended rows are read
+        latencies = drill.bigram_latencies(self.char_speeds)
+        self.assertEqual(latencies["jj"][1], 1)
+        self.assertEqual(latencies["ja"][1], 5)
+
+    def test_slow_bigrams(self):
+        latencies = drill.bigram_latencies(self.char_speeds)
+        slow = drill.slow_bigrams(latencies)
+        self.assertEqual(sorted(b for b, _ in slow), ["ja", "qu"])
+        self.assertAlmostEqual(slow[0][1], 4, delta=0.3)
+
+    def test_drill(self):
+        index = drill.BigramIndex(["quite", "queue", "the", "jam", "a"])
+        self.assertEqual(index.postings["qu"], [0, 1])
+        self.assertEqual(index.postings["ue"], [1])
+
+        words = drill.drill(index, [("qu", 4), ("xz", 2)], 1000, seed=0)
+        self.assertEqual(set(words), {"quite", "queue", "xzxzxz"})
+        # half of the weight is on the bigram no word contains
+        self.assertAlmostEqual(words.count("xzxzxz"), 500, delta=80)
+        self.assertEqual(drill.drill(index, [], 10), [])
+
+    def test_index_is_stored_in_the_registry(self):
+        registry = Registry(os.path.join(self.path, "registry"))
+        os.makedirs(registry.directory, exist_ok=True)
+        test_hash = registry.add("jam quiz jazz", "drill")
+        index = drill.load_index("drill", registry)
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(registry.directory, f"{test_hash}.bigrams")
+            )
+        )
+        self.assertEqual(
+            drill.load_index("drill", registry).postings, index.postings
+        )
+        self.assertEqual(index.postings["ja"], [0, 2])
+
+    def test_database(self):
+        database = os.path.join(self.path, "results.db")
+        connection = connect(database)
+        for second in range(5):
+            write(
+                connection,
+                typing_rows(f"21/10/2021 21:21:0{second}", "ja qu ", "jq"),
+            )
+        connection.close()
+        latencies = drill.bigram_latencies(database)
+        self.assertEqual(set(latencies), {"ja", "qu"})
+        self.assertEqual(latencies["ja"][1], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import json
+import unittest
+from tempfile import TemporaryDirectory
+from multiprocessing import Pool
+
+from test.test_results import rows
+from typetest import journal
+
+
+def append_tests(directory, count=10):
+    for _ in range(count):
+        journal.append(directory, rows())
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = TemporaryDirectory()
+        self.directory = self.temporary_directory.name
+        self.path = os.path.join(self.directory, journal.journal_name)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def read(self, table):
+        with open(os.path.join(self.directory, f"{table}.csv")) as f:
+            return f.readlines()
+
+    def test_records(self):
+        self.assertEqual(list(journal.records(self.path)), [])
+        append_tests(self.directory, 3)
+        tests = list(journal.records(self.path))
+        self.assertEqual(len(tests), 3)
+        self.assertEqual(tests[0], json.loads(json.dumps(rows())))
+
+    def test_damaged_records_are_skipped(self):
+        journal.append(self.directory, rows())
+        size = os.path.getsize(self.path)
+        journal.append(self.directory, rows())
+        os.truncate(self.path, size + 30)  # killed while appending
+        self.assertEqual(len(list(journal.records(self.path))), 1)
+
+        journal.append(self.directory, rows())
+        self.assertEqual(len(list(journal.records(self.path))), 2)
+
+        with open(self.path, "r+b") as f:  # a flipped byte in the first
+            f.seek(journal.header.size + 5)
+            f.write(b"X")
+        self.assertEqual(len(list(journal.records(self.path))), 1)
+
+    def test_compact(self):
+        with open(os.path.join(self.directory, "results.csv"), "w") as f:
+            f.write("20/10/2021 21:21:00,50,90,1.5,30,abc\n20/10/2021 21:2")
+        append_tests(self.directory, 2)
+
+        self.assertEqual(journal.compact(self.directory), 2)
+        self.assertEqual(os.path.getsize(self.path), 0)
+        self.assertEqual(len(self.read("results")), 3)  # cut-off line dropped
+        self.assertEqual(
+            self.read("mistyped_words"), ["cd,cx,21/10/2021 21:21:00\n"] * 2
+        )
+        self.assertEqual(journal.compact(self.directory), 0)
+
+    def test_interrupted_compaction_is_undone(self):
+        append_tests(self.directory, 2)
+        journal.compact(self.directory)
+        append_tests(self.directory, 1)
+
+        # a compaction killed after writing the csv files, but before
+        # emptying the journal
+        marker = {
+            "journal": os.stat(self.path).st_ino,
+            "sizes": {
+                table: os.path.getsize(
+                    os.path.join(self.directory, f"{table}.csv")
+                )
+                for table in journal.columns
+            },
+        }
+        with open(self.path + ".compacting", "w") as f:
+            json.dump(marker, f)
+        with open(os.path.join(self.directory, "results.csv"), "a") as f:
+            f.write("21/10/2021 21:21:00,60,80,1.5,30,da48\n")
+
+        self.assertEqual(journal.compact(self.directory), 1)
+        self.assertEqual(len(self.read("results")), 3)
+        self.assertFalse(os.path.exists(self.path + ".compacting"))
+
+    def test_processes_appending_at_once(self):
+        with Pool(4) as pool:
+            pool.map(append_tests, [self.directory] * 4)
+        self.assertEqual(journal.compact(self.directory), 40)
+        self.assertEqual(len(self.read("char_speeds")), 40 * 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from typetest import driver, keylog
+from typetest.session import TypingSession, actions, second
+
+
+class Arrow(str):
+    is_sequence = True
+    code = 259
+
+
+def keys(text, start=second, interval=second // 10):
+    return [(key, start + i * interval) for i, key in enumerate(text)]
+
+
+class TestKeylog(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, session, hash="da4846a3c2a8469dd77c921ab0b0bcd506b6e9f3"):
+        return keylog.write(
+            self.path, session.events, session.attempts, session.duration, hash
+        )
+
+    def test_every_key_event_is_logged(self):
+        session = TypingSession(["ab", "cd"])
+        for key, time in keys("ax\x7fb c\x17\x12ab c") + [
+            (Arrow("\x1b[A"), 2 * second),
+            ("\x03", 3 * second),
+        ]:
+            session.feed(key, time)
+
+        path = self.write(session)
+        events = list(keylog.events(path))
+        self.assertEqual(
+            [actions[event.action] for event in events],
+            ["type", "type", "delete", "type", "submit", "type", "clear"]
+            + ["restart", "type", "type", "submit", "type", "ignore", "stop"],
+        )
+        self.assertEqual(
+            [event.word_index for event in events],
+            [0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 1, 1, 1],
+        )
+        self.assertEqual(events[0].time, second)
+        self.assertEqual(events[2].code, 0x7F)
+        self.assertEqual((events[-2].code, events[-2].flags), (259, 1))
+        self.assertEqual(keylog.corrections(path), {0: (1, 0), 1: (0, 1)})
+
+    def test_arrays_map_the_log(self):
+        session = driver.replay(
+            ["ab", "cd"] * 10, keys("ab cd " * 10, interval=7)
+        )
+        path = self.write(session)
+        log = keylog.arrays(path)
+        self.assertEqual(len(log), len(list(keylog.events(path))))
+        self.assertEqual(list(log.time[:3]), [second, second + 7, second + 14])
+        self.assertEqual(bytes(log.code[:3].astype("u1")), b"ab ")
+        self.assertEqual(log.word_index[-1], 19)
+
+        with open(path, "ab") as f:  # cut off while writing a record
+            f.write(b"\x01\x02")
+        self.assertEqual(len(keylog.arrays(path)), len(log))
+        self.assertEqual(len(list(keylog.events(path))), len(log))
+
+        with open(os.path.join(self.path, "x.ttk"), "wb") as f:
+            f.write(b"not a log")
+        with self.assertRaises(ValueError):
+            list(keylog.events(os.path.join(self.path, "x.ttk")))
+
+    def test_tests_are_replayed_exactly(self):
+        words = "the quick brown fox jumps over the lazy dog".split()
+        for duration in [float("inf"), 2]:
+            keys = list(
+                driver.synthetic_keys(words, 70, mistake_rate=0.1, seed=1)
+            )
+            keys.insert(5, ("\x13", keys[4][1] + 1))  # restart reshuffled
+            session = driver.replay(list(words), keys, duration)
+
+            replayed = keylog.replay(self.write(session))
+            self.assertEqual(replayed.duration, duration)
+            self.assertEqual(replayed.restart_count, 1)
+            for attribute in [
+                "typing_speed_in_wpm",
+                "correct_chars",
+                "total_chars",
+                "actual_duration",
+                "submitted_words",
+                "char_codes",
+                "char_times",
+            ]:
+                self.assertEqual(
+                    getattr(replayed, attribute), getattr(session, attribute)
+                )
+
+    def test_words_are_logged_in_the_order_shown(self):
+        session = TypingSession(["ab", "cd", "ef"])
+        for key, time in keys("ab \x13"):
+            session.feed(key, time)
+        shown = list(session.words)
+        path = self.write(session, hash="custom hash longer than a sha1 hash")
+        with open(path, "rb") as f:
+            duration, hash, attempts = keylog.read_header(f)
+        self.assertEqual(hash, "custom hash longer than a sha1 hash")
+        self.assertEqual(attempts, [["ab", "cd", "ef"], shown[:2]])
+        self.assertEqual(len(keylog.arrays(path)), 4)
+
+    def test_logs_of_the_same_second_are_kept(self):
+        session = driver.replay(["ab"], keys("ab "))
+        paths = {self.write(session) for _ in range(3)}
+        self.assertEqual(len(paths), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from typetest.layout import Layout
+
+
+def wrap(words, width):
+    """Reference word wrap returning a list of lines of words."""
+    lines = [[]]
+    for word in words:
+        line = lines[-1]
+        if line and len(" ".join(line + [word])) > width:
+            lines.append([word])
+        else:
+            line.append(word)
+    return lines
+
+
+class TestLayout(unittest.TestCase):
+    words = "the quick brown fox jumps over the lazy dog again".split()
+
+    def test_lines_match_reference_wrap(self):
+        for width in range(5, 40):
+            layout = Layout(self.words, width)
+            expected = wrap(self.words, width)
+            spans = layout.lines(0, len(self.words))
+            lines = [self.words[start:stop] for start, stop in spans]
+            self.assertEqual(lines, expected)
+
+    def test_line_of(self):
+        layout = Layout(self.words, 15)
+        self.assertEqual(layout.line_of(0), 0)
+        self.assertEqual(layout.line_of(2), 0)
+        self.assertEqual(layout.line_of(3), 1)
+        self.assertEqual(layout.line_of(9), 3)
+
+    def test_wraps_lazily(self):
+        layout = Layout(self.words, 15)
+        self.assertEqual(layout.lines(0, 1), [(0, 3)])
+        self.assertEqual(layout.end, 4)
+        self.assertFalse(layout.exhausted)
+
+    def test_no_line_past_the_end(self):
+        layout = Layout(self.words, 15)
+        self.assertEqual(layout.lines(9, 3), [(9, 10)])
+        self.assertIsNone(layout.line(4))
+        self.assertIsNone(Layout([], 15).line(0))
+
+    def test_long_word_gets_its_own_line(self):
+        layout = Layout(["a", "abcdefghij", "b"], 5)
+        self.assertEqual(layout.lines(0, 3), [(0, 1), (1, 2), (2, 3)])
@@ -0,0 +1,150 @@
+import os
+import unittest
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+
+from test.test_results import rows
+
+import pandas as pd
+
+from typetest import archive, database
+from typetest.analyse import loaders
+from typetest.results import write_csv
+
+
+class TestLoaders(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "char_speeds.csv")
+        patcher = patch.object(pd, "read_csv", wraps=pd.read_csv)
+        self.read_csv = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(loaders, "cache_threshold", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, **kwargs):
+        return loaders.read("char_speeds", self.path, **kwargs)
+
+    def test_cache_is_extended_with_appended_lines(self):
+        write_csv(self.directory.name, rows("21/10/2021 21:21:00"))
+        self.assertEqual(len(self.read()), 6)
+        self.assertTrue(os.path.isfile(self.path + ".cache"))
+
+        write_csv(self.directory.name, rows("22/10/2021 21:21:00"))
+        self.read_csv.reset_mock()
+        data_frame = self.read()
+        self.assertEqual(len(data_frame), 12)
+        self.assertEqual(
+            data_frame["timestamp"].iloc[-1], "22/10/2021 21:21:00"
+        )
+        self.assertEqual(list(data_frame.index), list(range(12)))
+        # only the appended lines were parsed
+        [(source, *_), _] = self.read_csv.call_args
+        self.assertEqual(len(source.getvalue().splitlines()), 6)
+
+    def test_cache_is_rebuilt_when_file_is_rewritten(self):
+        write_csv(self.directory.name, rows("21/10/2021 21:21:00"))
+        self.read()
+        os.remove(self.path)
+        write_csv(self.directory.name, rows("23/10/2021 21:21:00"))
+        write_csv(self.directory.name, rows("23/10/2021 21:21:00"))
+        data_frame = self.read()
+        self.assertEqual(len(data_frame), 12)
+        self.assertEqual(set(data_frame["timestamp"]), {"23/10/2021 21:21:00"})
+
+    def test_tail_reads_last_lines(self):
+        with open(self.path, "wb") as f:
+            f.write(b"".join(b"%d\n" % i for i in range(1000)))
+        self.assertEqual(loaders.tail(self.path, 3), b"997\n998\n999\n")
+        self.assertEqual(
+            loaders.tail(self.path, 3, block_size=2), b"997\n998\n999\n"
+        )
+        self.assertEqual(len(loaders.tail(self.path, 2000).splitlines()), 1000)
+        with open(self.path, "ab") as f:
+            f.write(b"1000")
+        self.assertEqual(loaders.tail(self.path, 2), b"999\n1000")
+
+    def test_last_rows_are_read_from_the_end(self):
+        for day in range(20, 23):
+            write_csv(self.directory.name, rows(f"{day}/10/2021 21:21:00"))
+        data_frame = self.read(last=8)
+        self.assertEqual(list(data_frame.index), list(range(8)))
+        self.assertEqual(
+            list(data_frame["timestamp"]),
+            ["21/10/2021 21:21:00"] * 2 + ["22/10/2021 21:21:00"] * 6,
+        )
+        self.assertFalse(os.path.isfile(self.path + ".cache"))
+
+    def test_session_reads_tables_once(self):
+        write_csv(self.directory.name, rows())
+        with loaders.session():
+            first = self.read()
+            first["wpm"] = 0
+            second = self.read()
+        self.assertEqual(self.read_csv.call_count, 1)
+        self.assertNotEqual(list(second["wpm"]), [0] * 6)
+
+    def test_chunks_of_csv_files(self):
+        for day in range(20, 23):
+            write_csv(self.directory.name, rows(f"{day}/10/2021 21:21:00"))
+        with patch.object(loaders, "csv_chunk_size", 100):
+            chunks = list(loaders.chunks("char_speeds", self.path))
+            data_frame = pd.concat([chunk for chunk, _ in chunks])
+            self.assertEqual(len(data_frame), 18)
+            self.assertEqual(chunks[-1][1], os.path.getsize(self.path))
+
+            _, end = chunks[0]
+            rest = loaders.chunks("char_speeds", self.path, end)
+            self.assertEqual(
+                sum(len(chunk) for chunk, _ in rest), 18 - len(chunks[0][0])
+            )
+
+    def test_chunks_of_databases_and_archives(self):
+        database_path = os.path.join(self.directory.name, "results.db")
+        archive_path = os.path.join(self.directory.name, "results.ttc")
+        connection = database.connect(database_path)
+        for day in range(20, 23):
+            test = rows(f"{day}/10/2021 21:21:00")
+            database.write(connection, test)
+            archive.Archive(archive_path).append(test)
+        connection.close()
+
+        for path in [database_path, archive_path]:
+            with patch.object(loaders, "chunk_size", 4):
+                chunks = list(loaders.chunks("char_speeds", path))
+                self.assertEqual(
+                    [end for _, end in chunks], [4, 8, 12, 16, 18]
+                )
+                data_frame = pd.concat([chunk for chunk, _ in chunks])
+                self.assertEqual("".join(data_frame["char"]), "ab cx " * 3)
+                rest = loaders.chunks("char_speeds", path, 16)
+                self.assertEqual([end for _, end in rest], [18])
+
+    def test_digraphs_are_cached_and_extended(self):
+        write_csv(self.directory.name, rows("21/10/2021 21:21:00"))
+        _, counts = loaders.digraphs(self.path).matrix()
+        self.assertEqual(counts.loc["a", "b"], 1)
+        self.assertTrue(os.path.isfile(self.path + ".digraphs"))
+
+        write_csv(self.directory.name, rows("22/10/2021 21:21:00"))
+        self.read_csv.reset_mock()
+        medians, counts = loaders.digraphs(self.path).matrix()
+        self.read_csv.assert_called_once()  # only the appended lines
+        self.assertEqual(counts.loc["a", "b"], 2)
+        self.assertEqual(counts.loc["c", "x"], 2)
+        self.assertAlmostEqual(medians.loc["a", "b"], 0.1, delta=0.006)
+
+        with open(self.path, "w") as f:  # rewritten
+            f.write(
+                "q,0.2,60,21/10/2021 21:21:00\nw,0.2,60,21/10/2021 21:21:00\n"
+            )
+        _, counts = loaders.digraphs(self.path).matrix()
+        self.assertEqual(list(counts.index), ["q", "w"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import csv
+import unittest
+from tempfile import TemporaryDirectory
+
+from test.test_render import FakeTerminal
+from typetest import __main__ as typetest
+from typetest.layout import Layout
+from typetest.profiling import Profile, histogram, percentile
+from typetest.render import Renderer
+
+
+class KeyboardTerminal(FakeTerminal):
+    """Terminal that is typed `keys` on."""
+
+    width = 40
+    height = 5
+
+    def __init__(self, keys):
+        super().__init__()
+        self.keys = list(keys)
+
+    def inkey(self, timeout=None, esc_delay=0):
+        return self.keys.pop(0) if self.keys else ""
+
+
+class TestProfiling(unittest.TestCase):
+    def test_percentile(self):
+        ordered = list(range(1, 101))
+        self.assertEqual(percentile(ordered, 50), 50)
+        self.assertEqual(percentile(ordered, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_histogram(self):
+        self.assertEqual(
+            histogram([1, 3, 4, 7, 8, 100]),
+            {2: 1, 4: 1, 8: 2, 16: 1, 32: 0, 64: 0, 128: 1},
+        )
+
+    def test_instrument_and_restore(self):
+        lines, inkey = Layout.lines, KeyboardTerminal.inkey
+        terminal = KeyboardTerminal("ab c")
+        renderer = Renderer(terminal)
+        words = ["ab", "cd", "ef"]
+        layout = Layout(words, terminal.width)
+
+        profile = Profile()
+        profile.instrument(typetest, terminal, renderer)
+        for i in range(5):
+            terminal.inkey()  # the last key read is empty
+            typetest.draw(
+                terminal, renderer, 2, layout, {}, 0, "ab"[:i], 60, i
+            )
+        profile.restore()
+
+        samples = profile.samples
+        self.assertEqual(len(samples["keystroke"]), 4)
+        self.assertEqual(len(samples["draw"]), 5)
+        self.assertEqual(len(samples["wrap"]), 5)
+        self.assertEqual(len(samples["render"]), 5)
+        self.assertGreater(len(samples["write"]), 0)
+        self.assertIn("keystroke latency", profile.report())
+        self.assertIn(
+            f"5 frames, {renderer.writes} writes,"
+            + f" {renderer.bytes_written} bytes written",
+            profile.report(),
+        )
+
+        self.assertIs(Layout.lines, lines)
+        self.assertIs(terminal.inkey.__func__, inkey)
+        self.assertNotIn("render", vars(renderer))
+        self.assertEqual(typetest.draw.__name__, "draw")
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "samples.csv")
+            profile.dump(path)
+            with open(path) as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(len(rows), sum(map(len, samples.values())))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import re
+import unicodedata
+import unittest
+from io import StringIO
+
+from typetest.render import Renderer, cells
+
+
+class FakeTerminal:
+    """Terminal emitting readable escape sequences."""
+
+    width = 20
+    normal = "<n>"
+    clear = "<c>"
+    clear_eol = "<k>"
+
+    def __init__(self):
+        self.stream = StringIO()
+
+    def move_yx(self, y, x):
+        return f"<{y},{x}>"
+
+    def length(self, text):
+        return sum(
+            2 if unicodedata.east_asian_width(char) in "WF" else 1
+            for char in text
+        )
+
+
+def screen(output, height=5, width=20):
+    """Replays `output` of a `FakeTerminal` and returns the screen lines."""
+    lines = [[" "] * width for _ in range(height)]
+    y = x = 0
+    for token in re.findall(r"<[^>]*>|.", output):
+        if token == "<c>":
+            lines = [[" "] * width for _ in range(height)]
+        elif token == "<k>":
+            lines[y][x:] = [" "] * (width - x)
+        elif re.match(r"<\d+,\d+>", token):
+            y, x = map(int, token[1:-1].split(","))
+        elif not token.startswith("<"):
+            lines[y][x] = token
+            x += 1
+    return ["".join(line).rstrip() for line in lines]
+
+
+class TestRenderer(unittest.TestCase):
+    def setUp(self):
+        self.terminal = FakeTerminal()
+        self.renderer = Renderer(self.terminal)
+
+    def output(self):
+        return self.terminal.stream.getvalue()
+
+    def test_unchanged_frame_writes_nothing(self):
+        frame = [cells("hello"), cells("world")]
+        self.renderer.render(frame)
+        written = self.renderer.bytes_written
+        self.renderer.render(frame)
+        self.assertEqual(self.renderer.bytes_written, written)
+        self.assertEqual(self.renderer.writes, 1)
+
+    def test_only_changed_cells_are_written(self):
+        self.renderer.render([cells("hello world"), cells(">>> ab")])
+        start = len(self.output())
+        self.renderer.render([cells("hello world"), cells(">>> abc")])
+        self.assertEqual(self.output()[start:], "<1,6>c")
+
+    def test_one_write_per_frame(self):
+        self.renderer.render([cells("a"), cells("b"), cells("c")])
+        self.renderer.render([cells("x"), cells("y"), cells("z")])
+        self.assertEqual(self.renderer.writes, 2)
+
+    def test_changes_after_wide_characters(self):
+        self.renderer.render([cells("日本語 ab")])
+        start = len(self.output())
+        self.renderer.render([cells("日本語 ac")])
+        self.assertEqual(self.output()[start:], "<0,8>c")
+
+    def test_screen_matches_frame(self):
+        frames = [
+            [cells("the quick", "<r>"), cells(">>> th")],
+            [cells("the quick brown"), cells(">>> the")],
+            [cells("fox"), cells(">>>"), []],
+            [cells("fox jumps", "<g>")],
+        ]
+        for frame in frames:
+            self.renderer.render(frame)
+            expected = ["".join(c for _, c in row) for row in frame]
+            expected += [""] * (5 - len(expected))
+            self.assertEqual(screen(self.output()), expected)
+
+    def test_invalidate_redraws_everything(self):
+        self.renderer.render([cells("hello")])
+        self.renderer.invalidate()
+        start = len(self.output())
+        self.renderer.render([cells("hello")])
+        self.assertEqual(self.output()[start:], "<c><0,0>hello<k>")
+
+    def test_render_row(self):
+        self.renderer.render([cells("hello"), cells("00:01")])
+        self.renderer.render_row(1, cells("00:02"))
+        self.assertEqual(screen(self.output())[:2], ["hello", "00:02"])
+        self.renderer.render([cells("hello"), cells("00:02")])
+        self.assertEqual(self.renderer.writes, 2)
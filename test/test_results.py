@@ -0,0 +1,44 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from typetest.results import write_csv
+from typetest import results
+
+
+def rows(timestamp="21/10/2021 21:21:00"):
+    """Rows of a test of typing `ab cd` as `ab cx`."""
+    return results.test_rows(
+        timestamp,
+        60,
+        80,
+        1.5,
+        30,
+        "da4846a3c2a8469dd77c921ab0b0bcd506b6e9f3",
+        "ab cx ",
+        [0.1, 0.2, 0.3, 0.1, 0.2, 0.5],
+        ["ab", "cd"],
+    )
+
+
+class TestResults(unittest.TestCase):
+    def test_test_rows(self):
+        test = rows()
+        self.assertEqual(len(test["results"]), 1)
+        self.assertEqual(len(test["char_speeds"]), 6)
+        self.assertEqual(
+            test["char_speeds"][0], ["a", 0.1, 120, "21/10/2021 21:21:00"]
+        )
+        [word_speed] = test["word_speeds"]
+        self.assertEqual(word_speed[0], "ab")
+        self.assertAlmostEqual(word_speed[1], 0.3)
+        self.assertEqual(
+            test["mistyped_words"], [["cd", "cx", "21/10/2021 21:21:00"]]
+        )
+
+    def test_write_csv(self):
+        with TemporaryDirectory() as directory:
+            write_csv(directory, rows())
+            write_csv(directory, rows())
+            with open(os.path.join(directory, "mistyped_words.csv")) as f:
+                self.assertEqual(f.read(), "cd,cx,21/10/2021 21:21:00\n" * 2)
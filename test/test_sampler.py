@@ -0,0 +1,125 @@
+import os
+import random
+import unittest
+from collections import Counter
+from tempfile import TemporaryDirectory
+
+from test.test_results import rows
+from typetest import driver
+from typetest.results import write_csv
+from typetest.sampler import WeightedSampler
+from typetest.practice import PracticeWords, load, weights
+from typetest.word_stats import WordStats
+
+
+class CountingRandom(random.Random):
+    """Counts the random numbers drawn."""
+
+    calls = 0
+
+    def random(self):
+        self.calls += 1
+        return super().random()
+
+
+class TestWeightedSampler(unittest.TestCase):
+    def assertDistribution(self, sampler, weights, draws=40000):
+        counts = Counter(sampler.draw() for _ in range(draws))
+        total = sum(weights)
+        for index, weight in enumerate(weights):
+            expected = draws * weight / total
+            # within 5 standard deviations
+            delta = 5 * (expected + 1) ** 0.5
+            self.assertAlmostEqual(counts[index], expected, delta=delta)
+
+    def test_draws_in_proportion_to_weights(self):
+        weights = [1, 2, 3, 0.1, 10, 0.5, 7]
+        sampler = WeightedSampler(weights, random.Random(0))
+        self.assertDistribution(sampler, weights)
+
+    def test_updates(self):
+        weights = [1, 2, 3, 4]
+        sampler = WeightedSampler(weights, random.Random(1))
+        weights[0] = 20
+        sampler.update(0, 20)
+        weights[3] = 0
+        sampler.update(3, 0)
+        weights[1] = 0.01
+        sampler.update(1, 0.01)
+        self.assertDistribution(sampler, weights)
+
+        for index in range(4):
+            sampler.update(index, 0)
+        with self.assertRaises(IndexError):
+            sampler.draw()
+        with self.assertRaises(ValueError):
+            sampler.update(0, -1)
+
+    def test_draw_cost_is_independent_of_size(self):
+        costs = []
+        for size in [10, 100000]:
+            generator = CountingRandom(2)
+            weights = [generator.uniform(0.1, 100) for _ in range(size)]
+            sampler = WeightedSampler(weights, generator)
+            for _ in range(1000):
+                sampler.update(generator.randrange(size), generator.random())
+            generator.calls = 0
+            for _ in range(10000):
+                sampler.draw()
+            costs.append(generator.calls / 10000)
+        self.assertLess(max(costs), 6)  # 3 numbers a try, under 2 tries
+        self.assertAlmostEqual(costs[0], costs[1], delta=0.5)
+
+
+class TestPractice(unittest.TestCase):
+    def test_weak_words_are_heavier(self):
+        stats = WordStats()
+        for wpm in [60, 62, 58]:
+            stats.add("fast", wpm)
+            stats.add("slow", wpm / 2)
+            stats.add("mistyped", wpm)
+            stats.add_mistype("mistyped")
+        fast, slow, mistyped, new = weights(
+            ["fast", "slow", "mistyped", "new"], stats
+        )
+        self.assertGreater(slow, fast)
+        self.assertGreater(mistyped, fast)
+        self.assertGreater(new, fast)
+
+    def test_words_follow_the_test(self):
+        words = PracticeWords(["a", "b"], [1, 1], seed=0)
+        self.assertTrue(all(words[i] in "ab" for i in range(100)))
+        words.discard(90)
+        with self.assertRaises(IndexError):
+            words[89]
+        self.assertEqual(len(words.words), 10)
+
+        for _ in range(3):
+            words.observe("a", False)
+            words.observe("b", True)
+        words.restart(shuffle=True)
+        self.assertGreater(Counter(words[i] for i in range(1000))["a"], 900)
+
+    def test_typing_a_practice_test(self):
+        words = PracticeWords(["ab", "cd", "ef"], [1, 1, 1], seed=3)
+        typed = [words[i] for i in range(20)]
+        session = driver.replay(words, driver.synthetic_keys(typed, 60))
+        self.assertEqual(len(session.submitted_words), 20)
+        other = PracticeWords(["ab", "cd"], [1, 1])
+        self.assertNotEqual(words.hexdigest(), other.hexdigest())
+
+    def test_load_weights_from_results(self):
+        with TemporaryDirectory() as directory:
+            write_csv(directory, rows())
+            words = load(["ab", "cd", "ab", "xy"], directory, seed=4)
+            # the stats built from the history are kept for the next tests
+            stats = WordStats.load(os.path.join(directory, "word_stats.json"))
+        self.assertEqual(words.vocabulary, ["ab", "cd", "xy"])
+        ab, cd, xy = words.initial_weights
+        self.assertGreater(cd, ab)  # mistyped
+        self.assertGreater(xy, ab)  # never typed
+        self.assertEqual(stats.mistypes, {"cd": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
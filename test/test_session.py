@@ -0,0 +1,119 @@
+import io
+import unittest
+
+from typetest import driver
+from typetest.session import (
+    TypingSession,
+    second,
+    TICK,
+    TIMEOUT,
+    STOP,
+    DELETE,
+    SUBMIT,
+    TYPE,
+    COMPLETE,
+    IGNORE,
+)
+
+
+def keys(text, start=second, interval=second // 10):
+    """Keys of typing `text` one key every `interval` from `start`."""
+    return [(key, start + i * interval) for i, key in enumerate(text)]
+
+
+class TestTypingSession(unittest.TestCase):
+    def test_typing_a_test(self):
+        session = driver.replay(["ab", "cd"], keys("ab cx "))
+        self.assertFalse(session.active)
+        self.assertEqual(session.submitted_words, ["ab", "cd"])
+        self.assertEqual(session.marks, {0: True, 1: False})
+        self.assertEqual(session.correct_chars, 2)
+        self.assertEqual(session.total_chars, 4)
+        self.assertEqual(session.accuracy, 50)
+        self.assertEqual(session.typing_speed_in_wpm, 48)
+        self.assertAlmostEqual(session.actual_duration, 0.5)
+
+        rows = session.rows("21/10/2021 21:21:00", "hash")
+        # the last character has no duration until a next one
+        self.assertEqual(len(rows["char_speeds"]), 5)
+        [word_speed] = rows["word_speeds"]
+        self.assertEqual(word_speed[0], "ab")
+        self.assertAlmostEqual(word_speed[1], 0.2)
+
+    def test_actions(self):
+        session = TypingSession(["ab", "cd"])
+        self.assertEqual(session.feed("", 5), TICK)
+        self.assertEqual(session.start, 0)
+        self.assertEqual(session.feed(" ", 10), IGNORE)
+        self.assertEqual(session.start, 10)
+        self.assertEqual(session.feed("a", 11), TYPE)
+        self.assertEqual(session.feed("x", 12), TYPE)
+        self.assertEqual(session.feed("\x7f", 13), DELETE)
+        self.assertEqual(session.user_text, "a")
+        self.assertEqual(session.feed("b", 14), TYPE)
+        self.assertEqual(session.feed(" ", 15), SUBMIT)
+        self.assertEqual(session.word, "cd")
+        self.assertEqual(session.feed("c", 16), TYPE)
+        self.assertEqual(session.feed("\x17", 17), "clear")
+        self.assertEqual(session.user_text, "")
+        self.assertEqual(session.feed("c", 18), TYPE)
+        self.assertEqual(session.feed("d", 19), COMPLETE)
+        self.assertEqual(session.feed(" ", 20), SUBMIT)
+        self.assertFalse(session.active)
+
+    def test_restart(self):
+        words = ["ab", "cd"]
+        session = driver.replay(words, keys("ab c\x12ab cx "))
+        self.assertEqual(session.restart_count, 1)
+        self.assertEqual(session.submitted_words, ["ab", "cd"])
+        self.assertEqual(session.accuracy, 50)
+        self.assertEqual(len(session.char_codes), 6)
+
+    def test_stop_and_timeout(self):
+        session = TypingSession(["ab", "cd"])
+        session.feed("a", second)
+        self.assertEqual(session.feed("\x1b", 2 * second), STOP)
+        self.assertFalse(session.active)
+        self.assertFalse(session.finish())  # nothing was submitted
+
+        session = TypingSession(["ab", "cd", "ef"], duration=1)
+        session.feed("a", second)
+        session.feed("b", second + 1)
+        session.feed(" ", second + 2)
+        self.assertEqual(session.feed("c", 2 * second), TIMEOUT)
+        self.assertEqual(session.typing_duration, 1)
+        self.assertTrue(session.finish())
+
+    def test_synthetic_keys(self):
+        words = "the quick brown fox jumps over the lazy dog".split()
+        test = list(driver.synthetic_keys(words, 60, 0.2, seed=1))
+        session = driver.replay(words, test)
+        self.assertEqual(session.submitted_words, words)
+        self.assertTrue(all(session.marks.values()))
+        self.assertLess(session.accuracy, 100)  # deleted mistakes count
+        self.assertGreater(len(test), len(" ".join(words)))
+
+        file = io.StringIO()
+        driver.write_keys(file, test)
+        file.seek(0)
+        self.assertEqual(list(driver.read_keys(file)), test)
+
+    def test_replays_are_repeatable(self):
+        words = "the quick brown fox jumps over the lazy dog".split()
+        for seed in range(20):
+            test = list(driver.synthetic_keys(words, 80, 0.05, seed=seed))
+            first, again = (driver.replay(words, test) for _ in range(2))
+            self.assertEqual(first.submitted_words, words)
+            for attribute in [
+                "typing_speed_in_wpm",
+                "accuracy",
+                "char_codes",
+                "char_times",
+            ]:
+                self.assertEqual(
+                    getattr(first, attribute), getattr(again, attribute)
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
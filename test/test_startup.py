@@ -0,0 +1,45 @@
+import sys
+import unittest
+import subprocess
+
+# modules the typing test must not import before the first frame, since
+# they take long to import
+heavy_modules = ["pandas", "numpy", "matplotlib", "seaborn", "sqlite3"]
+
+
+def imported_modules(module):
+    """Imports `module` in a new interpreter and returns the names of all
+    modules it has loaded.
+    """
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return process.stdout.split()
+
+
+class TestStartup(unittest.TestCase):
+    def test_typing_test_imports_are_light(self):
+        modules = imported_modules("typetest.__main__")
+        self.assertEqual(
+            [m for m in heavy_modules if m in modules],
+            [],
+            "the typing test must not import analysis dependencies",
+        )
+
+    def test_analyse_imports_plotting_libraries_only_for_graphs(self):
+        modules = imported_modules("typetest.analyse.__main__")
+        self.assertEqual([m for m in heavy_modules if m in modules], [])
+        modules = imported_modules("typetest.analyse.text_report")
+        self.assertNotIn("matplotlib", modules)
+        self.assertNotIn("seaborn", modules)
+
+
+if __name__ == "__main__":
+    unittest.main()
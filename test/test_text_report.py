@@ -0,0 +1,51 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from test.test_results import rows
+
+from blessed import Terminal
+
+from typetest.analyse import text_report
+from typetest.results import write_csv
+
+
+class TestTextReport(unittest.TestCase):
+    def test_sparkline(self):
+        self.assertEqual(text_report.sparkline([]), "")
+        self.assertEqual(text_report.sparkline([1, 1]), "▁▁")
+        self.assertEqual(text_report.sparkline([0, 6, 14]), "▁▄█")
+
+    def test_report(self):
+        with TemporaryDirectory() as directory:
+            for day in range(20, 23):
+                write_csv(directory, rows(f"{day}/10/2021 21:21:00"))
+            paths = {
+                table: os.path.join(directory, f"{name}.csv")
+                for table, name in [
+                    ("output", "results"),
+                    ("mistyped", "mistyped_words"),
+                    ("char_speeds", "char_speeds"),
+                    ("word_speeds", "word_speeds"),
+                ]
+            }
+            report = text_report.report(
+                paths, terminal=Terminal(force_styling=None)
+            )
+            empty = text_report.report(
+                paths, last=0, terminal=Terminal(force_styling=None)
+            )
+
+        self.assertIn("tests: 3  last: 60wpm", report)
+        self.assertIn("short (<20s)", report)
+        self.assertIn("abcx", report)
+        self.assertIn("ab   80wpm", report)
+        self.assertIn("1 mistake 100.0%", report)
+
+        self.assertIn("no tests taken yet", empty)
+        self.assertIn("no lowercase characters in the last 0 typed", empty)
+        self.assertIn("no mistakes made yet", empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
+import random
 import unittest
 
-from typetest.utils import damerau_levenshtein_distance
+from typetest.utils import (
+    damerau_levenshtein_distance,
+    damerau_levenshtein_distances,
+)
 
 
 class TestUtils(unittest.TestCase):
@@ -13,3 +17,30 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(damerau_levenshtein_distance("$@", "abc"), 3)
         self.assertEqual(damerau_levenshtein_distance("cba", "abc"), 2)
         self.assertEqual(damerau_levenshtein_distance("abacus", "abc"), 3)
+        self.assertEqual(damerau_levenshtein_distance("bbbcb", "bb"), 3)
+        self.assertEqual(damerau_levenshtein_distance("ca", "abc"), 2)
+
+    def test_damerau_levenshtein_distances(self):
+        generator = random.Random(0)
+        words_1, words_2 = [
+            [
+                "".join(generator.choices("abcd", k=generator.randrange(7)))
+                for _ in range(5000)
+            ]
+            for _ in range(2)
+        ]
+        distances = [
+            damerau_levenshtein_distance(word_1, word_2)
+            for word_1, word_2 in zip(words_1, words_2)
+        ]
+        self.assertEqual(
+            damerau_levenshtein_distances(words_1, words_2).tolist(),
+            distances,
+        )
+        for max_distance in range(4):
+            self.assertEqual(
+                damerau_levenshtein_distances(
+                    words_1, words_2, max_distance
+                ).tolist(),
+                [min(d, max_distance + 1) for d in distances],
+            )
@@ -0,0 +1,104 @@
+import os
+import random
+import unittest
+from statistics import median
+from tempfile import TemporaryDirectory
+
+from test.test_results import rows
+from typetest.results import write_csv
+from typetest.word_stats import MedianSketch, WordStats, update_test_files
+
+
+class TestMedianSketch(unittest.TestCase):
+    def test_median_is_exact_for_few_values(self):
+        sketch = MedianSketch()
+        for value in [5, 1, 4, 2]:
+            sketch.add(value)
+        self.assertEqual(sketch.median(), 3)
+
+    def test_median_is_estimated_for_many_values(self):
+        generator = random.Random(0)
+        values = [generator.gauss(60, 10) for _ in range(10000)]
+        sketch = MedianSketch()
+        for value in values:
+            sketch.add(value)
+        self.assertEqual(sketch.count, len(values))
+        self.assertAlmostEqual(sketch.median(), median(values), delta=0.5)
+
+
+class TestWordStats(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_store_round_trips(self):
+        stats = WordStats()
+        for wpm in range(7):
+            stats.add("word", wpm)
+        stats.add_mistype("wrod")
+        stats.save(os.path.join(self.path, "stats.json"))
+        loaded = WordStats.load(os.path.join(self.path, "stats.json"))
+        self.assertEqual(loaded.sketches["word"].count, 7)
+        self.assertEqual(
+            loaded.sketches["word"].median(), stats.sketches["word"].median()
+        )
+        self.assertEqual(loaded.mistypes, {"wrod": 1})
+
+    def test_ordering(self):
+        stats = WordStats()
+        for word, wpm in [("a", 10), ("a", 20), ("b", 50), ("c", 5)]:
+            stats.add(word, wpm)
+        self.assertEqual(stats.least_typed_words()[-1], "a")
+        self.assertEqual(stats.worst_words(), ["c", "a", "b"])
+
+    def test_update_test_files_bootstraps_then_updates(self):
+        stats_file = os.path.join(self.path, "word_stats.json")
+        word_speeds = os.path.join(self.path, "word_speeds.csv")
+        mistyped_words = os.path.join(self.path, "mistyped_words.csv")
+        least_typed = os.path.join(self.path, "least_typed_words")
+        worst = os.path.join(self.path, "worst_words")
+        test = rows()
+
+        for _ in range(2):
+            write_csv(self.path, test)
+            update_test_files(
+                stats_file,
+                test,
+                word_speeds,
+                mistyped_words,
+                least_typed,
+                worst,
+            )
+
+        stats = WordStats.load(stats_file)
+        self.assertEqual(
+            {word: sketch.count for word, sketch in stats.sketches.items()},
+            {"ab": 2},
+        )
+        self.assertEqual(stats.mistypes, {"cd": 2})
+        with open(worst) as f:
+            self.assertEqual(f.read(), "ab")
+
+    def test_update_test_files_with_a_test_not_in_the_history(self):
+        stats_file = os.path.join(self.path, "word_stats.json")
+        test = rows()
+        write_csv(self.path, test)
+        update_test_files(
+            stats_file,
+            test,
+            os.path.join(self.path, "word_speeds.csv"),
+            os.path.join(self.path, "mistyped_words.csv"),
+            os.path.join(self.path, "least_typed_words"),
+            os.path.join(self.path, "worst_words"),
+            in_history=False,  # a second test, still in a journal
+        )
+        stats = WordStats.load(stats_file)
+        self.assertEqual(stats.sketches["ab"].count, 2)
+        self.assertEqual(stats.mistypes, {"cd": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import io
+import hashlib
+import unittest
+from tempfile import NamedTemporaryFile
+
+from typetest.words import WordStream, has_word
+
+
+text = "the quick  brown\nfox jumps\r\nover the lazy dog\n" * 50
+
+
+def pipe(text):
+    """Returns a text stream that can't be memory mapped."""
+    return io.TextIOWrapper(io.BytesIO(text.encode("utf-8")))
+
+
+class TestWordStream(unittest.TestCase):
+    def setUp(self):
+        self.file = NamedTemporaryFile("w+", newline="")
+        self.file.write(text)
+        self.file.flush()
+        self.file.seek(0)
+
+    def tearDown(self):
+        self.file.close()
+
+    def words(self, stream):
+        index = 0
+        while has_word(stream, index):
+            yield stream[index]
+            index += 1
+
+    def test_words_are_split_like_the_whole_text(self):
+        for chunk_size in (1, 7, 64, 1 << 16):
+            stream = WordStream(self.file, chunk_size=chunk_size)
+            self.assertIsNotNone(stream.map)
+            self.assertEqual(list(self.words(stream)), text.split())
+            stream = WordStream(pipe(text), chunk_size=chunk_size)
+            self.assertIsNone(stream.map)
+            self.assertEqual(list(self.words(stream)), text.split())
+
+    def test_hash_matches_hash_of_the_text(self):
+        with open(self.file.name) as f:  # newlines are translated
+            expected = hashlib.sha1(f.read().encode("utf-8")).hexdigest()
+        for stream in [
+            WordStream(self.file, chunk_size=5),
+            WordStream(pipe(text), chunk_size=5),
+        ]:
+            list(self.words(stream))
+            self.assertEqual(stream.hexdigest(), expected)
+
+    def test_hash_of_files_does_not_depend_on_the_words_read(self):
+        with open(self.file.name) as f:  # newlines are translated
+            expected = hashlib.sha1(f.read().encode("utf-8")).hexdigest()
+        for count in [0, 1, 5, 200]:
+            stream = WordStream(self.file, chunk_size=13)
+            for index in range(count):
+                stream[index]
+            self.assertEqual(stream.hexdigest(), expected)
+            self.assertEqual(stream.hexdigest(), expected)
+
+        stream = WordStream(self.file, chunk_size=16)
+        stream[30]
+        stream.restart()
+        list(self.words(stream))  # read again from the beginning
+        self.assertEqual(stream.hexdigest(), expected)
+
+    def test_hash_of_streams_covers_the_text_read(self):
+        stream = WordStream(pipe(text), chunk_size=16)
+        self.assertEqual(stream[0], "the")
+        read = text[:16]  # the first chunk, without carriage returns
+        self.assertEqual(
+            stream.hexdigest(), hashlib.sha1(read.encode()).hexdigest()
+        )
+
+    def test_words_are_read_lazily(self):
+        stream = WordStream(pipe(text), chunk_size=16)
+        self.assertEqual(stream[2], "brown")
+        self.assertLess(len(stream.words), 10)
+        self.assertFalse(stream.eof)
+
+    def test_discard(self):
+        stream = WordStream(self.file, chunk_size=16)
+        self.assertEqual(stream[5], "over")
+        stream.discard(4)
+        self.assertEqual(stream.offset, 4)
+        self.assertEqual(stream[4], "jumps")
+        with self.assertRaises(IndexError):
+            stream[3]
+
+    def test_restart(self):
+        stream = WordStream(self.file, chunk_size=16)
+        stream[30]
+        stream.discard(30)
+        stream.restart()
+        self.assertEqual(stream[0], "the")
+
+        stream = WordStream(pipe(text), chunk_size=16)
+        stream[30]
+        stream.discard(27)
+        stream.restart()
+        self.assertEqual(stream[0], text.split()[27])
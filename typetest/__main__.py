@@ -1,27 +1,36 @@
 #!/usr/bin/env python3
 import os
-import csv
 import sys
 import random
 import hashlib
+import traceback
 import platform
 
 from pathlib import Path
 from datetime import datetime
-from functools import partial
-from time import time, strftime, gmtime
+from time import perf_counter_ns, strftime, gmtime
 from argparse import ArgumentParser, RawTextHelpFormatter, FileType
 
 from blessed import Terminal
 
-from typetest.utils import create_least_typed_words_and_worst_words_test_files
+from typetest.layout import Layout
+from typetest.corpus import Registry
+from typetest.render import Renderer, cells
+from typetest.results import write_csv
+from typetest.session import TypingSession, TICK, RESTART, SUBMIT, COMPLETE
+from typetest.words import WordStream
 
 
 filename = os.path.basename(sys.argv[0])
+idle_timeout = 1  # seconds to wait for a key before the test has started
+second = 10 ** 9  # nanoseconds
 doc = f"""example:
   {filename} -i test.txt -s -d 60
   echo 'The typing seems really strong today.' | {filename} -d 3.5
   {filename} < test.txt
+  yes 'endless practice' | {filename} --stream -d 60
+  {filename} --practice -t common_1000
+  {filename} --profile --profile-samples latencies.csv
 
 shortcuts:
   ^c / ctrl+c           end the test and get results now
@@ -47,34 +56,93 @@ def main(
     help,
     output_directory,
     hash,
+    stream,
+    test,
+    database,
+    archive,
+    profile,
+    profile_samples,
+    daemon,
+    journal,
+    practice,
+    keylog,
 ):
     """Reads test words from `input` delimited by whitespace characters.
     Listens to standard input forming a typed word every time a
     whitespace is pressed. Compares typed words with test words. Updates the
-    screen calling `draw` every time a key is pressed or every 0.1 seconds,
-    whichever comes first.
-
-    The test ends when `duration` time has passed or all words have been typed.
-    Upon exiting, test results are printed and stored in `test_results_file`.
+    screen calling `draw` every time a key is pressed. In between key presses
+    only the clock is updated, once a second.
+
+    The test ends exactly when `duration` time has passed or all words have
+    been typed.
+    With `stream` set, words are read lazily instead of reading the whole
+    `input` upfront, so the test starts right away regardless of its size.
+    With `test` set, words are loaded from the test registry instead.
+    With `practice` set, the test is endless, drawing words of the test that
+    were typed slowly or mistyped in past tests more often, see
+    `typetest.practice`.
+    Upon exiting, test results are printed and stored in csv files in
+    `output_directory`, or in the SQLite `database` if it is given. They are
+    also appended to the columnar `archive` if it is given. Per-word
+    statistics and the practice tests built from them are then updated in a
+    child process.
+    With `journal` set, results are appended to a crash-safe journal in
+    `output_directory` instead, and folded into the csv files from there,
+    see `typetest.journal`.
+    With `daemon` set, results are instead handed to the daemon listening on
+    that socket, which writes them, see `typetest.daemon`.
+    With `keylog` set, every key event of the test is also written to a log
+    in `output_directory`, see `typetest.keylog`.
+    With `profile` set, latencies of drawing frames are printed upon exiting
+    and their samples written to `profile_samples` if it is given.
     """
-    if input.isatty():  # no test words provided, fallback to a default test
-        base_directory = os.path.dirname(__file__)
-        input = open(base_directory + "/tests/common_300", "r")
+    if test is None and input.isatty():  # no test words provided
+        # fallback to a default test
+        test = "common_300"
         if duration is None:
             duration = 60
             shuffle_flag = True
 
+    if practice and duration is None:
+        duration = 60
     if duration is None:
         duration = float("inf")
 
-    test = input.read()
-    words = test.split()
+    custom_hash = hash
+
+    if test is not None:
+        try:
+            words, test_hash = Registry().load(test)
+        except KeyError:
+            exit(f"There is no test named or hashed {test} in the registry.")
+
+        if hash is None:
+            hash = test_hash
+
+        if shuffle_flag:
+            random.shuffle(words)
+    elif stream:
+        words = WordStream(input, shuffle=shuffle_flag)
+    else:
+        test = input.read()
+        words = test.split()
+
+        if hash is None:
+            hash = hashlib.sha1(test.encode("utf-8")).hexdigest()
 
-    if hash is None:
-        hash = hashlib.sha1(test.encode("utf-8")).hexdigest()
+        if shuffle_flag:
+            random.shuffle(words)
 
-    if shuffle_flag:
-        random.shuffle(words)
+    if practice:
+        if isinstance(words, WordStream):
+            exit("Practice tests can't be streamed, leave out --stream.")
+
+        from typetest.practice import load
+
+        words = load(words, output_directory, database)
+        hash = custom_hash  # the practised words are hashed after the test
+
+    streaming = not isinstance(words, list)
 
     if not sys.__stdin__.isatty():  # force stdin from user
         if platform.system() == "Windows":
@@ -84,261 +152,275 @@ def main(
 
     terminal = Terminal()
 
-    color_normal = terminal.normal
+    color_normal = ""  # the renderer resets styles between cells
     color_correct = terminal.color_rgb(0, 230, 0)
     color_wrong = terminal.color_rgb(230, 0, 0)
 
-    correct_chars = total_chars = -1
-    typing_speed_in_wpm = 0
-    typing_duration = actual_duration = start = 0
-    word_index = 0
-    user_text = ""
-    colors = [color_normal] * len(words)
+    session = TypingSession(words, duration)
+    colors = {}  # colors of words that aren't `color_normal`
+    layout = Layout(words, terminal.width)
+    renderer = Renderer(terminal)
 
-    char_times = []
-    restart_count = 0
+    if profile:  # the loop itself is left untouched when not profiling
+        from typetest.profiling import Profile
 
-    with terminal.raw(), terminal.cbreak(), terminal.fullscreen(), terminal.hidden_cursor():  # noqa E501
-        while word_index < len(words) and (
-            not start or time() - start < duration
-        ):
-            word = words[word_index]
-
-            if word == user_text:
-                color = color_correct
-            elif word.startswith(user_text):
-                color = color_normal
-            else:
-                color = color_wrong
-
-            colors[word_index] = color + terminal.reverse
-
-            draw(
-                terminal,
-                rows,
-                words,
-                colors,
-                word_index,
-                user_text,
-                typing_speed_in_wpm,
-                typing_duration,
-            )
+        profiler = Profile()
+        profiler.instrument(sys.modules[__name__], terminal, renderer)
 
-            char = terminal.inkey(timeout=0.1, esc_delay=0)
-            char_time = time()
-            typing_duration = char_time - start if start else 0
-
-            if not char:
-                continue
-
-            if not start:
-                start = time()
-
-            if char == "\x03" or char == "\x1b":  # ctrl-c or ctrl-[ or esc
-                # stop the test
-                break
-
-            elif char == "\x08" or char == "\x7f":  # ctrl-h or bksp
-                # delete last character
-                user_text = user_text[:-1]
-
-            elif char in ("\x12", "\x13", "\t"):  # ctrl-r or ctrl-s or tab
-                # restart test
-                restart_count += 1
-                correct_chars = total_chars = -1
-                typing_speed_in_wpm = 0
-                typing_duration = actual_duration = start = 0
-                word_index = 0
-                user_text = ""
-                colors = [color_normal] * len(words)
-                char_times = []
-                if char == "\x13":  # ctrl-s
-                    random.shuffle(words)
-
-            elif char == "\x15" or char == "\x17":  # ctrl-u or ctrl-w
-                # clear user input
-                user_text = ""
-
-            elif char.isspace() and user_text:  # word is submitted
-                if word_index + 1 < len(words):  # if not last space
-                    # count the space character as correct
-                    total_chars += 1
-                    correct_chars += 1
-
-                if user_text == word:
-                    correct_chars += len(word)
-                    colors[word_index] = color_correct
-                else:
-                    colors[word_index] = color_wrong
+    changed = True
+    status_row = None
 
-                actual_duration = typing_duration
-                typing_speed_in_wpm = min(
-                    int(correct_chars * 12 / actual_duration), 999
+    with terminal.raw(), terminal.cbreak(), terminal.fullscreen(), terminal.hidden_cursor():  # noqa E501
+        while session.active:
+            if layout.width != terminal.width:  # terminal was resized
+                start_index = words.offset if streaming else 0
+                layout = Layout(words, terminal.width, start_index)
+                renderer.invalidate()
+                changed = True
+
+            if changed:
+                word, user_text = session.word, session.user_text
+
+                if word == user_text:
+                    color = color_correct
+                elif word.startswith(user_text):
+                    color = color_normal
+                else:
+                    color = color_wrong
+
+                colors[session.word_index] = color + terminal.reverse
+
+                status_row = draw(
+                    terminal,
+                    renderer,
+                    rows,
+                    layout,
+                    colors,
+                    session.word_index,
+                    user_text,
+                    session.typing_speed_in_wpm,
+                    session.typing_duration,
+                )
+            elif status_row is not None:  # only the clock has changed
+                renderer.render_row(
+                    status_row,
+                    prompt_line(
+                        terminal,
+                        session.user_text,
+                        session.typing_speed_in_wpm,
+                        session.typing_duration,
+                    ),
                 )
 
-                user_text = ""
-                word_index += 1
-                char_times.append((char, char_time))
-
-            elif not char.isspace():
-                # append the character to user input
-                total_chars += 1
-                user_text += char
-                if (
-                    word_index + 1 >= len(words) and words[-1] == user_text
-                ):  # last word
-                    # end test without needing to submit a space
-                    terminal.ungetch(" ")
-                char_times.append((char, char_time))
-
-    # remove excess user input
-    total_chars -= len(user_text)
-
-    if actual_duration <= 0 or total_chars <= 0:  # test is invalid
+            if session.start:  # sleep until the clock ticks or the test ends
+                elapsed = perf_counter_ns() - session.start
+                next_tick = elapsed // second + 1
+                timeout = max(min(next_tick, duration) - elapsed / second, 0)
+            else:  # wake up from time to time to notice terminal resizes
+                timeout = idle_timeout
+
+            char = terminal.inkey(timeout=timeout, esc_delay=0)
+            action = session.feed(char, perf_counter_ns())
+            changed = action != TICK
+
+            if action == RESTART:
+                colors = {}
+                layout = Layout(words, terminal.width)
+            elif action == SUBMIT:
+                index = session.word_index - 1
+                colors[index] = (
+                    color_correct if session.marks[index] else color_wrong
+                )
+                if practice:
+                    words.observe(words[index], session.marks[index])
+                if streaming:  # forget words that scrolled off the screen
+                    line_start = layout.line_starts[
+                        layout.line_of(session.word_index)
+                    ]
+                    session.forget(line_start)
+                    colors = {
+                        i: c for i, c in colors.items() if i >= line_start
+                    }
+            elif action == COMPLETE:
+                # end test without needing to submit a space
+                terminal.ungetch(" ")
+
+    if profile:
+        profiler.restore()
+        print(profiler.report(), end="\n\n")
+        if profile_samples is not None:
+            profiler.dump(profile_samples)
+
+    if not session.finish():  # test is invalid
         return
 
     # calculate results and write them to output files
 
-    accuracy = 100 * correct_chars // total_chars
+    if hash is None:  # a streamed or practice test is hashed after the test
+        hash = words.hexdigest()
+
+    accuracy = session.accuracy
+    typing_speed_in_wpm = session.typing_speed_in_wpm
+    actual_duration = session.actual_duration
     timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
 
     print(f"accuracy: {accuracy}%")
     print(f"speed:    {typing_speed_in_wpm}wpm")
     print(f"duration: {actual_duration:.2f}s")
-    print(f"restarts: {restart_count}")
+    print(f"restarts: {session.restart_count}")
     print(
-        f"keystrokes: {correct_chars} correct | {total_chars - correct_chars}"
-        + " incorrect"
+        f"keystrokes: {session.correct_chars} correct |"
+        + f" {session.total_chars - session.correct_chars} incorrect"
     )
 
-    test_results_file = open(output_directory + "/results.csv", "a")
-    mistyped_words_file = open(output_directory + "/mistyped_words.csv", "a")
-    char_speeds_file = open(output_directory + "/char_speeds.csv", "a")
-    word_speeds_file = open(output_directory + "/word_speeds.csv", "a")
-
-    test_results_writer = csv.writer(test_results_file, lineterminator="\n")
-    row = [
-        timestamp,
-        typing_speed_in_wpm,
-        accuracy,
-        actual_duration,
-        duration,
-        hash,
-    ]
-    test_results_writer.writerow(row)
-
-    chars, times = zip(*char_times)
-    char_durations = [t1 - t0 for t0, t1 in zip(times, times[1:])]
-    char_speeds_writer = csv.writer(char_speeds_file, lineterminator="\n")
-    for char, duration in zip(chars, char_durations):
-        char_speeds_writer.writerow([char, duration, 12 / duration, timestamp])
-
-    word = ""
-    word_index = 0
-    word_duration = 0
-    word_durations = []
-    mistyped_writer = csv.writer(mistyped_words_file, lineterminator="\n")
-    word_speeds_writer = csv.writer(word_speeds_file, lineterminator="\n")
-    for char, duration in zip(chars, char_durations):
-        if char.isspace():
-            if word == words[word_index]:
-                word_durations.append((word, word_duration))
-                word_speeds_writer.writerow(
-                    [
-                        word,
-                        word_duration,
-                        len(word) * 12 / word_duration,
-                        timestamp,
-                    ]
-                )
-            else:
-                mistyped_writer.writerow([words[word_index], word, timestamp])
+    rows = session.rows(timestamp, hash)
 
-            word_index += 1
-            word = ""
-            word_duration = 0
-        else:
-            word += char
-            word_duration += duration
+    if keylog:
+        from typetest.keylog import directory_name, write as write_keylog
 
-    test_results_file.close()
-    mistyped_words_file.close()
-    char_speeds_file.close()
-    word_speeds_file.close()
+        write_keylog(
+            os.path.join(output_directory, directory_name),
+            session.events,
+            session.attempts,
+            duration,
+            hash,
+        )
+
+    if daemon is not None:
+        from typetest.daemon import default_socket, submit
+
+        daemon = daemon or default_socket
 
-    create_least_typed_words_and_worst_words_test_files(
-        Path(output_directory) / "word_speeds.csv",
+        try:
+            response = submit(daemon, rows)
+        except (OSError, ValueError) as error:  # no daemon, or a bad reply
+            reason = error
+        else:
+            if isinstance(response, dict) and response.get("ok"):
+                return
+            reason = (
+                response.get("error", "rejected")
+                if isinstance(response, dict)
+                else f"unexpected response {response!r}"
+            )
+        print(
+            f"could not hand results to the daemon at {daemon} ({reason}),"
+            + " writing them here",
+            file=sys.stderr,
+        )
+
+    # modules only needed once the test is over are imported here, to keep
+    # the startup of the test fast
+    from typetest.archive import Archive
+    from typetest.database import connect, write
+    from typetest.word_stats import update_test_files
+
+    if database is None and journal:
+        from typetest.journal import append, compact
+
+        append(output_directory, rows)
+        # unless it is in use, then the test is not in the csv files yet
+        in_history = compact(output_directory, blocking=False) is not None
+    elif database is None:
+        write_csv(output_directory, rows)
+        in_history = True
+    else:
+        connection = connect(database)
+        write(connection, rows)
+        connection.close()
+        in_history = True
+
+    if archive is not None:
+        Archive(archive).append(rows)
+
+    in_background(
+        update_test_files,
+        str(Path(output_directory) / "word_stats.json"),
+        rows,
+        database or str(Path(output_directory) / "word_speeds.csv"),
+        database or str(Path(output_directory) / "mistyped_words.csv"),
         Path(output_directory) / "../tests/least_typed_words",
         Path(output_directory) / "../tests/worst_words",
+        in_history,
     )
 
 
+def in_background(function, *args):
+    """Calls `function` in a child process, so the shell prompt returns
+    without waiting for it. Calls it directly where `os.fork` is not
+    available.
+    """
+    if not hasattr(os, "fork"):
+        function(*args)
+        return
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if os.fork() != 0:
+        return
+
+    status = 0
+    try:
+        function(*args)
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    finally:
+        sys.stderr.flush()
+        os._exit(status)
+
+
 def draw(
     terminal,
+    renderer,
     rows,
-    words,
+    layout,
     colors,
     word_index,
     user_text,
     typing_speed_in_wpm,
     typing_duration,
 ):
-    """Text wraps the `words` list to the terminal width, and prints `rows`
-    lines of wrapped words coloured with `colors` starting with the line
-    containing the current word that is being typed.
-    Then, if there is space, prints `prompt` + `text` + `stats`.
+    """Renders `rows` lines of `layout` coloured with `colors` starting with
+    the line containing the current word that is being typed.
+    Then, if there is space, renders `prompt` + `text` + `stats`.
     """
-
-    def join(words, length):
-        eol = (
-            terminal.clear_eol
-            if length + len(words) - 1 < terminal.width
-            else ""
-        )
-        return " ".join(line_words) + eol
-
-    echo = partial(print, end="", flush=True, file=terminal.stream)
     allowed_height = min(terminal.height, rows)
+    words = layout.words
+    space = cells(" ")
 
-    line_length = 0
-    line_words = []
-    line_height = None
-    for i, (word, color) in enumerate(zip(words, colors)):
-        if line_length + len(word) + len(line_words) > terminal.width:
-            if line_height is not None:
-                echo(
-                    terminal.move_yx(line_height, 0)
-                    + join(line_words, line_length)
-                )
-                line_height += 1
-                if line_height >= allowed_height:
-                    break
+    frame = []
+    for start, stop in layout.lines(word_index, allowed_height):
+        row = cells(words[start], colors.get(start, ""))
+        for i in range(start + 1, stop):
+            row += space + cells(words[i], colors.get(i, ""))
+        frame.append(row)
 
-            line_length = 0
-            line_words = []
-
-        if i == word_index:
-            line_height = 0
+    status_row = None
+    if allowed_height > 1:
+        status_row = len(frame)
+        frame.append(
+            prompt_line(
+                terminal, user_text, typing_speed_in_wpm, typing_duration
+            )
+        )
 
-        line_length += len(word)
-        line_words.append(color + word + terminal.normal)
+    while len(frame) <= allowed_height:
+        frame.append([])
 
-    else:
-        echo(terminal.move_yx(line_height, 0) + join(line_words, line_length))
-        line_height += 1
+    renderer.render(frame)
+    return status_row
 
-    if allowed_height > 1:
-        prompt = ">>>"
-        timestamp = strftime("%H:%M:%S", gmtime(typing_duration))
-        stats = f"{typing_speed_in_wpm:3d} wpm | {timestamp}"
-        n = terminal.width - len(prompt) - len(stats)
-        echo(
-            terminal.move_yx(line_height, 0)
-            + f"{prompt}{user_text[:n]: <{n}}{stats}"
-        )
 
-    for i in range(1, allowed_height - line_height + 1):
-        echo(terminal.move_yx(line_height + i, 0) + terminal.clear_eol)
+def prompt_line(terminal, user_text, typing_speed_in_wpm, typing_duration):
+    """Returns cells of `prompt` + `text` + `stats` spanning the terminal
+    width.
+    """
+    prompt = ">>>"
+    timestamp = strftime("%H:%M:%S", gmtime(typing_duration))
+    stats = f"{typing_speed_in_wpm:3d} wpm | {timestamp}"
+    n = terminal.width - len(prompt) - len(stats)
+    return cells(f"{prompt}{user_text[:n]: <{n}}{stats}")
 
 
 def parse_args():
@@ -376,6 +458,13 @@ def parse_args():
         default=sys.stdin,
         help="file to read words from (default: sys.stdin)",
     )
+    parser.add_argument(
+        "-t",
+        "--test",
+        type=str,
+        default=None,
+        help="name or hash of a test from the registry (see typetest-corpus)",
+    )
     parser.add_argument(
         "-o",
         "--output-directory",
@@ -383,6 +472,20 @@ def parse_args():
         default=base_directory + "/results",
         help="file to store results in\n" + default,
     )
+    parser.add_argument(
+        "--database",
+        type=str,
+        default=None,
+        help="SQLite database to store results in instead of csv files "
+        + "in the\noutput directory (created if needed)",
+    )
+    parser.add_argument(
+        "--archive",
+        type=str,
+        default=None,
+        help="columnar archive to also append results to, for fast analysis"
+        + "\n(created if needed, see typetest-archive)",
+    )
     parser.add_argument(
         "-s",
         "-shuffle",
@@ -390,6 +493,21 @@ def parse_args():
         action="store_true",
         help="shuffle words " + default,
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read words lazily, for very large or endless inputs\n"
+        + "(shuffles words within chunks of the input) "
+        + default,
+    )
+    parser.add_argument(
+        "--practice",
+        action="store_true",
+        help="endless test drawing the test words you are slowest at and\n"
+        + "mistype most more often, 60 seconds long unless a duration is\n"
+        + "given "
+        + default,
+    )
     parser.add_argument(
         "-r",
         "--rows",
@@ -397,6 +515,42 @@ def parse_args():
         default=2,
         help="number of test rows to show " + default,
     )
+    parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="append results to a crash-safe journal first, for output\n"
+        + "directories shared by many processes (see typetest-journal) "
+        + default,
+    )
+    parser.add_argument(
+        "--daemon",
+        type=str,
+        nargs="?",
+        const="",  # the default socket, found only when it is needed
+        default=None,
+        metavar="SOCKET",
+        help="hand results to the daemon listening on SOCKET instead of"
+        + "\nwriting them (see typetest-daemon, default SOCKET:"
+        + " typetest.sock\nin the temporary directory)",
+    )
+    parser.add_argument(
+        "--keylog",
+        action="store_true",
+        help="also log every key event of the test, corrections included,"
+        + "\nin the output directory (see typetest-keylog) "
+        + default,
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print latencies of keystrokes and drawing upon exiting",
+    )
+    parser.add_argument(
+        "--profile-samples",
+        type=str,
+        default=None,
+        help="csv file to also write every latency sample to, in ns",
+    )
 
     return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
 
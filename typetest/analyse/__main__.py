@@ -1,36 +1,59 @@
 #!/usr/bin/env python3
 
 import os
-import re
 import sys
 import warnings
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 
+from time import perf_counter
 from pathlib import Path
+from importlib import import_module
+from concurrent.futures import ProcessPoolExecutor
 from argparse import ArgumentParser, RawTextHelpFormatter, FileType
-from functools import partial
-from matplotlib import rcParams
-
-from typetest.analyse import (
-    typing_speed_per_test,
-    typing_speed_per_test_duration,
-    typing_speed_distribution,
-    typing_speed_of_n_best_words,
-    typing_speed_per_char,
-    mistyped_words_pie_chart,
-)
-
-warnings.simplefilter("ignore", np.RankWarning)
-warnings.simplefilter("error", UserWarning)
-rcParams.update({"figure.autolayout": True})
-sns.set(font_scale=1)
+
 filename = os.path.basename(sys.argv[0])
+is_word = r"^[a-z]+$"  # matched against whole columns at once
+# graphs by name: their module, the results file they are drawn from and
+# the arguments of their `plot` function. Modules are imported only when
+# graphs are drawn, since plotting libraries take long to import.
+plots = {
+    "wpm": ("typing_speed_per_test", "output", {}),
+    "duration": ("typing_speed_per_test_duration", "output", {}),
+    "char": (
+        "typing_speed_per_char",
+        "char_speeds",
+        {"size": 10000, "filter_func": str.islower},
+    ),
+    "word": (
+        "typing_speed_of_n_best_words",
+        "word_speeds",
+        {"n": 50, "filter_func": is_word},
+    ),
+    "dist": (
+        "typing_speed_distribution",
+        "word_speeds",
+        {"filter_func": is_word},
+    ),
+    "mistypes": (
+        "mistyped_words_pie_chart",
+        "mistyped",
+        {"filter_func": is_word},
+    ),
+    "digraph": (
+        "digraph_latency_heatmap",
+        "char_speeds",
+        {"filter_func": str.islower},
+    ),
+}
 doc = f"""example:
   {filename}
   {filename} wpm
   {filename} char word
+  {filename} digraph
+  {filename} --database results.db
+  {filename} --archive results.ttc
+  {filename} --last 1000 word dist
+  {filename} --out-dir report --format svg
+  {filename} --text
 """
 
 
@@ -46,21 +69,121 @@ def run():
         )
 
 
-def main(graphs, output, mistyped, char_speeds, word_speeds, help):
-    """Draw diagrams the user has requested."""
-    is_word = partial(re.match, r"^[a-z]+$")
-    if "wpm" in graphs:
-        typing_speed_per_test.plot(output)
-    if "duration" in graphs:
-        typing_speed_per_test_duration.plot(output)
-    if "char" in graphs:
-        typing_speed_per_char.plot(char_speeds, filter_func=str.islower)
-    if "word" in graphs:
-        typing_speed_of_n_best_words.plot(word_speeds, 50, filter_func=is_word)
-    if "dist" in graphs:
-        typing_speed_distribution.plot(word_speeds, filter_func=is_word)
-    if "mistypes" in graphs:
-        mistyped_words_pie_chart.plot(mistyped, filter_func=is_word)
+def main(
+    graphs,
+    output,
+    mistyped,
+    char_speeds,
+    word_speeds,
+    database,
+    archive,
+    last,
+    out_dir,
+    format,
+    jobs,
+    text,
+    help,
+):
+    """Draw diagrams the user has requested, of all results or only the
+    `last` rows of every table.
+
+    With `out_dir` set, the diagrams are instead rendered without a window
+    by up to `jobs` processes at once, and saved to files of the `format`.
+    With `text` set, a text report of all graphs is printed instead.
+    """
+    if database is not None:  # all results are in the database
+        output = mistyped = char_speeds = word_speeds = database
+    if archive is not None:  # all results are in the archive
+        output = mistyped = char_speeds = word_speeds = archive
+
+    paths = {
+        "output": output,
+        "mistyped": mistyped,
+        "char_speeds": char_speeds,
+        "word_speeds": word_speeds,
+    }
+    graphs = [graph for graph in plots if graph in graphs]
+
+    if text:
+        from typetest.analyse import text_report
+
+        print(text_report.report(paths, last))
+        return
+
+    if out_dir is None:
+        from typetest.analyse import loaders
+
+        setup_plotting()
+        with loaders.session():  # tables shared by graphs are read once
+            for graph in graphs:
+                draw(graph, paths, last)
+        return
+
+    setup_plotting("Agg")
+    os.makedirs(out_dir, exist_ok=True)
+    start = perf_counter()
+    with ProcessPoolExecutor(
+        min(jobs or os.cpu_count(), len(graphs) or 1),
+        initializer=setup_plotting,
+        initargs=("Agg",),
+    ) as pool:
+        files = {
+            graph: os.path.join(out_dir, f"{graph}.{format}")
+            for graph in graphs
+        }
+        futures = {
+            graph: pool.submit(export, graph, paths, last, files[graph])
+            for graph in graphs
+        }
+        durations = []
+        for graph, future in futures.items():
+            durations.append(future.result())
+            print(f"{graph:<10}{durations[-1]:6.2f}s  {files[graph]}")
+
+    print(
+        f"exported {len(graphs)} graphs in {perf_counter() - start:.2f}s"
+        + f" ({sum(durations):.2f}s of rendering)"
+    )
+
+
+def setup_plotting(backend=None):
+    """Imports and configures the plotting libraries, switching matplotlib
+    to `backend` if it is given. Otherwise warnings are raised as errors, so
+    a backend unable to show windows is reported by `run`.
+    """
+    import numpy as np
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    if backend is not None:
+        plt.switch_backend(backend)
+    else:
+        warnings.simplefilter("error", UserWarning)
+    warnings.simplefilter("ignore", np.RankWarning)
+    plt.rcParams.update({"figure.autolayout": True})
+    sns.set(font_scale=1)
+
+
+def draw(graph, paths, last=None, show=True):
+    """Plots `graph` from the results file of `paths` it is drawn from, and
+    returns its figure.
+    """
+    module, path, kwargs = plots[graph]
+    module = import_module(f"typetest.analyse.{module}")
+    if last is not None:  # the char graph calls its number of rows size
+        kwargs = {**kwargs, "size" if "size" in kwargs else "last": last}
+    return module.plot(paths[path], **kwargs, show=show)
+
+
+def export(graph, paths, last, file):
+    """Saves `graph` to `file` and returns the seconds it took."""
+    import matplotlib.pyplot as plt
+
+    start = perf_counter()
+    figure = draw(graph, paths, last, show=False)
+    figure.savefig(file)
+    plt.close(figure)
+    return perf_counter() - start
 
 
 def parse_args():
@@ -75,7 +198,7 @@ def parse_args():
         type=str,
         nargs="*",
         default=["wpm", "dist", "word", "char", "mistypes", "duration"],
-        help="graphs to plot: wpm char word dist mistypes duration\n"
+        help="graphs to plot: wpm char word dist mistypes duration digraph\n"
         + default,
     )
     parser.add_argument(
@@ -106,6 +229,56 @@ def parse_args():
         default=f"{base_directory}/{results_directory}/word_speeds.csv",
         help="file to store word speeds in\n" + default,
     )
+    parser.add_argument(
+        "-d",
+        "--database",
+        type=str,
+        default=None,
+        help="SQLite database to read all results from instead of csv files",
+    )
+    parser.add_argument(
+        "-a",
+        "--archive",
+        type=str,
+        default=None,
+        help="columnar archive to read all results from instead of csv files"
+        + "\n(see typetest-archive)",
+    )
+    parser.add_argument(
+        "-l",
+        "--last",
+        type=int,
+        default=None,
+        help="only plot the last LAST rows of every results file"
+        + "\n(default: all rows, and 10000 characters for char)",
+    )
+    parser.add_argument(
+        "--out-dir",
+        type=str,
+        default=None,
+        help="save graphs to files in this directory instead of showing"
+        + "\nthem, rendering them in parallel without a display",
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        choices=["png", "svg"],
+        default="png",
+        help="file format of saved graphs\n" + default,
+    )
+    parser.add_argument(
+        "-t",
+        "--text",
+        action="store_true",
+        help="print a text report of all graphs in the terminal instead",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of graphs saved at once (default: number of CPUs)",
+    )
 
     return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
 
@@ -0,0 +1,189 @@
+"""Aggregations of result tables shown by graphs and text reports.
+
+These only need pandas and NumPy, so reports can be made without importing
+a plotting library.
+"""
+import numpy as np
+import pandas as pd
+
+from typetest.utils import select, damerau_levenshtein_distances
+
+
+def word_medians(data_frame, filter_func=lambda c: True):
+    """Returns median typing speeds of words kept by `filter_func`, indexed
+    by word.
+    """
+    medians = data_frame.groupby("word")["wpm"].median()
+    return medians[select(medians.index, filter_func)]
+
+
+def worst_and_best_words(data_frame, n, filter_func=lambda w: True):
+    """Returns `(word, typing speeds, mean typing speed)` of the `n // 2`
+    words kept by `filter_func` with the lowest median typing speeds and of
+    up to `n // 2` words with the highest ones, ordered by median.
+    """
+    stats = data_frame.groupby("word")["wpm"].agg(["median", "mean"])
+    stats = stats[select(stats.index, filter_func)]
+    stats = stats.sort_values("median", kind="stable")
+
+    half = n // 2
+    rest = stats.iloc[half:]
+    start = max(len(rest) - half, 0)
+    stats = pd.concat([stats.iloc[:half], rest.iloc[start:]])
+
+    speeds = data_frame[data_frame["word"].isin(stats.index)]
+    speeds = speeds.groupby("word")["wpm"]
+    return [
+        (word, speeds.get_group(word).to_numpy(), mean)
+        for word, mean in stats["mean"].items()
+    ]
+
+
+def trimmed_char_speeds(data_frame, filter_func=lambda c: True):
+    """Returns characters kept by `filter_func`, arrays of their typing
+    speeds without the lowest and highest 10% and the means of those,
+    raised to 0 if negative.
+    """
+    if data_frame.empty:  # columns of no rows have no numeric types
+        return [], [], []
+    grouped = data_frame.groupby("char")["wpm"]
+    low, high = grouped.quantile(0.1), grouped.quantile(0.9)
+    kept = low.index[select(low.index, filter_func)]
+
+    data_frame = data_frame[data_frame["char"].isin(kept)]
+    wpm, chars = data_frame["wpm"], data_frame["char"]
+    trimmed = data_frame[(chars.map(low) <= wpm) & (wpm <= chars.map(high))]
+    trimmed = trimmed.sort_values("char", kind="stable")
+
+    # characters typed too few times may have no speeds left
+    counts = trimmed.groupby("char").size().reindex(kept, fill_value=0)
+    speeds = np.split(trimmed["wpm"].to_numpy(), np.cumsum(counts)[:-1])
+    means = trimmed.groupby("char")["wpm"].mean().reindex(kept)
+    means = means.where(means > 0, 0)
+    return kept.tolist(), speeds, means.tolist()
+
+
+def mistake_counts(data_frame):
+    """Returns a list of `(number of mistakes, number of words)` of mistyped
+    words, ordered by the number of mistakes. Words that were skipped or
+    replaced by a different word entirely are left out.
+    """
+    if data_frame.empty:
+        return []
+    words, mistypes = data_frame["word"], data_frame["mistype"]
+    distances = damerau_levenshtein_distances(words, mistypes)
+    wrong_word_typed = distances >= np.maximum(
+        words.str.len(), mistypes.str.len()
+    )
+    word_skip = (distances > 2) & [
+        word.startswith(mistype) for word, mistype in zip(words, mistypes)
+    ]
+    distances = distances[np.asarray(~word_skip & ~wrong_word_typed)]
+    counts = pd.Series(distances, dtype=int).value_counts()
+    return sorted(zip(counts.index.to_list(), counts.to_list()))
+
+
+# bins of `actual_duration` of tests grouped by their length
+duration_bins = [0, 20, 60, 600]
+
+
+def duration_buckets(data_frame):
+    """Returns the number of tests, their mean and last typing speed and
+    accuracy, of tests grouped by their duration into `duration_bins`.
+    """
+    buckets = pd.cut(data_frame["actual_duration"], duration_bins)
+    return data_frame.groupby(buckets)[["wpm", "accuracy"]].agg(
+        ["count", "mean", "last"]
+    )
+
+
+# characters of digraphs, printable ASCII, and bins of their latencies in
+# seconds, spaced evenly on a log scale
+digraph_chars = [chr(code) for code in range(33, 127)]
+latency_bins = np.geomspace(0.01, 10, 129)
+
+
+class DigraphHistograms:
+    """Histograms of latencies of every transition from one character of
+    `digraph_chars` to another, typed one after another in the same test.
+
+    Counts are kept in bins of `latency_bins`, in memory independent of the
+    number of keystrokes added. Keystrokes are added a chunk at a time, the
+    last one of a chunk is kept to be paired with the first of the next.
+    """
+
+    def __init__(self, counts=None, carry=None):
+        size = len(digraph_chars)
+        shape = size, size, len(latency_bins) - 1
+        self.counts = (
+            np.zeros(shape, dtype=np.int64) if counts is None else counts
+        )
+        self.carry = carry  # the last keystroke added, as a one row frame
+
+    def add(self, data_frame):
+        """Adds keystrokes of a `char_speeds` data frame, ordered as
+        typed. The duration of a keystroke is the latency until the next.
+        """
+        if self.carry is not None:
+            data_frame = pd.concat([self.carry, data_frame], ignore_index=True)
+        if data_frame.empty:
+            return
+        self.carry = data_frame.iloc[-1:].reset_index(drop=True)
+
+        chars = data_frame["char"].astype("category")
+        points = [
+            ord(c) if isinstance(c, str) and len(c) == 1 else 0
+            for c in chars.cat.categories
+        ]
+        codes = np.array(points + [0], dtype=np.int64)[chars.cat.codes] - 33
+        tests = data_frame["timestamp"].astype("category").cat.codes
+        tests = tests.to_numpy()
+        latencies = data_frame["duration"].to_numpy(dtype=float)
+
+        size = len(digraph_chars)
+        previous, following = codes[:-1], codes[1:]
+        latencies = latencies[:-1]
+        kept = (
+            (tests[:-1] == tests[1:])
+            & (0 <= previous)
+            & (previous < size)
+            & (0 <= following)
+            & (following < size)
+            & (latencies > 0)
+            & np.isfinite(latencies)
+        )
+        bins = np.searchsorted(latency_bins, latencies[kept], side="right")
+        bins = np.clip(bins - 1, 0, len(latency_bins) - 2)
+        cells = (previous[kept] * size + following[kept]) * (
+            len(latency_bins) - 1
+        ) + bins
+        self.counts += np.bincount(cells, minlength=self.counts.size).reshape(
+            self.counts.shape
+        )
+
+    def matrix(self, filter_func=lambda c: True):
+        """Returns data frames of the median latency in seconds and of the
+        number of transitions, from characters of rows to characters of
+        columns, of the characters kept by `filter_func` that were typed.
+        Medians are interpolated within their bins.
+        """
+        counts = self.counts
+        totals = counts.sum(axis=2)
+        cumulative = counts.cumsum(axis=2)
+        half = totals / 2
+        bins = np.argmax(cumulative >= half[..., None], axis=2)
+        in_bin = np.take_along_axis(counts, bins[..., None], 2)[..., 0]
+        before = np.take_along_axis(cumulative, bins[..., None], 2)[..., 0]
+        before = before - in_bin
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.clip((half - before) / in_bin, 0, 1)
+        low, high = latency_bins[bins], latency_bins[bins + 1]
+        medians = np.where(totals > 0, low * (high / low) ** fraction, np.nan)
+
+        typed = (totals.sum(axis=0) > 0) | (totals.sum(axis=1) > 0)
+        kept = typed & select(digraph_chars, filter_func)
+        chars = [c for c, k in zip(digraph_chars, kept) if k]
+        return (
+            pd.DataFrame(medians[kept][:, kept], index=chars, columns=chars),
+            pd.DataFrame(totals[kept][:, kept], index=chars, columns=chars),
+        )
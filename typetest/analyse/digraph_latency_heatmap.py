@@ -0,0 +1,41 @@
+import seaborn as sns
+import matplotlib.pyplot as plt
+
+from typetest.analyse.loaders import digraphs
+from typetest.utils import validate_input_file_path
+
+
+@validate_input_file_path
+def plot(input_file, filter_func=lambda c: True, last=None, show=True):
+    """Reads all lines of `input_file`, or only the `last` ones, and plots a
+    heatmap of the median latency from typing each character to typing the
+    next one in the same test.
+
+    filter_func: function taking a `char` returning `True` if char should be
+    plotted, `False` otherwise, or a regular expression plotted characters
+    match. By default plots all characters.
+    """
+    histograms = digraphs(input_file, last=last)
+    medians, counts = histograms.matrix(filter_func)
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+
+    sns.heatmap(
+        medians * 1000,
+        ax=ax,
+        cmap="rocket_r",
+        square=True,
+        cbar_kws={"label": "median latency [ms]"},
+    )
+
+    ax.set_title(
+        "latency between consecutive characters of "
+        + (f"last {last} characters" if last else "all characters")
+        + f" ({int(counts.to_numpy().sum())} transitions)"
+    )
+    ax.set_xlabel("next character")
+    ax.set_ylabel("previous character")
+
+    if show:
+        plt.show()
+    return fig
@@ -0,0 +1,313 @@
+"""Loading of result tables stored in csv files, a database or an
+archive.
+
+Parsed csv files are cached next to them in `<file>.cache`, so analysing
+results again only parses lines appended since. Inside a `session`, every
+table is also loaded only once, no matter how many plots use it.
+
+Aggregations over the whole history, too large to load at once, read it in
+`chunks` instead, and cache their result next to it likewise, like
+`digraphs` does.
+"""
+import os
+import pickle
+import sqlite3
+
+from io import BytesIO
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+from typetest import archive, database
+from typetest.results import columns
+
+cache_version = 1
+cache_threshold = 1 << 20  # smaller csv files are parsed faster than cached
+anchor_size = 64  # bytes before the cached part's end proving it unchanged
+chunk_size = 1 << 20  # rows read at once by `chunks`
+csv_chunk_size = 32 << 20  # bytes read at once by `chunks`
+_session = None
+
+
+@contextmanager
+def session():
+    """Keeps tables read inside the `with` block in memory until it ends."""
+    global _session
+    _session = {}
+    try:
+        yield
+    finally:
+        _session = None
+
+
+def read(table, path, last=None):
+    """Returns a data frame of `table` stored at `path`, or only its `last`
+    rows. `path` is either the csv file of the table, or an SQLite database
+    or a columnar archive holding all tables.
+    """
+    if _session is None:
+        return _read(table, path, last)
+
+    key = table, os.fspath(path), last
+    if key not in _session:
+        _session[key] = _read(table, path, last)
+    return _session[key].copy()  # plots modify their data frames
+
+
+def _read(table, path, last):
+    if database.is_database(path):
+        return database.read(path, table, last)
+    if archive.is_archive(path):
+        return archive.read(path, table, last)
+
+    if last is not None:
+        return pd.read_csv(
+            BytesIO(tail(path, last)), header=None, names=columns[table]
+        )
+    if os.path.getsize(path) >= cache_threshold:
+        return read_cached_csv(table, path)
+    return pd.read_csv(path, header=None, names=columns[table])
+
+
+def tail(path, count, block_size=1 << 16):
+    """Returns the last `count` lines of the file at `path` as bytes.
+
+    The file is read backwards from its end, a block at a time, until
+    enough lines have been found, so only the end of the file is read.
+    """
+    if count <= 0:
+        return b""
+
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        blocks = []
+        newlines = 0
+        while position > 0 and newlines < count:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            block = f.read(size)
+            if position + size == end and block.endswith(b"\n"):
+                newlines -= 1  # the last line needs no newline before it
+            newlines += block.count(b"\n")
+            blocks.append(block)
+
+    # the data starts with a line or part of one, followed by `newlines`
+    # lines, of which only the last `count` ones are returned
+    data = b"".join(reversed(blocks))
+    start = 0
+    for _ in range(newlines + 1 - count):
+        start = data.index(b"\n", start) + 1
+    return data[start:]
+
+
+def read_cached_csv(table, path):
+    """Returns a data frame of the csv file of `table` at `path`, using and
+    updating its cache.
+
+    The cache is used as is if the size and modification time of the file
+    have not changed. If the file has only grown and its bytes at the end of
+    the cached part are still the same, just the appended lines are parsed.
+    Otherwise the whole file is parsed again.
+    """
+    cache_path = f"{path}.cache"
+    stat = os.stat(path)
+
+    cache = None
+    try:
+        with open(cache_path, "rb") as f:
+            cache = pickle.load(f)
+        if cache["version"] != cache_version:
+            cache = None
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+        pass
+
+    if cache is not None:
+        if (cache["size"], cache["mtime"]) == (stat.st_size, stat.st_mtime_ns):
+            return cache["data_frame"]
+        if cache["size"] > stat.st_size:
+            cache = None
+
+    with open(path, "rb") as f:
+        if cache is not None:
+            f.seek(cache["size"] - len(cache["anchor"]))
+            if f.read(len(cache["anchor"])) != cache["anchor"]:
+                cache = None
+                f.seek(0)
+        tail = f.read(stat.st_size - f.tell())
+
+    if cache is None:
+        data_frame = pd.read_csv(
+            BytesIO(tail), header=None, names=columns[table]
+        )
+    elif tail:
+        appended = pd.read_csv(
+            BytesIO(tail), header=None, names=columns[table]
+        )
+        data_frame = pd.concat(
+            [cache["data_frame"], appended], ignore_index=True
+        )
+    else:  # only the modification time has changed
+        data_frame = cache["data_frame"]
+
+    if not tail or tail.endswith(b"\n"):  # no line is being written now
+        with open(path, "rb") as f:
+            f.seek(max(stat.st_size - anchor_size, 0))
+            anchor = f.read(anchor_size)
+        cache = {
+            "version": cache_version,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "anchor": anchor,
+            "data_frame": data_frame,
+        }
+        try:
+            with open(f"{cache_path}.tmp", "wb") as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{cache_path}.tmp", cache_path)
+        except OSError:  # results are still analysed, just not cached
+            pass
+    return data_frame
+
+
+def chunks(table, path, start=0):
+    """Yields `(data frame, end)` of consecutive chunks of `table` stored at
+    `path`, like `read`, starting at `start`, the end of a chunk yielded
+    before, or 0. Ends are byte offsets into csv files and row counts of
+    databases and archives.
+    """
+    if database.is_database(path):
+        query, order = database.queries[table]
+        query += f"WHERE {order} > ? ORDER BY {order} LIMIT {chunk_size}"
+        with closing(sqlite3.connect(path)) as connection:
+            while True:
+                data_frame = pd.read_sql_query(
+                    query.replace("SELECT", f"SELECT {order} AS _row,", 1),
+                    connection,
+                    params=(start,),
+                )
+                if data_frame.empty:
+                    return
+                start = int(data_frame["_row"].iloc[-1])
+                yield data_frame.drop(columns="_row"), start
+    elif archive.is_archive(path):
+        import numpy as np
+
+        meta = archive.read_meta(path)
+        arrays = archive.arrays(path, table)
+        dictionaries = {
+            column: np.array(
+                archive.read_dictionary(path, table, column, meta),
+                dtype=object,
+            )
+            for column, kind in archive.schemas[table].items()
+            if kind == "text"
+        }
+        rows = meta["rows"].get(table, 0)
+        for stop in range(start + chunk_size, rows + chunk_size, chunk_size):
+            stop = min(stop, rows)
+            data = {}
+            for column, values in arrays.items():
+                values = values[start:stop]
+                if column in dictionaries:
+                    values = dictionaries[column][values]
+                data[column] = values
+            yield pd.DataFrame(data, columns=columns[table]), stop
+            start = stop
+    else:
+        with open(path, "rb") as f:
+            f.seek(start)
+            partial = b""
+            while block := f.read(csv_chunk_size):
+                block = partial + block
+                end = block.rfind(b"\n") + 1
+                partial = block[end:]  # the rest of the line is read next
+                if end:
+                    start += end
+                    yield pd.read_csv(
+                        BytesIO(block[:end]),
+                        header=None,
+                        names=columns[table],
+                    ), start
+
+
+def table_end(table, path):
+    """Returns the end of the last chunk `chunks` would yield of `table` in
+    the database or archive at `path`.
+    """
+    if database.is_database(path):
+        name = "tests" if table == "results" else table
+        with closing(sqlite3.connect(path)) as connection:
+            (end,) = connection.execute(
+                f"SELECT max(rowid) FROM {name}"
+            ).fetchone()
+        return end or 0
+    return archive.read_meta(path)["rows"].get(table, 0)
+
+
+def digraphs(path, last=None):
+    """Returns `typetest.analyse.aggregations.DigraphHistograms` of the
+    `char_speeds` table stored at `path`, or only of its `last` rows.
+
+    Histograms of the whole table are cached next to it in
+    `<path>.digraphs`, and extended with the rows added since when it has
+    only grown, like `read_cached_csv` does.
+    """
+    from typetest.analyse.aggregations import DigraphHistograms
+
+    if last is not None:
+        histograms = DigraphHistograms()
+        histograms.add(read("char_speeds", path, last))
+        return histograms
+
+    path = os.fspath(path).rstrip(os.sep)
+    cache_path = f"{path}.digraphs"
+    is_csv = os.path.isfile(path) and not database.is_database(path)
+    try:
+        with open(cache_path, "rb") as f:
+            cache = pickle.load(f)
+        if cache["version"] != cache_version:
+            cache = None
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+        cache = None
+
+    if cache is not None and is_csv:
+        with open(path, "rb") as f:
+            f.seek(max(cache["end"] - len(cache["anchor"]), 0))
+            if f.read(len(cache["anchor"])) != cache["anchor"]:
+                cache = None  # the file was rewritten
+    elif cache is not None and table_end("char_speeds", path) < cache["end"]:
+        cache = None  # rows were removed
+
+    if cache is None:
+        histograms, start = DigraphHistograms(), 0
+    else:
+        histograms = DigraphHistograms(cache["counts"], cache["carry"])
+        start = cache["end"]
+
+    end = start
+    for data_frame, end in chunks("char_speeds", path, start):
+        histograms.add(data_frame)
+    if cache is not None and end == start:
+        return histograms
+
+    anchor = b""
+    if is_csv:
+        with open(path, "rb") as f:
+            f.seek(max(end - anchor_size, 0))
+            anchor = f.read(end - f.tell())
+    cache = {
+        "version": cache_version,
+        "end": end,
+        "anchor": anchor,
+        "counts": histograms.counts,
+        "carry": histograms.carry,
+    }
+    try:
+        with open(f"{cache_path}.tmp", "wb") as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{cache_path}.tmp", cache_path)
+    except OSError:  # results are still analysed, just not cached
+        pass
+    return histograms
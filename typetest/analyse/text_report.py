@@ -0,0 +1,170 @@
+"""Text report of typing test results for the terminal.
+
+Shows the same insights as the graphs, as sparklines and tables, without
+importing a plotting library.
+"""
+import os
+
+from statistics import median
+
+from blessed import Terminal
+
+from typetest.analyse import aggregations
+from typetest.analyse.loaders import digraphs, read
+
+sparks = "▁▂▃▄▅▆▇█"
+duration_labels = ["short (<20s)", "medium (20s-1m)", "long (1m-10m)"]
+
+
+def sparkline(values):
+    """Returns a line of characters as high as `values` relative to their
+    minimum and maximum.
+    """
+    values = list(values)
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    scale = (len(sparks) - 1) / (high - low) if high > low else 0
+    return "".join(sparks[round((value - low) * scale)] for value in values)
+
+
+def report(paths, last=None, terminal=None):
+    """Returns a report of results stored at `paths`, a dictionary like the
+    one `typetest.analyse.__main__.main` passes to graphs, of all results or
+    only the `last` rows of every table.
+    """
+    terminal = terminal or Terminal()
+    sections = [
+        ("typing speed per test", "output", speed_section),
+        ("typing speed by test duration", "output", duration_section),
+        ("typing speed per character", "char_speeds", char_section),
+        (
+            "slowest transitions between characters",
+            "char_speeds",
+            digraph_section,
+        ),
+        ("worst and best words", "word_speeds", words_section),
+        ("number of mistakes in mistyped words", "mistyped", mistakes_section),
+    ]
+
+    lines = []
+    for title, path, section in sections:
+        lines.append(terminal.bold(title))
+        if os.path.exists(paths[path]):
+            lines.extend(section(paths[path], last, terminal))
+        else:
+            lines.append(f"  no results in {paths[path]}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def speed_section(path, last, terminal):
+    data_frame = read("results", path, last=last)
+    if data_frame.empty:
+        return ["  no tests taken yet"]
+
+    speeds = data_frame["wpm"].tolist()
+    start = max(len(speeds) - terminal.width + 4, 0)
+    shown = speeds[start:]  # as many tests as fit on a line
+    lines = [
+        "  " + sparkline(shown),
+        f"  tests: {len(speeds)}  last: {speeds[-1]}wpm"
+        + f"  best: {max(speeds)}wpm"
+        + f"  mean of last 10: {sum(speeds[-10:]) / len(speeds[-10:]):.0f}wpm",
+    ]
+    if len(shown) > 1:
+        # least squares slope of the shown speeds
+        count = len(shown)
+        mean_x, mean_y = (count - 1) / 2, sum(shown) / count
+        slope = sum(
+            (x - mean_x) * (y - mean_y) for x, y in enumerate(shown)
+        ) / sum((x - mean_x) ** 2 for x in range(count))
+        color = terminal.green if slope >= 0 else terminal.red
+        lines.append("  trend: " + color(f"{slope:+.2f}wpm per test"))
+    return lines
+
+
+def duration_section(path, last, terminal):
+    buckets = aggregations.duration_buckets(read("results", path, last=last))
+    lines = [f"  {'':16}{'tests':>6}{'mean':>8}{'last':>8}{'accuracy':>10}"]
+    for label, (_, row) in zip(duration_labels, buckets.iterrows()):
+        if row[("wpm", "count")] == 0:
+            continue
+        lines.append(
+            f"  {label:16}{int(row[('wpm', 'count')]):>6}"
+            + f"{row[('wpm', 'mean')]:>5.0f}wpm{row[('wpm', 'last')]:>5.0f}wpm"
+            + f"{row[('accuracy', 'mean')]:>9.0f}%"
+        )
+    return lines
+
+
+def char_section(path, last, terminal):
+    size = 10000 if last is None else last
+    chars, _, means = aggregations.trimmed_char_speeds(
+        read("char_speeds", path, last=size), str.islower
+    )
+    if not chars:
+        return [f"  no lowercase characters in the last {size} typed"]
+
+    by_speed = sorted(zip(means, chars))
+    return [
+        "  " + "".join(chars),
+        "  " + sparkline(means),
+        "  slowest: "
+        + ", ".join(f"{char} {mean:.0f}wpm" for mean, char in by_speed[:5]),
+        "  fastest: "
+        + ", ".join(f"{c} {mean:.0f}wpm" for mean, c in by_speed[::-1][:5]),
+    ]
+
+
+def digraph_section(path, last, terminal):
+    medians, counts = digraphs(path, last).matrix(str.islower)
+    medians = medians.where(counts >= 5).stack()  # typed often enough
+    if medians.empty:
+        return ["  not enough lowercase transitions typed yet"]
+
+    slowest = medians.sort_values(ascending=False).iloc[:10]
+    labels = [f"{a}{b} {s * 1000:.0f}ms" for (a, b), s in slowest.items()]
+    lines = ["  " + ", ".join(labels[:5])]
+    if labels[5:]:
+        lines.append("  " + ", ".join(labels[5:]))
+    return lines
+
+
+def words_section(path, last, terminal):
+    words = aggregations.worst_and_best_words(
+        read("word_speeds", path, last=last), 20, r"^[a-z]+$"
+    )
+    if not words:
+        return ["  no words typed yet"]
+
+    medians = [(word, median(speeds)) for word, speeds, _ in words]
+    worst, best = medians[:10], medians[10:][::-1]
+    lines = []
+    for i in range(max(len(worst), len(best))):
+        line = "  "
+        if i < len(worst):
+            line += terminal.red(f"{worst[i][0]:>16} {worst[i][1]:>4.0f}wpm")
+        else:
+            line += " " * 24
+        if i < len(best):
+            line += terminal.green(f"{best[i][0]:>18} {best[i][1]:>4.0f}wpm")
+        lines.append(line)
+    return lines
+
+
+def mistakes_section(path, last, terminal):
+    mistakes = aggregations.mistake_counts(
+        read("mistyped_words", path, last=last)
+    )
+    total = sum(count for _, count in mistakes)
+    if not total:
+        return ["  no mistakes made yet"]
+
+    width = max(terminal.width - 24, 10)
+    return [
+        f"  {distance:>3} {'mistake' if distance == 1 else 'mistakes':8}"
+        + f"{100 * count / total:5.1f}% "
+        + "█" * round(width * count / total)
+        for distance, count in mistakes
+    ]
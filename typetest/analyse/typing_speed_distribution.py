@@ -1,28 +1,25 @@
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+from typetest.analyse.loaders import read
 from typetest.utils import validate_input_file_path
+from typetest.analyse.aggregations import word_medians
 
 
 @validate_input_file_path
-def plot(input_file, filter_func=lambda c: True):
-    """Plots a distribution over average speeds of unique words."""
-    data_frame = pd.read_csv(
-        input_file,
-        header=None,
-        names=["word", "duration", "wpm", "timestamp"],
-    )
+def plot(input_file, filter_func=lambda c: True, last=None, show=True):
+    """Plots a distribution over average speeds of unique words, of all
+    words typed or only the `last` ones.
+    """
+    data_frame = read("word_speeds", input_file, last=last)
 
-    grouped_data_frames = list(
-        filter(lambda t: filter_func(t[0]), data_frame.groupby(["word"]))
-    )
-    typing_speeds_in_wpm = [
-        data_frame["wpm"].median() for word, data_frame in grouped_data_frames
-    ]
+    typing_speeds_in_wpm = word_medians(data_frame, filter_func).tolist()
 
-    ax = sns.histplot(typing_speeds_in_wpm, kde=True, stat="probability")
+    fig, ax = plt.subplots()
+    sns.histplot(typing_speeds_in_wpm, kde=True, stat="probability", ax=ax)
     ax.set_title("percentage of words typed at a certain speed")
     ax.set_xlabel("typing speed [words per minute]")
     ax.set_ylabel("percentage of words")
-    plt.show()
+    if show:
+        plt.show()
+    return fig
@@ -1,39 +1,21 @@
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
-from collections import deque
-
+from typetest.analyse.loaders import read
 from typetest.utils import validate_input_file_path
+from typetest.analyse.aggregations import worst_and_best_words
 
 
 @validate_input_file_path
-def plot(input_file, n, filter_func=lambda w: True):
-    """Loads all words from `input_file` and groups them by word."""
-
-    data_frame = pd.read_csv(
-        input_file,
-        header=None,
-        names=["word", "duration", "wpm", "timestamp"],
-    )
-
-    grouped_data_frames = list(
-        filter(lambda t: filter_func(t[0]), data_frame.groupby("word"))
-    )
-    grouped_data_frames = sorted(
-        grouped_data_frames, key=lambda x: x[1]["wpm"].median()
-    )
+def plot(input_file, n, filter_func=lambda w: True, last=None, show=True):
+    """Loads all words from `input_file`, or only the `last` ones, and
+    groups them by word.
+    """
 
-    first_half = deque(maxlen=n // 2)
-    second_half = deque(maxlen=n // 2)
-    for word, df in grouped_data_frames:
-        if len(first_half) < first_half.maxlen:
-            first_half.append((word, df["wpm"], df["wpm"].mean()))
-        else:
-            second_half.append((word, df["wpm"], df["wpm"].mean()))
+    data_frame = read("word_speeds", input_file, last=last)
 
     words, typing_speeds_in_wpm, means = zip(
-        *list(first_half) + list(second_half)
+        *worst_and_best_words(data_frame, n, filter_func)
     )
     mean = round(sum(means) / len(means))
 
@@ -52,4 +34,6 @@ def plot(input_file, n, filter_func=lambda w: True):
     plt.yticks(np.arange(ticks[0], ticks[-1], 10))
     plt.xticks(rotation=90)
 
-    plt.show()
+    if show:
+        plt.show()
+    return fig
@@ -1,48 +1,26 @@
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
-from io import StringIO
-from collections import deque
-
+from typetest.analyse.loaders import read
 from typetest.utils import validate_input_file_path
+from typetest.analyse.aggregations import trimmed_char_speeds
 
 
 @validate_input_file_path
-def plot(input_file, size=10000, filter_func=lambda c: True):
+def plot(input_file, size=10000, filter_func=lambda c: True, show=True):
     """Reads last `size` lines of `input_file` and groups them by characters.
     Removes lowest and highest 10% and boxplots the data.
 
     filter_func: function taking a `char` returning `True` if char should be
-    plotted, `False` otherwise. By default plots all characters.
+    plotted, `False` otherwise, or a regular expression plotted characters
+    match. By default plots all characters.
     """
-    with open(input_file) as f:
-        q = deque(f, maxlen=size)
-
-    data_frame = pd.read_csv(
-        StringIO("".join(q)),
-        header=None,
-        names=["char", "duration", "wpm", "timestamp"],
-    )
+    data_frame = read("char_speeds", input_file, last=size)
 
-    grouped_data_frames = filter(
-        lambda t: filter_func(t[1]["char"].iloc[0]),
-        data_frame.groupby("char"),
+    chars, typing_speeds_in_wpm, means = trimmed_char_speeds(
+        data_frame, filter_func
     )
 
-    typing_speeds_in_wpm = []
-    chars = []
-    means = []
-    for char, df in grouped_data_frames:
-        if filter_func(char):
-            q1 = df["wpm"].quantile(0.1)  # noqa
-            q3 = df["wpm"].quantile(0.9)  # noqa
-            typing_speed_in_wpm = df.query("@q1 <= wpm <= @q3")["wpm"]
-            chars.append(char)
-            typing_speeds_in_wpm.append(typing_speed_in_wpm)
-            mean = typing_speed_in_wpm.mean()
-            means.append(mean if mean > 0 else 0)
-
     fig, ax = plt.subplots()
 
     ax.boxplot(typing_speeds_in_wpm, labels=chars)
@@ -57,4 +35,6 @@ def plot(input_file, size=10000, filter_func=lambda c: True):
     ticks = plt.yticks()[0]
     plt.yticks(np.arange(0, ticks[-1], 10))
 
-    plt.show()
+    if show:
+        plt.show()
+    return fig
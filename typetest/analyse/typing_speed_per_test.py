@@ -7,6 +7,8 @@ import matplotlib.pyplot as plt
 from itertools import cycle
 from matplotlib.ticker import MaxNLocator, FuncFormatter
 
+from typetest.corpus import Registry
+from typetest.analyse.loaders import read
 from typetest.utils import validate_input_file_path
 
 known_hashes = {
@@ -18,27 +20,18 @@ known_hashes = {
 
 
 @validate_input_file_path
-def plot(input_file_path):
+def plot(input_file_path, last=None, show=True):
     """Reads file at `input_file_path` and plots typing speeds for each
     test taken. Adds a trendline (linear approximation of the curve).
 
     Tests are separated on the x-axis uniformly apart, regardless of the
     time passed between two adjacent tests (it could be a day, or a year).
+    With `last` set, only the last tests are plotted.
     """
-    data_frame = pd.read_csv(
-        input_file_path,
-        header=None,
-        names=[
-            "timestamp",
-            "wpm",
-            "accuracy",
-            "actual_duration",
-            "duration",
-            "hash",
-        ],
-    )
+    data_frame = read("results", input_file_path, last=last)
 
     data_frame.timestamp = pd.to_datetime(data_frame.timestamp).dt.date
+    test_names = {**known_hashes, **Registry().names()}
     # data_frame = data_frame.set_index(data_frame.timestamp)
 
     fig, ax = plt.subplots()
@@ -64,8 +57,8 @@ def plot(input_file_path):
             y,
             color=color,
             lw=3,
-            label=known_hashes.get(
-                test_hash, "unknown test (add hash to config)"
+            label=test_names.get(
+                test_hash, "unknown test (register it with typetest-corpus)"
             ),
         )
         if len(grouped_data_frame) > 1:
@@ -91,4 +84,6 @@ def plot(input_file_path):
 
     ax.legend(loc="upper left")
 
-    plt.show()
+    if show:
+        plt.show()
+    return fig
@@ -8,11 +8,13 @@ from itertools import cycle
 from collections import defaultdict
 from matplotlib.ticker import MaxNLocator, FuncFormatter
 
+from typetest.analyse.loaders import read
 from typetest.utils import validate_input_file_path
+from typetest.analyse.aggregations import duration_bins
 
 
 @validate_input_file_path
-def plot(input_file_path):
+def plot(input_file_path, last=None, show=True):
     """Reads `input_file_path` and plots typing speeds (wpm)
     categorized by buckets of test duration.
 
@@ -21,24 +23,15 @@ def plot(input_file_path):
     medium: 20 to 60 seconds
     long: 60 seconds to 10 minutes
     extra long: >10 minutes
+
+    With `last` set, only the last tests are plotted.
     """
-    data_frame = pd.read_csv(
-        input_file_path,
-        header=None,
-        names=[
-            "timestamp",
-            "wpm",
-            "accuracy",
-            "actual_duration",
-            "duration",
-            "hash",
-        ],
-    )
+    data_frame = read("results", input_file_path, last=last)
 
     data_frame.timestamp = pd.to_datetime(data_frame.timestamp).dt.date
 
     grouped_data_frames = data_frame.groupby(
-        pd.cut(data_frame["actual_duration"], [0, 20, 60, 600])
+        pd.cut(data_frame["actual_duration"], duration_bins)
     )
 
     fig, ax = plt.subplots()
@@ -77,4 +70,6 @@ def plot(input_file_path):
     plt.xticks(rotation=90)
 
     ax.legend()
-    plt.show()
+    if show:
+        plt.show()
+    return fig
@@ -0,0 +1,301 @@
+"""Columnar archive of typing test results.
+
+An archive is a directory holding every column of every results table in a
+file of its own, so the analysis can memory map just the columns it needs.
+Numbers are stored as little-endian fixed-width binary values and timestamps
+as 64-bit seconds since the epoch. Text columns are dictionary-encoded, as
+32-bit indices into a dictionary file with a JSON encoded value per line.
+
+`meta.json` holds the number of rows of every table and the number of values
+of every dictionary, and is replaced only after new rows have been written,
+so readers never see partially appended rows.
+"""
+import os
+import csv
+import sys
+import json
+
+from array import array
+from datetime import datetime, timezone
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from typetest.results import columns
+
+timestamp_format = "%d/%m/%Y %H:%M:%S"
+
+# numpy dtypes of the columns and the matching `array` typecodes
+types = {
+    "int": ("<i8", "q"),
+    "float": ("<f8", "d"),
+    "time": ("<i8", "q"),
+    "text": ("<u4", "I"),
+}
+schemas = {
+    "results": {
+        "timestamp": "time",
+        "wpm": "int",
+        "accuracy": "int",
+        "actual_duration": "float",
+        "duration": "float",
+        "hash": "text",
+    },
+    "mistyped_words": {"word": "text", "mistype": "text", "timestamp": "time"},
+    "char_speeds": {
+        "char": "text",
+        "duration": "float",
+        "wpm": "float",
+        "timestamp": "time",
+    },
+    "word_speeds": {
+        "word": "text",
+        "duration": "float",
+        "wpm": "float",
+        "timestamp": "time",
+    },
+}
+
+
+def is_archive(path):
+    """Returns `True` if `path` is an archive directory."""
+    return os.path.isfile(os.path.join(path, "meta.json"))
+
+
+def read_meta(directory):
+    """Returns the row counts of tables and value counts of dictionaries of
+    the archive in `directory`.
+    """
+    try:
+        with open(os.path.join(directory, "meta.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"rows": {}, "dictionaries": {}}
+
+
+def read_dictionary(directory, table, column, meta=None):
+    """Returns the list of values of the dictionary of a text column."""
+    meta = meta or read_meta(directory)
+    name = f"{table}.{column}"
+    size = meta["dictionaries"].get(name, 0)
+    values = []
+    try:
+        with open(os.path.join(directory, name + ".dict")) as f:
+            for line, _ in zip(f, range(size)):
+                values.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return values
+
+
+class Archive:
+    """Appends rows of tests to the archive in `directory`."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.meta = read_meta(directory)
+        self.dictionaries = {}
+        self._last_timestamp = None, None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _codes(self, table, column):
+        """Returns the dictionary of a text column mapping values to their
+        codes.
+        """
+        name = f"{table}.{column}"
+        if name not in self.dictionaries:
+            values = read_dictionary(self.directory, table, column, self.meta)
+            self.dictionaries[name] = {v: i for i, v in enumerate(values)}
+        return self.dictionaries[name]
+
+    def _time(self, timestamp):
+        """Returns seconds since the epoch of a csv `timestamp`."""
+        if self._last_timestamp[0] != timestamp:  # rows share timestamps
+            time = datetime.strptime(timestamp, timestamp_format)
+            seconds = int(time.replace(tzinfo=timezone.utc).timestamp())
+            self._last_timestamp = timestamp, seconds
+        return self._last_timestamp[1]
+
+    def _encode(self, table, column, kind, values):
+        """Returns an `array` of `values` encoded as stored in the archive,
+        adding new text values to the dictionary of the column.
+        """
+        typecode = types[kind][1]
+        if kind == "int":
+            return array(typecode, (int(float(v)) for v in values))
+        if kind == "float":
+            return array(typecode, (float(v) for v in values))
+        if kind == "time":
+            return array(typecode, (self._time(v) for v in values))
+
+        codes = self._codes(table, column)
+        new_values = []
+        encoded = array(typecode)
+        for value in values:
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(codes)
+                new_values.append(value)
+            encoded.append(code)
+
+        if new_values:
+            name = f"{table}.{column}"
+            self._truncate(name + ".dict", None)
+            with open(self._path(name + ".dict"), "a") as f:
+                for value in new_values:
+                    f.write(json.dumps(value) + "\n")
+            self.meta["dictionaries"][name] = len(codes)
+        return encoded
+
+    def _truncate(self, filename, size):
+        """Cuts off anything a crashed append has left after the committed
+        part of a file. Dictionaries are cut after their committed values.
+        """
+        path = self._path(filename)
+        if not os.path.isfile(path):
+            return
+
+        if size is None:
+            count = self.meta["dictionaries"].get(filename[:-5], 0)
+            size = 0
+            with open(path, "rb") as f:
+                for line, _ in zip(f, range(count)):
+                    size += len(line)
+
+        if os.path.getsize(path) != size:
+            os.truncate(path, size)
+
+    def append(self, rows):
+        """Appends `rows` of every table, as returned by
+        `typetest.results.test_rows`, and commits them.
+        """
+        for table, table_rows in rows.items():
+            if not table_rows:
+                continue
+
+            count = self.meta["rows"].get(table, 0)
+            for i, (column, kind) in enumerate(schemas[table].items()):
+                values = [row[i] for row in table_rows]
+                encoded = self._encode(table, column, kind, values)
+                filename = f"{table}.{column}"
+                self._truncate(filename, count * encoded.itemsize)
+                if sys.byteorder != "little":
+                    encoded.byteswap()
+                with open(self._path(filename), "ab") as f:
+                    encoded.tofile(f)
+            self.meta["rows"][table] = count + len(table_rows)
+
+        with open(self._path("meta.json.tmp"), "w") as f:
+            json.dump(self.meta, f)
+        os.replace(self._path("meta.json.tmp"), self._path("meta.json"))
+
+
+def arrays(directory, table, last=None):
+    """Returns a dictionary mapping columns of `table` to read-only NumPy
+    arrays memory mapping the archive, or only its `last` rows. Text columns
+    are arrays of codes into `read_dictionary`.
+    """
+    import numpy as np
+
+    rows = read_meta(directory)["rows"].get(table, 0)
+    start = 0 if last is None else max(rows - last, 0)
+    data = {}
+    for column, kind in schemas[table].items():
+        dtype = np.dtype(types[kind][0])
+        if rows - start == 0:
+            data[column] = np.empty(0, dtype=dtype)
+            continue
+        data[column] = np.memmap(
+            os.path.join(directory, f"{table}.{column}"),
+            dtype=dtype,
+            mode="r",
+            offset=start * dtype.itemsize,
+            shape=(rows - start,),
+        )
+    return data
+
+
+def read(directory, table, last=None):
+    """Returns a data frame of `table` with the same columns as its csv
+    file, or only its `last` rows.
+    """
+    import numpy as np
+    import pandas as pd
+
+    meta = read_meta(directory)
+    data = {}
+    for column, values in arrays(directory, table, last).items():
+        kind = schemas[table][column]
+        if kind == "text":
+            dictionary = read_dictionary(directory, table, column, meta)
+            values = np.array(dictionary, dtype=object)[values]
+        elif kind == "time":
+            values = values.astype("datetime64[s]")
+        data[column] = values
+    return pd.DataFrame(data, columns=columns[table])
+
+
+def convert(results_directory, directory, batch_size=100000):
+    """Appends the csv files of `results_directory` to the archive in
+    `directory`, `batch_size` rows at a time.
+    """
+    archive = Archive(directory)
+    for table in columns:
+        path = os.path.join(results_directory, f"{table}.csv")
+        if not os.path.isfile(path):
+            continue
+
+        with open(path) as f:
+            batch = []
+            for row in filter(None, csv.reader(f)):
+                batch.append(row)
+                if len(batch) == batch_size:
+                    archive.append({table: batch})
+                    batch = []
+            archive.append({table: batch})
+
+
+filename = os.path.basename(sys.argv[0])
+doc = f"""example:
+  {filename} convert ~/typetest/results results.ttc
+"""
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(command, results_directory, directory, help):
+    """Converts csv results from `results_directory` to an archive."""
+    if command == "convert":
+        convert(results_directory, directory)
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    parser.add_argument(
+        "command",
+        choices=["convert"],
+        help="append csv results to an archive",
+    )
+    parser.add_argument(
+        "results_directory",
+        type=str,
+        help="directory with results.csv, char_speeds.csv, word_speeds.csv"
+        + "\nand mistyped_words.csv",
+    )
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="archive directory (created if needed)",
+    )
+
+    return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
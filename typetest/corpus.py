@@ -0,0 +1,220 @@
+"""Registry of tests, addressed by the hash of their text.
+
+Every registered test is stored as a pre-tokenized word array in a file named
+after the sha1 hash of the test text, which is the hash results are stored
+with. Display names map to hashes through small files in `names/`, so a test
+is found by name or by hash without reading anything else. The `index` file
+lists the hash and the name of every registered test, one per line.
+"""
+import os
+import sys
+import struct
+import hashlib
+
+from urllib.parse import quote
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+base_directory = os.path.dirname(__file__)
+tests_directory = base_directory + "/tests"
+registry_directory = tests_directory + "/registry"
+
+header = struct.Struct("<4sI")  # magic, number of words
+magic = b"ttw1"
+
+
+def write_words(path, words):
+    """Writes `words` to `path` as their number followed by the words
+    separated by newlines.
+    """
+    with open(path, "wb") as f:
+        f.write(header.pack(magic, len(words)))
+        f.write("\n".join(words).encode("utf-8"))
+
+
+def read_words(path):
+    """Returns the list of words stored in `path` by `write_words`."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    tag, count = header.unpack_from(data)
+    if tag != magic:
+        raise ValueError(f"{path} is not a word array")
+    if count == 0:
+        return []
+    start = header.size  # the words follow the header
+    return data[start:].decode("utf-8").split("\n")
+
+
+def is_hash(key):
+    """Returns `True` if `key` looks like a sha1 hash."""
+    return len(key) == 40 and all(c in "0123456789abcdef" for c in key)
+
+
+class Registry:
+    """Tests stored in `directory`."""
+
+    def __init__(self, directory=registry_directory):
+        self.directory = directory
+
+    def _words_path(self, test_hash):
+        return os.path.join(self.directory, test_hash)
+
+    def _name_path(self, name):
+        return os.path.join(self.directory, "names", quote(name, safe=""))
+
+    def add(self, text, name):
+        """Registers the test `text` as `name` and returns its hash."""
+        test_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        os.makedirs(os.path.join(self.directory, "names"), exist_ok=True)
+
+        path = self._words_path(test_hash)
+        if not os.path.isfile(path):
+            write_words(path + ".tmp", text.split())
+            os.replace(path + ".tmp", path)
+
+        with open(self._name_path(name), "w") as f:
+            f.write(test_hash)
+        with open(os.path.join(self.directory, "index"), "a") as f:
+            f.write(f"{test_hash}\t{name}\n")
+        return test_hash
+
+    def add_file(self, path, name=None):
+        """Registers the test in file at `path`, named after the file by
+        default, and returns its hash.
+        """
+        with open(path) as f:
+            return self.add(f.read(), name or os.path.basename(path))
+
+    def find(self, key):
+        """Returns the hash of the test named `key` or hashed `key`.
+        Raises `KeyError` if there is no such test.
+        """
+        if is_hash(key) and os.path.isfile(self._words_path(key)):
+            return key
+
+        try:
+            with open(self._name_path(key)) as f:
+                return f.read().strip()
+        except OSError:
+            raise KeyError(key)
+
+    def _changed_since_added(self, name, path):
+        """Returns `True` if the file at `path` was modified after it was
+        registered as `name`.
+        """
+        try:
+            modified = os.stat(path).st_mtime_ns
+            return modified > os.stat(self._name_path(name)).st_mtime_ns
+        except OSError:
+            return False
+
+    def load(self, key):
+        """Returns the words and the hash of the test named `key` or hashed
+        `key`.
+
+        Tests bundled with typetest are registered the first time they are
+        loaded, and again when their file has changed since, like the
+        practice tests rewritten after every test. Raises `KeyError` if
+        there is no such test.
+        """
+        bundled = os.path.join(tests_directory, key)
+        try:
+            test_hash = self.find(key)
+            if self._changed_since_added(key, bundled):
+                raise KeyError(key)
+        except KeyError:
+            if not os.path.isfile(bundled):
+                raise
+
+            try:
+                test_hash = self.add_file(bundled)
+            except OSError:  # the registry is read-only, use the file as is
+                with open(bundled) as f:
+                    text = f.read()
+                return text.split(), hashlib.sha1(text.encode()).hexdigest()
+
+        try:
+            return read_words(self._words_path(test_hash)), test_hash
+        except FileNotFoundError:  # the name is left of a removed test
+            raise KeyError(key)
+
+    def names(self):
+        """Returns a dictionary mapping hashes of registered tests to their
+        names.
+        """
+        names = {}
+        try:
+            with open(os.path.join(self.directory, "index")) as f:
+                for line in f:
+                    test_hash, _, name = line.rstrip("\n").partition("\t")
+                    names[test_hash] = name
+        except FileNotFoundError:
+            pass
+        return names
+
+
+filename = os.path.basename(sys.argv[0])
+doc = f"""example:
+  {filename} add common_300 ~/drills/*.txt
+  {filename} add --name 'home row' home_row.txt
+  {filename} list
+"""
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(command, files, name, directory, help):
+    """Registers `files` or lists registered tests."""
+    registry = Registry(directory)
+    if command == "add":
+        for path in files:
+            if not os.path.isfile(path) and os.path.isfile(
+                os.path.join(tests_directory, path)
+            ):
+                path = os.path.join(tests_directory, path)
+            print(registry.add_file(path, name), path)
+    elif command == "list":
+        for test_hash, name in registry.names().items():
+            print(test_hash, name)
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    default = "(default: %(default)s)"
+    parser.add_argument(
+        "command",
+        choices=["add", "list"],
+        help="add tests to the registry or list registered tests",
+    )
+    parser.add_argument(
+        "files",
+        type=str,
+        nargs="*",
+        help="test files to add (bundled tests can be given by name)",
+    )
+    parser.add_argument(
+        "-n",
+        "--name",
+        type=str,
+        default=None,
+        help="name of the added tests (default: file name)",
+    )
+    parser.add_argument(
+        "-r",
+        "--registry",
+        dest="directory",
+        type=str,
+        default=registry_directory,
+        help="directory of the registry\n" + default,
+    )
+
+    return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
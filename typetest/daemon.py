@@ -0,0 +1,421 @@
+"""Daemon writing the results of many typing tests at once.
+
+When many `typetest` processes finish tests at the same time, each of them
+appending to the same results files and rewriting the same practice tests
+contend for them. Started with `typetest-daemon serve`, the daemon listens
+on a Unix socket instead, and `typetest --daemon` hands it the results of a
+test and exits right away. Results arriving close together are written in
+a single batch, after which the per-word statistics and the practice tests
+built from them are updated once for the whole batch. Submitted rows are
+checked before they are accepted, and results of a batch that could not be
+written are saved to the journal of `typetest.journal` instead.
+
+Clients send one json request per line and get one json response per line:
+
+    {"command": "submit", "rows": <rows of typetest.results.test_rows>}
+    {"command": "stats", "words": ["the", "of"], "n": 10}
+    {"command": "flush"}  # responds once everything submitted is written
+    {"command": "stop"}
+"""
+import os
+import sys
+import json
+import socket
+import tempfile
+import traceback
+
+from pathlib import Path
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+default_socket = os.path.join(tempfile.gettempdir(), "typetest.sock")
+default_output_directory = str(Path(__file__).parent / "results")
+linger = 0.05  # seconds to wait for more results before writing a batch
+line_limit = 1 << 26  # bytes of a request, results of long tests are large
+
+filename = os.path.basename(sys.argv[0])
+doc = f"""example:
+  {filename} serve -o ~/typetest/results &
+  typetest --daemon
+  {filename} stats the of and
+  {filename} stop
+"""
+
+
+def request(path, message, timeout=10):
+    """Sends `message` to the daemon listening at `path` and returns its
+    response. Raises `OSError` if there is no daemon listening.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(path)
+        connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        with connection.makefile("rb") as f:
+            response = f.readline()
+    if not response:
+        raise ConnectionError(f"the daemon at {path} closed the connection")
+    return json.loads(response)
+
+
+def submit(path, rows):
+    """Hands `rows` of a test, as returned by `typetest.results.test_rows`,
+    to the daemon listening at `path` to write them.
+    """
+    return request(path, {"command": "submit", "rows": rows})
+
+
+def check_rows(rows):
+    """Raises `ValueError` unless `rows` are the rows of a single test, as
+    returned by `typetest.results.test_rows`.
+    """
+    from typetest.results import columns
+
+    if not isinstance(rows, dict):
+        raise ValueError("rows must map tables to their rows")
+    for table, names in columns.items():
+        table_rows = rows.get(table)
+        if not isinstance(table_rows, list) or not all(
+            isinstance(row, list) and len(row) == len(names)
+            for row in table_rows
+        ):
+            raise ValueError(f"{table} must be rows of {len(names)} columns")
+    if len(rows["results"]) != 1:
+        raise ValueError("rows must be the results of a single test")
+    wpm = rows["results"][0][1]
+    if not isinstance(wpm, (int, float)) or isinstance(wpm, bool):
+        raise ValueError("the typing speed of the test must be a number")
+
+
+class Daemon:
+    """Writes results submitted by clients to csv files in
+    `output_directory`, or to `database` if it is given, and to `archive` if
+    it is given, like `typetest` does.
+    """
+
+    def __init__(self, output_directory, database=None, archive=None):
+        self.output_directory = output_directory
+        self.database = database
+        self.archive = archive
+        self.stats_file = os.path.join(output_directory, "word_stats.json")
+        self.tests_directory = os.path.join(output_directory, "../tests")
+        self.pending = []  # rows of tests not yet written
+        self.submitted = self.written = self.failed = self.batches = 0
+        self.speeds = []  # typing speeds of tests submitted
+        self.stats = None  # per-word stats as of the last batch
+        self.closing = False
+
+    async def run(self, path):
+        """Serves clients on a Unix socket at `path` until stopped, then
+        writes the results that are still pending.
+        """
+        import asyncio
+
+        self.wakeup = asyncio.Event()
+        self.stopped = asyncio.Event()
+        self.progress = asyncio.Condition()
+
+        if os.path.exists(path):
+            try:
+                request(path, {"command": "stats", "n": 0})
+            except OSError:  # left behind by a daemon that didn't exit
+                os.remove(path)
+            else:
+                raise RuntimeError(f"a daemon is already listening at {path}")
+
+        if os.path.isfile(self.stats_file):
+            from typetest.word_stats import WordStats
+
+            self.stats = WordStats.load(self.stats_file)
+
+        server = await asyncio.start_unix_server(
+            self.handle, path, limit=line_limit
+        )
+        writer = asyncio.create_task(self.write_batches())
+        try:
+            await self.stopped.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            self.closing = True
+            self.wakeup.set()
+            await writer
+            os.remove(path)
+
+    def stop(self):
+        self.stopped.set()
+
+    async def handle(self, reader, writer):
+        """Answers requests of a client until it disconnects."""
+        try:
+            while line := await reader.readline():
+                try:
+                    response = await self.respond(json.loads(line))
+                except (ValueError, KeyError, TypeError) as error:
+                    response = {"ok": False, "error": repr(error)}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, message):
+        command = message["command"]
+        if command == "submit":
+            rows = message["rows"]
+            check_rows(rows)  # one bad test must not fail a whole batch
+            self.pending.append(rows)
+            self.submitted += 1
+            self.speeds.append(rows["results"][0][1])
+            self.wakeup.set()
+            return {"ok": True, "pending": len(self.pending)}
+
+        if command == "flush":
+            submitted = self.submitted
+            async with self.progress:
+                await self.progress.wait_for(
+                    lambda: self.written + self.failed >= submitted
+                )
+            return {"ok": True, "written": self.written, "failed": self.failed}
+
+        if command == "stats":
+            return {"ok": True, **self.summary(message)}
+
+        if command == "stop":
+            self.stop()
+            return {"ok": True}
+
+        return {"ok": False, "error": f"unknown command {command}"}
+
+    def summary(self, message):
+        """Returns counts of tests handled, typing speeds of tests submitted
+        and stats of the words in `message`.
+        """
+        n = message.get("n", 10)
+        speeds = self.speeds
+        summary = {
+            "submitted": self.submitted,
+            "written": self.written,
+            "failed": self.failed,
+            "pending": len(self.pending),
+            "batches": self.batches,
+            "mean_wpm": sum(speeds) / len(speeds) if speeds else None,
+            "best_wpm": max(speeds, default=None),
+            "words": {},
+            "worst_words": [],
+            "least_typed_words": [],
+        }
+        if self.stats is not None:
+            sketches = self.stats.sketches
+            for word in message.get("words", []):
+                if word in sketches:
+                    summary["words"][word] = {
+                        "count": sketches[word].count,
+                        "median_wpm": sketches[word].median(),
+                    }
+            if n:
+                summary["worst_words"] = self.stats.worst_words()[:n]
+                least_typed = self.stats.least_typed_words()
+                summary["least_typed_words"] = least_typed[:n]
+        return summary
+
+    async def write_batches(self):
+        """Writes pending results whenever there are some, waiting a little
+        for more to arrive first, until the daemon is closing.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.wakeup.wait()
+            if not self.closing:
+                await asyncio.sleep(linger)
+            self.wakeup.clear()
+
+            batch, self.pending = self.pending, []
+            if batch:
+                # in a thread, so that clients are answered meanwhile
+                written = await loop.run_in_executor(None, self.write, batch)
+                if written:
+                    self.written += len(batch)
+                else:
+                    self.failed += len(batch)
+                self.batches += 1
+                async with self.progress:
+                    self.progress.notify_all()
+
+            if self.closing and not self.pending:
+                return
+
+    def write(self, batch):
+        """Writes rows of all tests of `batch` and updates the per-word
+        stats and practice tests. Returns `False` if the rows could not be
+        written.
+
+        Rows that could not be written are appended to the journal of the
+        output directory instead, to be written by `typetest-journal
+        compact`, see `typetest.journal`.
+        """
+        try:
+            word_speeds, mistyped_words = self.write_rows(batch)
+        except Exception:
+            traceback.print_exc()
+            self.save(batch)
+            return False
+
+        from typetest.word_stats import update_test_files
+
+        try:
+            self.stats = update_test_files(
+                self.stats_file,
+                {
+                    table: [row for test in batch for row in test[table]]
+                    for table in ["word_speeds", "mistyped_words"]
+                },
+                word_speeds,
+                mistyped_words,
+                os.path.join(self.tests_directory, "least_typed_words"),
+                os.path.join(self.tests_directory, "worst_words"),
+            )
+        except Exception:  # the results are written, only not in the stats
+            traceback.print_exc()
+        return True
+
+    def write_rows(self, batch):
+        """Writes rows of all tests of `batch`, and returns the paths of the
+        word speeds and mistyped words histories they were added to.
+        """
+        from typetest.archive import Archive
+        from typetest.database import connect, write
+        from typetest.results import columns, write_csv
+
+        rows = {
+            table: [row for test in batch for row in test[table]]
+            for table in columns
+        }
+
+        if self.database is None:
+            write_csv(self.output_directory, rows)
+            histories = [
+                os.path.join(self.output_directory, f"{table}.csv")
+                for table in ["word_speeds", "mistyped_words"]
+            ]
+        else:
+            connection = connect(self.database)
+            for test in batch:
+                write(connection, test)
+            connection.close()
+            histories = [self.database, self.database]
+
+        if self.archive is not None:
+            Archive(self.archive).append(rows)
+        return histories
+
+    def save(self, batch):
+        """Appends the tests of `batch` to the journal of the output
+        directory, printing where they were saved, or that they were lost.
+        """
+        from typetest.journal import append, journal_name
+
+        path = os.path.join(self.output_directory, journal_name)
+        try:
+            for test in batch:
+                append(self.output_directory, test)
+        except OSError as error:
+            print(
+                f"lost results of {len(batch)} tests ({error})",
+                file=sys.stderr,
+            )
+        else:
+            print(
+                f"saved results of {len(batch)} tests to {path},"
+                + " write them with typetest-journal compact",
+                file=sys.stderr,
+            )
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(
+    command, socket_path, output_directory, database, archive, words, help
+):
+    """Serves clients on `socket_path`, or sends the daemon listening on it
+    a request.
+    """
+    if command == "serve":
+        import signal
+        import asyncio
+
+        daemon = Daemon(output_directory, database, archive)
+
+        async def serve():
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, daemon.stop)
+            await daemon.run(socket_path)
+
+        try:
+            asyncio.run(serve())
+        except RuntimeError as error:
+            exit(str(error))
+        return
+
+    try:
+        response = request(socket_path, {"command": command, "words": words})
+    except OSError as error:
+        exit(f"There is no daemon listening at {socket_path} ({error}).")
+    print(json.dumps(response, indent=2))
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    default = "(default: %(default)s)"
+    parser.add_argument(
+        "command",
+        choices=["serve", "stats", "flush", "stop"],
+        help="run the daemon, query its stats, wait until it has written"
+        + "\nall results, or stop it",
+    )
+    parser.add_argument(
+        "words",
+        type=str,
+        nargs="*",
+        help="words to get the typing stats of",
+    )
+    parser.add_argument(
+        "--socket",
+        dest="socket_path",
+        metavar="SOCKET",
+        type=str,
+        default=default_socket,
+        help="Unix socket the daemon listens on\n" + default,
+    )
+    parser.add_argument(
+        "-o",
+        "--output-directory",
+        type=str,
+        default=default_output_directory,
+        help="directory to store results in\n" + default,
+    )
+    parser.add_argument(
+        "--database",
+        type=str,
+        default=None,
+        help="SQLite database to store results in instead of csv files",
+    )
+    parser.add_argument(
+        "--archive",
+        type=str,
+        default=None,
+        help="columnar archive to also append results to",
+    )
+
+    return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,240 @@
+"""SQLite storage of typing test results.
+
+Every test is a row of the `tests` table, and its characters, words and
+mistyped words are rows of the `char_speeds`, `word_speeds` and
+`mistyped_words` tables referencing it by `test_id`. The tables are indexed
+by the columns results are usually looked up by, so that, for example,
+finding every time a word was typed doesn't scan the whole history.
+"""
+import os
+import csv
+import sys
+import sqlite3
+
+from datetime import datetime
+from itertools import groupby
+from contextlib import ExitStack, closing
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+timestamp_format = "%d/%m/%Y %H:%M:%S"
+time_format = "%Y-%m-%d %H:%M:%S"
+
+schema = """
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    wpm INTEGER,
+    accuracy INTEGER,
+    actual_duration REAL,
+    duration REAL,
+    hash TEXT
+);
+CREATE TABLE IF NOT EXISTS char_speeds (
+    test_id INTEGER NOT NULL REFERENCES tests(id),
+    char TEXT,
+    duration REAL,
+    wpm REAL
+);
+CREATE TABLE IF NOT EXISTS word_speeds (
+    test_id INTEGER NOT NULL REFERENCES tests(id),
+    word TEXT,
+    duration REAL,
+    wpm REAL
+);
+CREATE TABLE IF NOT EXISTS mistyped_words (
+    test_id INTEGER NOT NULL REFERENCES tests(id),
+    word TEXT,
+    mistype TEXT
+);
+CREATE INDEX IF NOT EXISTS tests_time ON tests(time);
+CREATE INDEX IF NOT EXISTS tests_hash ON tests(hash);
+CREATE INDEX IF NOT EXISTS char_speeds_char ON char_speeds(char);
+CREATE INDEX IF NOT EXISTS char_speeds_test ON char_speeds(test_id);
+CREATE INDEX IF NOT EXISTS word_speeds_word ON word_speeds(word);
+CREATE INDEX IF NOT EXISTS word_speeds_test ON word_speeds(test_id);
+CREATE INDEX IF NOT EXISTS mistyped_words_word ON mistyped_words(word);
+CREATE INDEX IF NOT EXISTS mistyped_words_test ON mistyped_words(test_id);
+"""
+
+# queries returning tables with the same columns as their csv files, and
+# the columns their rows are ordered by
+queries = {
+    "results": (
+        """
+        SELECT strftime('%d/%m/%Y %H:%M:%S', time) AS timestamp,
+            wpm, accuracy, actual_duration, duration, hash
+        FROM tests
+        """,
+        "id",
+    ),
+    "char_speeds": (
+        """
+        SELECT c.char, c.duration, c.wpm,
+            strftime('%d/%m/%Y %H:%M:%S', t.time) AS timestamp
+        FROM char_speeds c JOIN tests t ON t.id = c.test_id
+        """,
+        "c.rowid",
+    ),
+    "word_speeds": (
+        """
+        SELECT w.word, w.duration, w.wpm,
+            strftime('%d/%m/%Y %H:%M:%S', t.time) AS timestamp
+        FROM word_speeds w JOIN tests t ON t.id = w.test_id
+        """,
+        "w.rowid",
+    ),
+    "mistyped_words": (
+        """
+        SELECT m.word, m.mistype,
+            strftime('%d/%m/%Y %H:%M:%S', t.time) AS timestamp
+        FROM mistyped_words m JOIN tests t ON t.id = m.test_id
+        """,
+        "m.rowid",
+    ),
+}
+
+
+def is_database(path):
+    """Returns `True` if `path` is an SQLite database file."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(16) == b"SQLite format 3\x00"
+    except OSError:
+        return False
+
+
+def connect(path):
+    """Opens the database at `path`, creating its tables if needed."""
+    connection = sqlite3.connect(path)
+    connection.executescript(schema)
+    return connection
+
+
+def write(connection, rows):
+    """Stores `rows` of a test, as returned by `typetest.results.test_rows`,
+    in a single transaction.
+    """
+    (timestamp, *result), *_ = rows["results"]
+    time = datetime.strptime(timestamp, timestamp_format)
+
+    with connection:
+        cursor = connection.execute(
+            "INSERT INTO tests (time, wpm, accuracy, actual_duration,"
+            + " duration, hash) VALUES (?, ?, ?, ?, ?, ?)",
+            [time.strftime(time_format), *result],
+        )
+        test_id = cursor.lastrowid
+        connection.executemany(
+            "INSERT INTO char_speeds VALUES (?, ?, ?, ?)",
+            ((test_id, *row[:3]) for row in rows["char_speeds"]),
+        )
+        connection.executemany(
+            "INSERT INTO word_speeds VALUES (?, ?, ?, ?)",
+            ((test_id, *row[:3]) for row in rows["word_speeds"]),
+        )
+        connection.executemany(
+            "INSERT INTO mistyped_words VALUES (?, ?, ?)",
+            ((test_id, *row[:2]) for row in rows["mistyped_words"]),
+        )
+
+
+def read(path, table, last=None):
+    """Returns a data frame of `table` in the database at `path` with the
+    same columns as its csv file, or only its `last` rows.
+    """
+    import pandas as pd
+
+    query, order = queries[table]
+    if last is None:
+        query += f"ORDER BY {order}"
+    else:  # read backwards from the end
+        query += f"ORDER BY {order} DESC LIMIT {int(last)}"
+
+    with closing(sqlite3.connect(path)) as connection:
+        data_frame = pd.read_sql_query(query, connection)
+    if last is not None:
+        data_frame = data_frame.iloc[::-1].reset_index(drop=True)
+    return data_frame
+
+
+def import_csv(connection, directory):
+    """Imports the csv files of the output `directory` into the database.
+
+    Rows of a test are matched by their timestamp. Every csv file is read
+    once, in lockstep with `results.csv`, since all of them are appended to
+    in the order the tests were taken.
+    """
+    tables = ["char_speeds", "word_speeds", "mistyped_words"]
+    with ExitStack() as stack:
+        groups = {}
+        for table in tables:
+            path = os.path.join(directory, f"{table}.csv")
+            if os.path.isfile(path):
+                reader = csv.reader(stack.enter_context(open(path)))
+                groups[table] = groupby(
+                    filter(None, reader), key=lambda row: row[-1]
+                )
+            else:
+                groups[table] = iter(())
+        pending = {table: next(groups[table], None) for table in tables}
+
+        results_file = stack.enter_context(
+            open(os.path.join(directory, "results.csv"))
+        )
+        for result in filter(None, csv.reader(results_file)):
+            rows = {"results": [result]}
+            for table in tables:
+                group = pending[table]
+                if group is not None and group[0] == result[0]:
+                    rows[table] = list(group[1])
+                    pending[table] = next(groups[table], None)
+                else:
+                    rows[table] = []
+            write(connection, rows)
+
+
+filename = os.path.basename(sys.argv[0])
+doc = f"""example:
+  {filename} import ~/typetest/results results.db
+"""
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(command, directory, database, help):
+    """Imports csv results from `directory` into `database`."""
+    if command == "import":
+        connection = connect(database)
+        import_csv(connection, directory)
+        connection.close()
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    parser.add_argument(
+        "command",
+        choices=["import"],
+        help="import csv results into a database",
+    )
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="directory with results.csv, char_speeds.csv, word_speeds.csv"
+        + "\nand mistyped_words.csv",
+    )
+    parser.add_argument(
+        "database",
+        type=str,
+        help="database file to import results into",
+    )
+
+    return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
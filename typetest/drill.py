@@ -0,0 +1,268 @@
+"""Drills of words dense in the key transitions typed slowest.
+
+Every typed character is stored in `char_speeds` with the time until the
+next one was typed, which is the latency of the transition between the two
+keys. The median latency of every bigram of printable characters is taken
+from the histograms of `typetest.analyse.loaders.digraphs`, cached next to
+the history and extended with the rows added since, so a drill only reads
+keystrokes typed after the last one. The bigrams slowest compared to the
+typical one are the targets of the drill.
+
+Words of a test, by default `common_1000`, are looked up by bigram in an
+inverted index, built once per test and stored next to it in the registry.
+Words are scored by the share of their transitions that are targets,
+weighted by how slow those are, and drawn in proportion to their score.
+Targets no word of the test contains are practised by repeating the bigram
+itself.
+"""
+import os
+import sys
+import json
+import random
+
+from statistics import median
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from typetest.corpus import Registry
+from typetest.sampler import WeightedSampler
+
+base_directory = os.path.dirname(__file__)
+min_count = 3  # times a bigram must have been typed to be a target
+synthetic_repeats = 3  # bigrams of synthesized words
+
+filename = os.path.basename(sys.argv[0])
+doc = f"""example:
+  {filename} -o ~/typetest/tests/slow_bigrams
+  typetest -i ~/typetest/tests/slow_bigrams -s -d 60
+  {filename} --database results.db --show
+"""
+
+
+def bigram_latencies(char_speeds):
+    """Returns a dictionary mapping bigrams typed within a word to their
+    median latency in seconds and the number of times they were typed, read
+    from `char_speeds`, a csv file, an SQLite database or an archive.
+    """
+    import numpy as np
+
+    from typetest.analyse.loaders import digraphs
+
+    if not os.path.exists(char_speeds):
+        return {}
+    medians, counts = digraphs(char_speeds).matrix()
+    chars = medians.index
+    medians, counts = medians.to_numpy(), counts.to_numpy()
+    latencies = {}
+    for row, column in zip(*np.nonzero(counts)):
+        bigram = chars[row] + chars[column]
+        latency, count = medians[row, column], counts[row, column]
+        latencies[bigram] = float(latency), int(count)
+    return latencies
+
+
+def slow_bigrams(latencies, n=20):
+    """Returns up to `n` `(bigram, slowness)` of the bigrams of `latencies`,
+    as returned by `bigram_latencies`, slower than the typical one, slowest
+    first. Slowness is the median latency of a bigram relative to the median
+    of all of them.
+    """
+    medians = {
+        bigram: latency
+        for bigram, (latency, count) in latencies.items()
+        if count >= min_count
+    }
+    if not medians:
+        return []
+    typical = median(medians.values())
+    if typical <= 0:
+        return []
+    slow = sorted(medians.items(), key=lambda item: item[1], reverse=True)
+    return [(b, m / typical) for b, m in slow[:n] if m > typical]
+
+
+def word_bigrams(word):
+    """Returns the bigrams of the transitions typing `word`."""
+    return [a + b for a, b in zip(word, word[1:])]
+
+
+class BigramIndex:
+    """Inverted index of `words`, mapping every bigram to the indices of the
+    words containing it.
+    """
+
+    def __init__(self, words, postings=None):
+        self.words = words
+        if postings is None:
+            postings = {}
+            for index, word in enumerate(words):
+                for bigram in dict.fromkeys(word_bigrams(word)):
+                    postings.setdefault(bigram, []).append(index)
+        self.postings = postings
+
+    @classmethod
+    def load(cls, words, path):
+        with open(path) as f:
+            return cls(words, json.load(f))
+
+    def save(self, path):
+        """Replaces the index at `path` atomically."""
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.postings, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    def scores(self, targets):
+        """Returns a dictionary mapping indices of words containing any of
+        `targets`, a dictionary of bigrams to weights, to the weight of
+        their transitions that are targets per transition.
+        """
+        scores = {}
+        for bigram, weight in targets.items():
+            for index in self.postings.get(bigram, ()):
+                scores[index] = scores.get(index, 0) + weight
+        words = self.words
+        return {
+            index: score / (len(words[index]) - 1)
+            for index, score in scores.items()
+        }
+
+
+def load_index(test, registry=None):
+    """Returns the `BigramIndex` of the test named or hashed `test`, stored
+    next to it in the registry, or built and stored the first time.
+    """
+    registry = registry or Registry()
+    words, test_hash = registry.load(test)
+    words = list(dict.fromkeys(words))
+    path = os.path.join(registry.directory, f"{test_hash}.bigrams")
+    try:
+        return BigramIndex.load(words, path)
+    except (OSError, ValueError):
+        index = BigramIndex(words)
+        try:
+            index.save(path)
+        except OSError:  # the registry is read-only
+            pass
+        return index
+
+
+def drill(index, slow, count=100, seed=None):
+    """Returns `count` words of `index` dense in the `slow` bigrams, pairs
+    of a bigram and its slowness as returned by `slow_bigrams`.
+    """
+    targets = dict(slow)
+    scores = index.scores(targets)
+    candidates = [index.words[i] for i in scores]
+    weights = list(scores.values())
+
+    covered = set()
+    for word in candidates:
+        covered.update(word_bigrams(word))
+    for bigram, slowness in slow:
+        if bigram not in covered:  # no word to practise it with
+            candidates.append(bigram * synthetic_repeats)
+            weights.append(slowness)
+
+    if not candidates:
+        return []
+    sampler = WeightedSampler(weights, random.Random(seed))
+    return [candidates[sampler.draw()] for _ in range(count)]
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(
+    char_speeds, database, test, words, bigrams, seed, output, show, help
+):
+    """Prints or writes to `output` a drill of `words` words of `test`
+    targeting the `bigrams` slowest bigrams in the history.
+    """
+    latencies = bigram_latencies(database or char_speeds)
+    slow = slow_bigrams(latencies, bigrams)
+    if not slow:
+        exit("There are not enough typed bigrams in the history yet.")
+
+    if show:
+        for bigram, slowness in slow:
+            seconds, _ = latencies[bigram]
+            print(f"{bigram}  {seconds * 1000:6.0f}ms  {slowness:.2f}x")
+        return
+
+    try:
+        index = load_index(test)
+    except KeyError:
+        exit(f"There is no test named or hashed {test} in the registry.")
+
+    text = " ".join(drill(index, slow, words, seed))
+    if output is None:
+        print(text)
+    else:
+        with open(output, "w") as f:
+            f.write(text)
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    default = "(default: %(default)s)"
+    parser.add_argument(
+        "-c",
+        "--char-speeds",
+        type=str,
+        default=base_directory + "/results/char_speeds.csv",
+        help="file to read typed characters from\n" + default,
+    )
+    parser.add_argument(
+        "--database",
+        type=str,
+        default=None,
+        help="SQLite database to read typed characters from instead",
+    )
+    parser.add_argument(
+        "-t",
+        "--test",
+        type=str,
+        default="common_1000",
+        help="name or hash of the test to take words from " + default,
+    )
+    parser.add_argument(
+        "-n",
+        "--words",
+        type=int,
+        default=100,
+        help="number of words of the drill " + default,
+    )
+    parser.add_argument(
+        "-b",
+        "--bigrams",
+        type=int,
+        default=20,
+        help="number of slowest bigrams to target " + default,
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="seed of the random word choice",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=None,
+        help="file to write the drill to (default: standard output)",
+    )
+    parser.add_argument(
+        "--show",
+        action="store_true",
+        help="print the targeted bigrams and their latencies instead",
+    )
+
+    return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,170 @@
+"""Headless driver of typing tests.
+
+Feeds recorded or generated keystrokes to a `TypingSession`, so typing
+tests can be replayed, and the engine benchmarked, without a terminal.
+Recorded keystrokes are stored one per line as a json list of the monotonic
+time in nanoseconds the key was pressed at and the key.
+"""
+import os
+import sys
+import json
+import random
+
+from time import perf_counter
+from argparse import ArgumentParser, RawTextHelpFormatter, FileType
+
+from typetest.session import TypingSession, COMPLETE, second
+
+filename = os.path.basename(sys.argv[0])
+doc = f"""example:
+  {filename} replay keys.jsonl -i typetest/tests/common_300
+  {filename} bench -n 10000 --wpm 90 --mistakes 0.05
+"""
+
+
+def replay(words, keys, duration=float("inf")):
+    """Returns the finished session of a test of `words`, typed by `keys`
+    pairs of a key and the time in nanoseconds it was pressed at.
+    """
+    session = TypingSession(words, duration)
+    for key, time in keys:
+        if not session.active:
+            break
+        if session.feed(key, time) == COMPLETE:
+            # the terminal submits the last word right after it is typed
+            session.feed(" ", time + 1)
+    session.finish()
+    return session
+
+
+def synthetic_keys(words, wpm=60, mistake_rate=0, seed=None, start=second):
+    """Yields keys of typing `words` at roughly `wpm`, starting at time
+    `start`. A `mistake_rate` share of characters is first mistyped and then
+    deleted with a backspace.
+    """
+    generator = random.Random(seed)
+    interval = 12 * second / wpm  # a word is five characters and a space
+    time = start
+    for word in words:
+        for char in word + " ":
+            if char != " " and generator.random() < mistake_rate:
+                for key in (
+                    generator.choice("abcdefghijklmnopqrstuvwxyz"),
+                    "\x7f",
+                ):
+                    yield key, time
+                    time += int(generator.expovariate(1 / interval)) + 1
+            yield char, time
+            time += int(generator.expovariate(1 / interval)) + 1
+
+
+def read_keys(file):
+    """Yields recorded keys and their times from lines of `file`."""
+    for line in file:
+        if line.strip():
+            time, key = json.loads(line)
+            yield key, time
+
+
+def write_keys(file, keys):
+    """Writes `keys` pairs of a key and its time to `file`."""
+    for key, time in keys:
+        file.write(json.dumps([time, key]) + "\n")
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(command, keys, input, duration, sessions, wpm, mistakes, help):
+    """Replays recorded `keys` typing the words of `input`, or benchmarks
+    replaying `sessions` tests typed at `wpm` with `mistakes`.
+    """
+    words = input.read().split() if input else None
+    if command == "replay":
+        session = replay(words, read_keys(keys), duration)
+        print(f"accuracy: {session.accuracy}%")
+        print(f"speed:    {session.typing_speed_in_wpm}wpm")
+        print(f"duration: {session.actual_duration:.2f}s")
+        print(f"restarts: {session.restart_count}")
+        return
+
+    words = words or "the quick brown fox jumps over the lazy dog".split()
+    tests = [
+        list(synthetic_keys(words, wpm, mistakes, seed=seed))
+        for seed in range(sessions)
+    ]
+    start = perf_counter()
+    keystrokes = 0
+    for test in tests:
+        replay(words, test, duration)
+        keystrokes += len(test)
+    elapsed = perf_counter() - start
+    print(
+        f"replayed {sessions} sessions in {elapsed:.2f}s:"
+        + f" {sessions / elapsed:.0f} sessions/s,"
+        + f" {keystrokes / elapsed:.0f} keystrokes/s"
+    )
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    default = "(default: %(default)s)"
+    parser.add_argument(
+        "command",
+        choices=["replay", "bench"],
+        help="replay recorded keys, or time replaying generated ones",
+    )
+    parser.add_argument(
+        "keys",
+        type=FileType("r"),
+        nargs="?",
+        default=None,
+        help="file of recorded keys, one json [time_ns, key] per line",
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=FileType("r"),
+        default=None,
+        help="file with words of the test"
+        + "\n(default: a pangram when benchmarking)",
+    )
+    parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        default=float("inf"),
+        help="duration of the test in seconds\n" + default,
+    )
+    parser.add_argument(
+        "-n",
+        "--sessions",
+        type=int,
+        default=1000,
+        help="number of sessions to benchmark\n" + default,
+    )
+    parser.add_argument(
+        "--wpm",
+        type=float,
+        default=60,
+        help="typing speed of generated keys\n" + default,
+    )
+    parser.add_argument(
+        "--mistakes",
+        type=float,
+        default=0,
+        help="share of generated characters mistyped and deleted\n" + default,
+    )
+
+    args = parser.parse_args()
+    if args.command == "replay" and (args.keys is None or args.input is None):
+        parser.error("replay needs a file of keys and --input")
+    return dict(args._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,215 @@
+"""Crash-safe journal of typing test results.
+
+Appending rows to the csv files one by one is not safe when several
+processes write at once or one is killed midway: lines interleave or get
+cut off, and the whole file can no longer be parsed. With `typetest
+--journal`, the results of a test are instead appended to a journal in the
+output directory as a single checksummed record, under a lock. Reading
+skips records that were cut off or damaged.
+
+Compacting folds the journal into the csv files and empties it. It first
+drops cut-off last lines of the csv files, and records their sizes, so that
+a compaction that was interrupted is undone, instead of repeated, the next
+time. `typetest --journal` compacts after every test if no other process is
+using the journal; `typetest-journal compact` does so in any case.
+"""
+import os
+import sys
+import json
+import zlib
+import struct
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from typetest.locking import locked
+from typetest.results import columns, write_csv
+
+magic = b"TTJ\x01"  # never part of a json payload, control chars are escaped
+header = struct.Struct("<4sII")  # magic, payload length, crc32 of payload
+journal_name = "results.journal"
+block_size = 1 << 16
+
+filename = os.path.basename(sys.argv[0])
+doc = f"""example:
+  {filename} compact ~/typetest/results
+"""
+
+
+def append(directory, rows):
+    """Appends `rows` of a test, as returned by `typetest.results.test_rows`,
+    to the journal in `directory` as a single record.
+    """
+    payload = json.dumps(rows).encode("utf-8")
+    record = memoryview(
+        header.pack(magic, len(payload), zlib.crc32(payload)) + payload
+    )
+    path = os.path.join(directory, journal_name)
+    with locked(path + ".lock"):
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while record:
+                written = os.write(fd, record)
+                record = record[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def records(path):
+    """Yields rows of every intact test in the journal at `path`. Damaged
+    or cut-off records are skipped by searching for the next record.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return
+
+    offset = 0
+    while offset + header.size <= len(data):
+        mark, length, checksum = header.unpack_from(data, offset)
+        start = offset + header.size
+        end = start + length
+        payload = data[start:end]
+        if (
+            mark == magic
+            and end <= len(data)
+            and zlib.crc32(payload) == checksum
+        ):
+            yield json.loads(payload)
+            offset = end
+        else:
+            offset = data.find(magic, offset + 1)
+            if offset < 0:
+                return
+
+
+def compact(directory, blocking=True):
+    """Folds the journal in `directory` into its csv files. Returns the
+    number of tests folded, or `None` if `blocking` is not set and another
+    process is using the journal.
+    """
+    path = os.path.join(directory, journal_name)
+    with locked(path + ".lock", blocking) as acquired:
+        if not acquired:
+            return None
+
+        recover(directory)
+        tests = list(records(path))
+        if not tests:
+            return 0
+
+        sizes = {}
+        for table in columns:
+            csv_path = os.path.join(directory, f"{table}.csv")
+            sizes[table] = complete_size(csv_path)
+            if os.path.exists(csv_path):
+                os.truncate(csv_path, sizes[table])
+
+        marker = {"journal": os.stat(path).st_ino, "sizes": sizes}
+        write_durably(path + ".compacting", json.dumps(marker).encode())
+
+        write_csv(
+            directory,
+            {
+                table: [row for test in tests for row in test[table]]
+                for table in columns
+            },
+        )
+        for table in columns:
+            with open(os.path.join(directory, f"{table}.csv"), "ab") as f:
+                os.fsync(f.fileno())
+
+        write_durably(path, b"")  # a new, empty journal
+        os.remove(path + ".compacting")
+        return len(tests)
+
+
+def recover(directory):
+    """Undoes a compaction of the journal in `directory` that didn't finish,
+    by cutting its csv files back to their sizes before it.
+    """
+    path = os.path.join(directory, journal_name)
+    try:
+        with open(path + ".compacting") as f:
+            marker = json.load(f)
+    except FileNotFoundError:
+        return
+
+    # the journal is replaced by an empty one once its tests are folded
+    if os.path.exists(path) and os.stat(path).st_ino == marker["journal"]:
+        for table, size in marker["sizes"].items():
+            csv_path = os.path.join(directory, f"{table}.csv")
+            if os.path.exists(csv_path):
+                os.truncate(csv_path, size)
+    os.remove(path + ".compacting")
+
+
+def complete_size(path):
+    """Returns the size of the file at `path` without a cut-off last line."""
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+    with open(path, "rb") as f:
+        end = size
+        while end > 0:
+            start = max(end - block_size, 0)
+            f.seek(start)
+            block = f.read(end - start)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+def write_durably(path, data):
+    """Replaces the file at `path` with `data` atomically, and makes sure
+    both have reached the disk.
+    """
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(path) or ".", os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(command, directory, help):
+    """Folds the journal in `directory` into its csv files."""
+    if command == "compact":
+        print(f"compacted {compact(directory)} tests")
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    parser.add_argument(
+        "command",
+        choices=["compact"],
+        help="fold the journal into the csv files",
+    )
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="output directory of typetest with the journal",
+    )
+
+    return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,242 @@
+"""Binary log of every key event of typing tests.
+
+The results of a test keep only the characters appended to words and the
+spaces submitting them. With `typetest --keylog`, every key event of a test
+is also written to a log of its own in the `keylogs` directory of the output
+directory, including deletions, clears and restarts, so corrections can be
+analysed and the test replayed exactly.
+
+A log is a header, holding the duration and the hash of the test and the
+words of every attempt at it in the order they were shown in, followed by
+fixed-size records of the monotonic time of the event in nanoseconds, the
+code of the key, the index of the word being typed, the action of
+`typetest.session` it caused and flags. Logs are read lazily with `events`,
+or memory mapped into NumPy arrays with `arrays`.
+"""
+import os
+import sys
+import struct
+
+from datetime import datetime
+from collections import namedtuple
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+magic = b"TTK\x01"
+# magic, record size, duration, sizes of the hash and of the json of the
+# words shown, which follow the header
+header = struct.Struct("<4sIdII")
+# time, key code, word index, action, flags
+record = struct.Struct("<qIIBBxx")
+SEQUENCE = 1  # flag of keys the terminal reported as a key sequence
+block_size = 4096  # records read at once
+directory_name = "keylogs"
+
+Event = namedtuple("Event", ["time", "code", "word_index", "action", "flags"])
+
+filename = os.path.basename(sys.argv[0])
+doc = f"""example:
+  typetest --keylog -t common_300
+  {filename} show ~/typetest/results/keylogs/20211021-212100-ba5b9ac9.ttk
+  {filename} replay ~/typetest/results/keylogs/20211021-212100-ba5b9ac9.ttk
+"""
+
+
+class Sequence(str):
+    """Key replayed as a key sequence reported by the terminal."""
+
+    is_sequence = True
+
+
+def write(directory, events, attempts, duration, hash, time=None):
+    """Writes `events` and `attempts` of a test, as logged by
+    `TypingSession`, to a new log in `directory` named after `time` and
+    `hash`. Returns its path.
+    """
+    import json  # imported here, since the typing test imports this module
+
+    hash_data = hash.encode("utf-8")
+    words_data = json.dumps(attempts).encode("utf-8")
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time or datetime.now():%Y%m%d-%H%M%S}-{hash[:8]}"
+    suffix = 0
+    while True:
+        path = os.path.join(
+            directory, f"{name}-{suffix}.ttk" if suffix else f"{name}.ttk"
+        )
+        try:
+            with open(path, "xb") as f:  # tests may end in the same second
+                f.write(
+                    header.pack(
+                        magic,
+                        record.size,
+                        duration,
+                        len(hash_data),
+                        len(words_data),
+                    )
+                )
+                f.write(hash_data)
+                f.write(words_data)
+                f.write(events)
+            return path
+        except FileExistsError:
+            suffix += 1
+
+
+def read_header(f):
+    """Returns the duration, the hash and the words of every attempt of the
+    test logged in file `f`, reading up to its first record.
+    """
+    import json
+
+    data = f.read(header.size)
+    if len(data) < header.size:
+        raise ValueError(f"{f.name} is not a key log")
+    tag, size, duration, hash_size, words_size = header.unpack(data)
+    if tag != magic or size != record.size:
+        raise ValueError(f"{f.name} is not a key log")
+    hash, words = f.read(hash_size), f.read(words_size)
+    if len(hash) + len(words) < hash_size + words_size:
+        raise ValueError(f"{f.name} is cut off")
+    return duration, hash.decode("utf-8"), json.loads(words)
+
+
+def events(path):
+    """Yields every `Event` logged at `path`, reading a block of records at
+    a time. A record cut off at the end is left out.
+    """
+    with open(path, "rb") as f:
+        read_header(f)
+        while block := f.read(record.size * block_size):
+            end = len(block) - len(block) % record.size
+            for fields in record.iter_unpack(block[:end]):
+                yield Event(*fields)
+
+
+def arrays(path):
+    """Returns a read-only NumPy record array memory mapping the events
+    logged at `path`, with the fields of `Event`.
+    """
+    import numpy as np
+
+    dtype = np.dtype(
+        {
+            "names": list(Event._fields),
+            "formats": ["<i8", "<u4", "<u4", "u1", "u1"],
+            "offsets": [0, 8, 12, 16, 17],
+            "itemsize": record.size,
+        }
+    )
+    with open(path, "rb") as f:
+        read_header(f)
+        offset = f.tell()
+    count = (os.path.getsize(path) - offset) // record.size
+    if count <= 0:
+        return np.empty(0, dtype=dtype).view(np.recarray)
+    return np.memmap(
+        path, dtype=dtype, mode="r", offset=offset, shape=(count,)
+    ).view(np.recarray)
+
+
+def keys(path):
+    """Yields pairs of a key and the time it was pressed at, of the events
+    logged at `path`, to be fed to a `TypingSession`. The end of the test
+    duration is an empty key.
+    """
+    from typetest.session import actions, TIMEOUT
+
+    for event in events(path):
+        if actions[event.action] == TIMEOUT:
+            key = ""
+        elif event.flags & SEQUENCE:
+            key = Sequence(chr(event.code))
+        else:
+            key = chr(event.code)
+        yield key, event.time
+
+
+def replay(path):
+    """Returns the finished session of typing the words logged at `path`
+    with the events logged there, exactly as the test was typed.
+    """
+    from typetest.session import TypingSession, RESTART
+
+    with open(path, "rb") as f:
+        duration, _, attempts = read_header(f)
+    attempts = iter(attempts)
+    session = TypingSession(next(attempts, []), duration)
+    for key, time in keys(path):
+        if session.feed(key, time) == RESTART:
+            session.words = next(attempts)  # in the order shown this time
+    session.finish()
+    return session
+
+
+def corrections(path):
+    """Returns a dictionary mapping indices of words to the number of
+    characters deleted and the number of times the text was cleared while
+    typing them, of the test logged at `path`, restarts included.
+    """
+    import numpy as np
+
+    from typetest.session import action_codes, DELETE, CLEAR
+
+    log = arrays(path)
+    counts = {}
+    for action in DELETE, CLEAR:
+        indices = log.word_index[log.action == action_codes[action]]
+        words, occurrences = np.unique(indices, return_counts=True)
+        for word, count in zip(words.tolist(), occurrences.tolist()):
+            counts.setdefault(word, [0, 0])[action == CLEAR] += count
+    return {word: tuple(count) for word, count in sorted(counts.items())}
+
+
+def run():
+    """Parse command line arguments and run main"""
+    main(**parse_args())
+
+
+def main(command, log, help):
+    """Prints the events logged in `log`, or replays them typing the words
+    logged with them.
+    """
+    from typetest.session import actions
+
+    if command == "show":
+        start = None
+        for event in events(log):
+            start = start or event.time
+            if event.flags & SEQUENCE and event.code > 0xFF:
+                key = f"<{event.code}>"  # terminal key code
+            else:
+                key = repr(chr(event.code))
+            print(
+                f"{(event.time - start) / 1e9:10.3f}s"
+                + f"  {key:10}  word {event.word_index:<6}"
+                + f"  {actions[event.action]}"
+            )
+        return
+
+    session = replay(log)
+    print(f"accuracy: {session.accuracy}%")
+    print(f"speed:    {session.typing_speed_in_wpm}wpm")
+    print(f"duration: {session.actual_duration:.2f}s")
+    print(f"restarts: {session.restart_count}")
+    print(f"corrected words: {len(corrections(log))}")
+
+
+def parse_args():
+    """Parses `sys.argv` and returns a dictionary suitable for `main`."""
+    parser = ArgumentParser(epilog=doc, formatter_class=RawTextHelpFormatter)
+
+    parser.add_argument(
+        "command",
+        choices=["show", "replay"],
+        help="print the logged events, or replay them",
+    )
+    parser.add_argument("log", type=str, help="key log of a test")
+
+    return dict(parser.parse_args()._get_kwargs(), help=parser.print_help)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,82 @@
+"""Word wrapping of test words into terminal lines."""
+from bisect import bisect_right
+
+
+class Layout:
+    """Word wraps `words` to lines at most `width` characters wide.
+
+    Lines are stored as the index of the first word of every line, so finding
+    the line of a word is a binary search and a line is just a slice of
+    `words`. Words are wrapped lazily, only as far as drawing requires, and
+    every word is measured at most once for a given `width`. A new layout has
+    to be made when the terminal is resized or the words are reordered.
+
+    Wrapping begins with the word at index `start`, which starts a line.
+    """
+
+    def __init__(self, words, width, start=0):
+        self.words = words
+        self.width = width
+        self.line_starts = [start]
+        self.end = start  # index of the first word that is not yet wrapped
+        self.exhausted = False
+        self._line_length = 0
+
+    def _wrap_word(self):
+        """Places the next word in the last line, or starts a new line if the
+        word doesn't fit. Returns `False` if there are no words left.
+        """
+        try:
+            word = self.words[self.end]
+        except IndexError:
+            self.exhausted = True
+            return False
+
+        if self.end == self.line_starts[-1]:  # first word of the line
+            self._line_length = len(word)
+        elif self._line_length + 1 + len(word) > self.width:
+            self.line_starts.append(self.end)
+            self._line_length = len(word)
+        else:
+            self._line_length += 1 + len(word)
+
+        self.end += 1
+        return True
+
+    def line_of(self, word_index):
+        """Returns the index of the line containing `word_index`."""
+        while self.end <= word_index and self._wrap_word():
+            pass
+        return bisect_right(self.line_starts, word_index) - 1
+
+    def line(self, line_index):
+        """Returns `(start, stop)` word indices of the line at `line_index`,
+        or `None` if there is no such line.
+        """
+        while len(self.line_starts) <= line_index + 1 and self._wrap_word():
+            pass
+
+        if line_index + 1 < len(self.line_starts):
+            return (
+                self.line_starts[line_index],
+                self.line_starts[line_index + 1],
+            )
+        if (
+            line_index + 1 == len(self.line_starts)
+            and self.end > self.line_starts[-1]
+        ):
+            return self.line_starts[line_index], self.end
+        return None
+
+    def lines(self, word_index, count):
+        """Returns spans of at most `count` lines, the first one being the
+        line containing `word_index`.
+        """
+        spans = []
+        first = self.line_of(word_index)
+        for line_index in range(first, first + count):
+            span = self.line(line_index)
+            if span is None:
+                break
+            spans.append(span)
+        return spans
@@ -0,0 +1,33 @@
+"""Advisory file locks shared between typetest processes."""
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@contextmanager
+def locked(path, blocking=True):
+    """Holds an exclusive lock on the file at `path`, created if needed.
+
+    Yields `True` once the lock is held, or `False` if `blocking` is not set
+    and another process holds it. Locking is a no-op where `fcntl` is not
+    available.
+    """
+    with open(path, "a") as f:
+        if fcntl is None:
+            yield True
+            return
+
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(f, flags)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
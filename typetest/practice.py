@@ -0,0 +1,139 @@
+"""Endless practice tests drawing words the user is weak at more often.
+
+Every word of the vocabulary is weighted by its weakness, computed from the
+stats of past tests: the slower its median typing speed compared to the
+other words, the more often it was mistyped, and the fewer times it was
+typed, the heavier. With `typetest --practice`, the next word of the test is
+drawn in proportion to these weights, which also follow the test itself: a
+word typed correctly is drawn less often from then on, a mistyped word more
+often. Drawing and updating take constant time whatever the size of the
+vocabulary, see `typetest.sampler`.
+"""
+import os
+import random
+import hashlib
+
+from statistics import median
+from collections import deque
+
+from typetest.sampler import WeightedSampler
+
+unknown_speed = 1.5  # how slow a word never typed is taken to be
+mistype_factor = 4  # weight added by mistyping a word every time
+correct_factor = 0.5  # change of a weight after typing the word correctly
+wrong_factor = 2  # change of a weight after mistyping the word
+max_change = 8  # factor weights change by at most in a test
+
+
+def weakness(sketch, mistype_count, reference):
+    """Returns the weight of a word typed with the speeds of `sketch`, a
+    `typetest.word_stats.MedianSketch` or `None` if it was never typed
+    correctly, and mistyped `mistype_count` times. `reference` is the typical
+    median typing speed of all words.
+    """
+    count = sketch.count if sketch is not None else 0
+    speed = sketch.median() if sketch is not None else None
+    if speed and reference:
+        slowness = min(max(reference / speed, 0.25), 4)
+    else:
+        slowness = unknown_speed
+    mistype_rate = (mistype_count + 1) / (count + mistype_count + 2)
+    exposure = 1 + 1 / (1 + count)
+    return slowness ** 2 * (1 + mistype_factor * mistype_rate) * exposure
+
+
+def weights(vocabulary, stats=None):
+    """Returns weights of the words of `vocabulary` given their `stats`, a
+    `typetest.word_stats.WordStats` of past tests.
+    """
+    sketches = stats.sketches if stats is not None else {}
+    mistype_counts = stats.mistypes if stats is not None else {}
+    medians = [s.median() for s in sketches.values() if s.count]
+    reference = median(medians) if medians else None
+
+    return [
+        weakness(sketches.get(word), mistype_counts.get(word, 0), reference)
+        for word in vocabulary
+    ]
+
+
+class PracticeWords:
+    """Endless test words drawn from `vocabulary` in proportion to
+    `weights`, indexed from the beginning of the test like a
+    `typetest.words.WordStream`.
+
+    Words are drawn as the test reaches them, and only a window of them is
+    kept in memory, words before the index given to `discard` are dropped.
+    """
+
+    def __init__(self, vocabulary, weights, seed=None):
+        self.vocabulary = list(vocabulary)
+        self.initial_weights = list(weights)
+        self.sampler = WeightedSampler(weights, random.Random(seed))
+        self.indices = {word: i for i, word in enumerate(self.vocabulary)}
+        self.words = deque()
+        self.offset = 0  # index of the first word in the window
+
+    def __getitem__(self, index):
+        if index < self.offset:
+            raise IndexError(f"word {index} was discarded")
+
+        while index >= self.offset + len(self.words):
+            self.words.append(self.vocabulary[self.sampler.draw()])
+        return self.words[index - self.offset]
+
+    def discard(self, index):
+        """Drops all words before `index` from the window."""
+        while self.offset < index and self.words:
+            self.words.popleft()
+            self.offset += 1
+
+    def restart(self, shuffle=False):
+        """Makes the first word of the test the word at index 0 again. The
+        test restarts with the oldest word in the window, or with newly drawn
+        words if `shuffle` is set.
+        """
+        if shuffle:
+            self.words.clear()
+        self.offset = 0
+
+    def observe(self, word, correct):
+        """Draws `word` less often from now on if it was typed `correct`ly,
+        more often otherwise.
+        """
+        index = self.indices.get(word)
+        if index is None:
+            return
+        initial = self.initial_weights[index]
+        weight = self.sampler.weights[index]
+        weight *= correct_factor if correct else wrong_factor
+        weight = min(max(weight, initial / max_change), initial * max_change)
+        self.sampler.update(index, weight)
+
+    def hexdigest(self):
+        """Returns the sha1 hash of the vocabulary practised."""
+        text = "practice\n" + " ".join(self.vocabulary)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def load(vocabulary, output_directory, database=None, seed=None):
+    """Returns `PracticeWords` of the unique words of `vocabulary`, weighted
+    by the stats of the tests stored in `output_directory`, or in `database`
+    if it is given.
+    """
+    from typetest.word_stats import build, load_or_build
+
+    vocabulary = list(dict.fromkeys(vocabulary))
+    word_speeds = database or os.path.join(output_directory, "word_speeds.csv")
+    mistyped_words = database or os.path.join(
+        output_directory, "mistyped_words.csv"
+    )
+    if os.path.isdir(output_directory):
+        stats = load_or_build(
+            os.path.join(output_directory, "word_stats.json"),
+            word_speeds,
+            mistyped_words,
+        )
+    else:  # no tests were saved there, there may be some in `database`
+        stats = build(word_speeds, mistyped_words)
+    return PracticeWords(vocabulary, weights(vocabulary, stats), seed)
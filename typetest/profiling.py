@@ -0,0 +1,160 @@
+"""Latency profiling of the typing test.
+
+A `Profile` records how long the stages of drawing a frame take by replacing
+the functions doing them with timed wrappers. Nothing is wrapped unless the
+typing test is run with `--profile`, so it costs nothing otherwise.
+"""
+import csv
+import math
+
+from array import array
+from time import perf_counter_ns
+
+from typetest.layout import Layout
+
+percentiles = [50, 95, 99]
+stages = {
+    "keystroke": "key read until its frame is drawn",
+    "draw": "drawing a frame",
+    "wrap": "word wrapping",
+    "render": "diffing and building escape sequences, and writing",
+    "write": "writing to the terminal",
+}
+missing = object()
+
+
+class Profile:
+    """Durations in nanoseconds of stages of drawing frames."""
+
+    def __init__(self):
+        self.samples = {stage: array("q") for stage in stages}
+        self.key_time = None  # when the key not yet drawn was read
+        self.renderer = None
+        self._patched = []
+
+    def patch(self, owner, name, stage):
+        """Replaces function `name` of `owner` with one adding the duration
+        of every call to `stage`.
+        """
+        function = getattr(owner, name)
+        samples = self.samples[stage]
+
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            result = function(*args, **kwargs)
+            samples.append(perf_counter_ns() - start)
+            return result
+
+        self._replace(owner, name, timed)
+
+    def instrument(self, module, terminal, renderer):
+        """Times the stages of drawing frames of the typing test, drawn by
+        `draw` of `module` with `renderer` on `terminal`.
+        """
+        self.renderer = renderer
+        self.patch(module, "draw", "draw")
+        self.patch(Layout, "lines", "wrap")
+        self.patch(renderer, "render", "render")
+        self.patch(renderer, "_write", "write")
+
+        inkey = terminal.inkey
+        render = renderer.render
+        latencies = self.samples["keystroke"]
+
+        def timed_inkey(*args, **kwargs):
+            key = inkey(*args, **kwargs)
+            if key and self.key_time is None:
+                self.key_time = perf_counter_ns()
+            return key
+
+        def timed_render(*args, **kwargs):
+            result = render(*args, **kwargs)
+            if self.key_time is not None:
+                latencies.append(perf_counter_ns() - self.key_time)
+                self.key_time = None
+            return result
+
+        self._replace(terminal, "inkey", timed_inkey)
+        self._replace(renderer, "render", timed_render)
+
+    def restore(self):
+        """Puts back the functions replaced by timed ones."""
+        for owner, name, original in reversed(self._patched):
+            if original is missing:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patched = []
+
+    def _replace(self, owner, name, function):
+        self._patched.append((owner, name, vars(owner).get(name, missing)))
+        setattr(owner, name, function)
+
+    def report(self, width=40):
+        """Returns percentiles of the durations of every stage in
+        milliseconds, what the renderer wrote and a histogram of keystroke
+        latencies.
+        """
+        header = "".join(f"{f'p{p}':>9}" for p in percentiles)
+        lines = [f"{'stage':<12}{'count':>8}{header}{'max':>9}  [ms]"]
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            values = [percentile(ordered, p) for p in percentiles]
+            values.append(ordered[-1])
+            lines.append(
+                f"{stage:<12}{len(ordered):>8}"
+                + "".join(f"{value / 1e6:9.3f}" for value in values)
+                + f"  {stages[stage]}"
+            )
+
+        renderer = self.renderer
+        if renderer is not None and renderer.frames:
+            lines.append("")
+            lines.append(
+                f"{renderer.frames} frames, {renderer.writes} writes,"
+                + f" {renderer.bytes_written} bytes written"
+                + f" ({renderer.bytes_written / renderer.frames:.0f}"
+                + " bytes per frame)"
+            )
+
+        latencies = self.samples["keystroke"]
+        if latencies:
+            lines.append("")
+            lines.append("keystroke latency")
+            counts = histogram(latencies)
+            most = max(counts.values())
+            for upper, count in counts.items():
+                bar = "█" * math.ceil(width * count / most) if count else ""
+                lines.append(f"  <{upper / 1e6:8.3f}ms {count:>6} {bar}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Writes every sample to a csv file at `path`, as rows of a stage
+        and a duration in nanoseconds.
+        """
+        with open(path, "w") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            for stage, samples in self.samples.items():
+                writer.writerows((stage, sample) for sample in samples)
+
+
+def percentile(ordered, p):
+    """Returns the nearest-rank `p`th percentile of `ordered` values."""
+    rank = math.ceil(p / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def histogram(samples):
+    """Returns counts of `samples` in buckets twice as wide as the one
+    before, by the upper bound of every bucket.
+    """
+    upper = 2 << max(min(samples), 1).bit_length() - 1
+    counts = {upper: 0}
+    for sample in sorted(samples):
+        while sample >= upper:
+            upper <<= 1
+            counts[upper] = 0
+        counts[upper] += 1
+    return counts
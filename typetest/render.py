@@ -0,0 +1,122 @@
+"""Rendering of frames to the terminal."""
+
+
+def cells(text, style=""):
+    """Returns a list of `(style, char)` cells for every character of
+    `text`.
+    """
+    return [(style, char) for char in text]
+
+
+class Renderer:
+    """Draws frames on `terminal` by updating only what has changed since the
+    previous frame.
+
+    A frame is a list of rows and every row is a list of `(style, char)`
+    cells, where `style` is the escape sequence the character is printed
+    with. Rows are compared cell by cell to the previous frame and only the
+    span between the first and the last changed cell is printed, at the
+    column of the display width of the cells before it. Everything that has
+    changed is flushed to the terminal in a single write.
+    """
+
+    def __init__(self, terminal):
+        self.terminal = terminal
+        self.previous = []
+        self.frames = 0
+        self.writes = 0
+        self.bytes_written = 0
+
+    def invalidate(self):
+        """Forgets the previous frame so that the next one is fully redrawn,
+        e.g. after the terminal was resized.
+        """
+        self.previous = None
+
+    def render(self, frame):
+        """Prints `frame` and clears rows left over from the previous one."""
+        terminal = self.terminal
+        previous = self.previous
+        parts = []
+        if previous is None:
+            parts.append(terminal.clear)
+            previous = []
+
+        for y, row in enumerate(frame):
+            old = previous[y] if y < len(previous) else None
+            if row != old:
+                self._render_row(parts, y, row, old)
+
+        for y in range(len(frame), len(previous)):
+            if previous[y]:
+                parts.append(terminal.move_yx(y, 0) + terminal.clear_eol)
+
+        self.previous = [list(row) for row in frame]
+        self.frames += 1
+        self._write("".join(parts))
+
+    def render_row(self, y, row):
+        """Prints only the row at index `y` of the previous frame, replacing
+        it with `row`.
+        """
+        previous = self.previous or []
+        old = previous[y] if y < len(previous) else None
+        if row == old:
+            return
+
+        parts = []
+        self._render_row(parts, y, row, old)
+        if y < len(previous):
+            previous[y] = list(row)
+        self._write("".join(parts))
+
+    def _render_row(self, parts, y, row, old):
+        """Appends escape sequences updating row `y` from `old` to `row`."""
+        terminal = self.terminal
+        if old is None:  # nothing is known about what is on the screen
+            first, last = 0, len(row)
+            clear = self._column(row, last) < terminal.width
+        else:
+            first = 0
+            shortest = min(len(row), len(old))
+            while first < shortest and row[first] == old[first]:
+                first += 1
+
+            last = len(row)
+            if len(row) == len(old):
+                while last > first and row[last - 1] == old[last - 1]:
+                    last -= 1
+            clear = len(row) < len(old)
+
+        parts.append(terminal.move_yx(y, self._column(row, first)))
+        style = ""
+        for cell_style, char in row[first:last]:
+            if cell_style != style:
+                # styles only add attributes, so they are reset in between
+                parts.append(
+                    terminal.normal + cell_style if style else cell_style
+                )
+                style = cell_style
+            parts.append(char)
+        if style:
+            parts.append(terminal.normal)
+        if clear:
+            parts.append(terminal.clear_eol)
+
+    def _column(self, row, index):
+        """Returns the screen column of cell `index` of `row`, where wide
+        characters before it take up two columns.
+        """
+        text = "".join(char for _, char in row[:index])
+        return index if text.isascii() else self.terminal.length(text)
+
+    def _write(self, output):
+        """Writes `output` to the terminal stream and flushes it."""
+        if not output:
+            return
+
+        stream = self.terminal.stream
+        stream.write(output)
+        stream.flush()
+        self.writes += 1
+        self.bytes_written += len(output.encode("utf-8"))
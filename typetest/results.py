@@ -0,0 +1,93 @@
+"""Rows of typing test results and the files they are stored in.
+
+Results of a test are stored in four tables, each appended to its own csv
+file in the output directory: `results` (one row per test), `char_speeds`,
+`word_speeds` and `mistyped_words`.
+"""
+import csv
+
+columns = {
+    "results": [
+        "timestamp",
+        "wpm",
+        "accuracy",
+        "actual_duration",
+        "duration",
+        "hash",
+    ],
+    "mistyped_words": ["word", "mistype", "timestamp"],
+    "char_speeds": ["char", "duration", "wpm", "timestamp"],
+    "word_speeds": ["word", "duration", "wpm", "timestamp"],
+}
+
+
+def test_rows(
+    timestamp,
+    typing_speed_in_wpm,
+    accuracy,
+    actual_duration,
+    duration,
+    hash,
+    chars,
+    char_durations,
+    submitted_words,
+):
+    """Returns a dictionary mapping table names to rows of a test.
+
+    `chars` are the typed characters, both those appended to words and the
+    spaces submitting them, and `char_durations` the time in seconds until
+    the next character was typed. `submitted_words` are the test words the
+    user has typed something for.
+    """
+    rows = {table: [] for table in columns}
+    rows["results"].append(
+        [
+            timestamp,
+            typing_speed_in_wpm,
+            accuracy,
+            actual_duration,
+            duration,
+            hash,
+        ]
+    )
+
+    word = ""
+    word_index = 0
+    word_duration = 0
+    for char, char_duration in zip(chars, char_durations):
+        rows["char_speeds"].append(
+            [char, char_duration, 12 / char_duration, timestamp]
+        )
+
+        if char.isspace():
+            if word == submitted_words[word_index]:
+                rows["word_speeds"].append(
+                    [
+                        word,
+                        word_duration,
+                        len(word) * 12 / word_duration,
+                        timestamp,
+                    ]
+                )
+            else:
+                rows["mistyped_words"].append(
+                    [submitted_words[word_index], word, timestamp]
+                )
+
+            word_index += 1
+            word = ""
+            word_duration = 0
+        else:
+            word += char
+            word_duration += char_duration
+
+    return rows
+
+
+def write_csv(output_directory, rows):
+    """Appends `rows` of every table to its csv file in
+    `output_directory`.
+    """
+    for table, table_rows in rows.items():
+        with open(f"{output_directory}/{table}.csv", "a") as f:
+            csv.writer(f, lineterminator="\n").writerows(table_rows)
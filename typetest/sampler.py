@@ -0,0 +1,84 @@
+"""Weighted random sampling with weights that change between draws.
+
+Indices are grouped into levels by the power of two just above their
+weight, so that every weight of a level is more than half of the level's
+bound. A draw picks a level in proportion to its number of indices times its
+bound, an index of it uniformly, and accepts it with the probability of its
+weight relative to the bound, trying again otherwise. Each try is accepted
+with a probability over one half, and there are only as many levels as
+powers of two the weights span, so drawing takes constant time on average
+regardless of the number of indices. Changing a weight moves its index
+between two levels in constant time, nothing is ever rebuilt.
+"""
+import math
+import random
+
+
+class WeightedSampler:
+    """Draws indices of `weights` with probabilities proportional to them.
+    Weights are changed with `update`, indices of zero weights are never
+    drawn.
+    """
+
+    def __init__(self, weights, generator=None):
+        self.random = generator or random.Random()
+        self.weights = []
+        self.slots = []  # position of every index among its level's indices
+        self.levels = {}  # indices by the exponent of their bound
+        for index, weight in enumerate(weights):
+            self.weights.append(0.0)
+            self.slots.append(None)
+            self.update(index, weight)
+
+    def __len__(self):
+        return len(self.weights)
+
+    def update(self, index, weight):
+        """Sets the weight of `index` to `weight`."""
+        weight = float(weight)
+        if not 0 <= weight < math.inf:
+            raise ValueError(f"invalid weight {weight}")
+
+        old = self.weights[index]
+        if old > 0:
+            level = self.levels[math.frexp(old)[1]]
+            last = level.pop()
+            if last != index:
+                slot = self.slots[index]
+                level[slot] = last
+                self.slots[last] = slot
+            if not level:
+                del self.levels[math.frexp(old)[1]]
+            self.slots[index] = None
+
+        self.weights[index] = weight
+        if weight > 0:
+            level = self.levels.setdefault(math.frexp(weight)[1], [])
+            self.slots[index] = len(level)
+            level.append(index)
+
+    def draw(self):
+        """Returns a random index. Raises `IndexError` if all weights are
+        zero.
+        """
+        if not self.levels:
+            raise IndexError("there are no positive weights to draw from")
+
+        uniform = self.random.random
+        capacities = [
+            (exponent, math.ldexp(len(level), exponent))
+            for exponent, level in self.levels.items()
+        ]
+        total = sum(capacity for _, capacity in capacities)
+        while True:
+            target = uniform() * total
+            for exponent, capacity in capacities:
+                target -= capacity
+                if target < 0:
+                    break
+            # after rounding errors, the last level is taken
+
+            level = self.levels[exponent]
+            index = level[int(uniform() * len(level))]
+            if uniform() * math.ldexp(1, exponent) < self.weights[index]:
+                return index
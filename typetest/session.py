@@ -0,0 +1,254 @@
+"""State of a typing test, independent of the terminal.
+
+A `TypingSession` is advanced by key events, each with the monotonic time in
+nanoseconds it happened at, and keeps track of the typed text, the words
+typed correctly and the resulting typing speed and accuracy. Anything can
+feed it events, `typetest.__main__` does so from the terminal and
+`typetest.driver` from recorded or generated keystrokes.
+
+Every key event, including deletions, clears and restarts, is also logged in
+`events` as records of `typetest.keylog`, across restarts of the test, and
+the words of every attempt in `attempts`, in the order they were shown in.
+"""
+import random
+
+from array import array
+
+from typetest.keylog import record, SEQUENCE
+from typetest.results import test_rows
+from typetest.words import has_word
+
+second = 10 ** 9  # nanoseconds
+
+# what a key event has done, returned by `TypingSession.feed`
+TICK = "tick"  # no key was pressed, only time has passed
+TIMEOUT = "timeout"  # the duration of the test is over
+STOP = "stop"
+DELETE = "delete"
+RESTART = "restart"
+CLEAR = "clear"
+SUBMIT = "submit"
+TYPE = "type"
+COMPLETE = "complete"  # the last word was typed, a space submits it
+IGNORE = "ignore"
+# actions numbered as they are logged
+actions = [
+    TICK,
+    TIMEOUT,
+    STOP,
+    DELETE,
+    RESTART,
+    CLEAR,
+    SUBMIT,
+    TYPE,
+    COMPLETE,
+    IGNORE,
+]
+action_codes = {action: code for code, action in enumerate(actions)}
+
+
+class TypingSession:
+    """Typing test of `words`, ending after `duration` seconds or once all
+    of them have been typed.
+    """
+
+    def __init__(self, words, duration=float("inf")):
+        self.words = words
+        self.duration = duration
+        self.restart_count = 0
+        self.finished = False
+        self.events = bytearray()  # logged key events of all attempts
+        # words of every attempt, as far as they were typed and one more
+        self.attempts = []
+        self.reset()
+        self.begin_attempt()
+
+    def reset(self):
+        """Starts the test over."""
+        self.correct_chars = self.total_chars = -1
+        self.typing_speed_in_wpm = 0
+        self.typing_duration = self.actual_duration = self.start = 0
+        self.word_index = 0
+        self.user_text = ""
+        self.marks = {}  # whether submitted words were typed correctly
+        self.submitted_words = []  # test words typed something for
+        # codepoints of typed characters and their monotonic timestamps
+        self.char_codes = array("I")
+        self.char_times = array("q")
+
+    def begin_attempt(self):
+        """Starts recording the words of a new attempt at the test."""
+        self.attempts.append([])
+        self.record_words()
+
+    def record_words(self):
+        """Records the words of the attempt up to the one after the word
+        being typed, which decides whether a space submits the last word.
+        """
+        shown = self.attempts[-1]
+        end = self.word_index + 1
+        while len(shown) <= end and has_word(self.words, len(shown)):
+            shown.append(self.words[len(shown)])
+
+    @property
+    def word(self):
+        """The word being typed."""
+        return self.words[self.word_index]
+
+    @property
+    def active(self):
+        """`True` until the test has ended."""
+        return not self.finished and has_word(self.words, self.word_index)
+
+    def feed(self, key, time):
+        """Advances the test by `key` pressed at `time`, or just by time
+        passing if `key` is empty. Returns what happened, one of `TICK`,
+        `TIMEOUT`, `STOP`, `DELETE`, `RESTART`, `CLEAR`, `SUBMIT`, `TYPE`,
+        `COMPLETE` and `IGNORE`.
+        """
+        word_index = self.word_index
+        action = self._advance(key, time)
+        if action != TICK:
+            self.log(key, time, word_index, action)
+        return action
+
+    def log(self, key, time, word_index, action):
+        """Appends a record of `key` to `events`. Keys of more than one
+        character are logged by their terminal key code.
+        """
+        flags = SEQUENCE if getattr(key, "is_sequence", False) else 0
+        if len(key) == 1:
+            code = ord(key)
+        else:
+            code = getattr(key, "code", None) or 0
+        self.events += record.pack(
+            time, code, word_index, action_codes[action], flags
+        )
+
+    def _advance(self, key, time):
+        start = self.start
+        if start and time - start >= self.duration * second:
+            self.typing_duration = self.duration
+            self.finished = True
+            return TIMEOUT
+
+        self.typing_duration = (time - start) / second if start else 0
+        if not key:
+            return TICK
+
+        if not start:
+            self.start = time
+
+        if key == "\x03" or key == "\x1b":  # ctrl-c or ctrl-[ or esc
+            self.finished = True
+            return STOP
+
+        if key == "\x08" or key == "\x7f":  # ctrl-h or bksp
+            self.user_text = self.user_text[:-1]
+            return DELETE
+
+        if key in ("\x12", "\x13", "\t"):  # ctrl-r or ctrl-s or tab
+            self.restart(shuffle=key == "\x13")
+            return RESTART
+
+        if key == "\x15" or key == "\x17":  # ctrl-u or ctrl-w
+            self.user_text = ""
+            return CLEAR
+
+        if key.isspace():
+            if not self.user_text:
+                return IGNORE
+            self.submit(key, time)
+            return SUBMIT
+
+        if getattr(key, "is_sequence", False):  # arrows, function keys
+            return IGNORE
+
+        self.total_chars += 1
+        self.user_text += key
+        self.char_codes.append(ord(key))
+        self.char_times.append(time)
+        if self.word == self.user_text and not has_word(
+            self.words, self.word_index + 1
+        ):
+            return COMPLETE
+        return TYPE
+
+    def submit(self, key, time):
+        """Submits the typed text as the current word with `key` pressed at
+        `time`.
+        """
+        word = self.word
+        if has_word(self.words, self.word_index + 1):  # if not last space
+            # count the space character as correct
+            self.total_chars += 1
+            self.correct_chars += 1
+
+        if self.user_text == word:
+            self.correct_chars += len(word)
+        self.marks[self.word_index] = self.user_text == word
+
+        self.actual_duration = self.typing_duration
+        self.typing_speed_in_wpm = min(
+            int(self.correct_chars * 12 / self.actual_duration), 999
+        )
+
+        self.user_text = ""
+        self.word_index += 1
+        self.submitted_words.append(word)
+        self.char_codes.append(ord(key))
+        self.char_times.append(time)
+        self.record_words()
+
+    def restart(self, shuffle=False):
+        """Starts the test over, with words reshuffled if `shuffle` is set."""
+        self.restart_count += 1
+        self.reset()
+        if isinstance(self.words, list):
+            if shuffle:
+                random.shuffle(self.words)
+        else:  # a `WordStream` or `PracticeWords`
+            self.words.restart(shuffle=shuffle)
+        self.begin_attempt()
+
+    def forget(self, index):
+        """Forgets marks of words before `index`, and the words themselves
+        if they are streamed or drawn.
+        """
+        if not isinstance(self.words, list):
+            self.words.discard(index)
+        self.marks = {i: m for i, m in self.marks.items() if i >= index}
+
+    def finish(self):
+        """Ends the test, leaving out the text typed for the last word if it
+        wasn't submitted. Returns `True` if the test has results.
+        """
+        self.finished = True
+        self.total_chars -= len(self.user_text)
+        self.user_text = ""
+        return self.actual_duration > 0 and self.total_chars > 0
+
+    @property
+    def accuracy(self):
+        return 100 * self.correct_chars // self.total_chars
+
+    def rows(self, timestamp, hash):
+        """Returns rows of the results of the finished test, as returned by
+        `typetest.results.test_rows`.
+        """
+        chars = [chr(code) for code in self.char_codes]
+        times = self.char_times
+        char_durations = [
+            (end - start) / second for start, end in zip(times, times[1:])
+        ]
+        return test_rows(
+            timestamp,
+            self.typing_speed_in_wpm,
+            self.accuracy,
+            self.actual_duration,
+            self.duration,
+            hash,
+            chars,
+            char_durations,
+            self.submitted_words,
+        )
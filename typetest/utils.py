@@ -1,10 +1,17 @@
 """Various utility functions."""
+import numpy as np
 import pandas as pd
 
 from functools import wraps
 from random import sample
 from collections import Counter
-from os.path import dirname, isfile
+from os.path import dirname, exists
+
+from typetest.analyse.loaders import read
+
+# pairs of words of the same lengths below this count are faster to
+# calculate one by one
+min_batch_size = 16
 
 
 def damerau_levenshtein_distance(word_1: str, word_2: str) -> int:
@@ -19,11 +26,13 @@ def damerau_levenshtein_distance(word_1: str, word_2: str) -> int:
     for i in range(1, len(word_2) + 2):
         table[i][1] = i - 1
 
+    # row and column 0 of the table are infinite, they are used as the
+    # last row and column of a match until one is encountered
     last_encountered_cols = {}
     for col, char_1 in enumerate(word_1, 2):
-        last_row = 0
+        last_row = 1
         for row, char_2 in enumerate(word_2, 2):
-            last_encountered_col = last_encountered_cols.get(char_2, 0)
+            last_encountered_col = last_encountered_cols.get(char_2, 1)
 
             addition = table[row - 1][col] + 1
             deletion = table[row][col - 1] + 1
@@ -49,23 +58,141 @@ def damerau_levenshtein_distance(word_1: str, word_2: str) -> int:
     return table[len(word_2) + 1][len(word_1) + 1]
 
 
+def damerau_levenshtein_distances(words_1, words_2, max_distance=None):
+    """Calculates distances between pairs of words of two sequences at once,
+    returning them as an array.
+
+    Every distinct pair is calculated once. Pairs of words of the same
+    lengths are calculated together, filling their tables with NumPy a
+    column at a time. Distances greater than `max_distance` are returned as
+    `max_distance + 1`, and pairs certain to be that far apart are skipped.
+    """
+    pairs = list(zip(words_1, words_2))
+    distances = dict.fromkeys(pairs)
+
+    buckets = {}
+    for pair in distances:
+        lengths = len(pair[0]), len(pair[1])
+        if max_distance is not None and (
+            abs(lengths[0] - lengths[1]) > max_distance
+        ):
+            distances[pair] = max_distance + 1
+        else:
+            buckets.setdefault(lengths, []).append(pair)
+
+    for (length_1, length_2), bucket in buckets.items():
+        if len(bucket) < min_batch_size:
+            bucket_distances = [
+                damerau_levenshtein_distance(*pair) for pair in bucket
+            ]
+            if max_distance is not None:
+                bucket_distances = [
+                    min(d, max_distance + 1) for d in bucket_distances
+                ]
+        else:
+            bucket_distances = _batch_distances(
+                bucket, length_1, length_2, max_distance
+            ).tolist()
+        distances.update(zip(bucket, bucket_distances))
+
+    return np.array([distances[pair] for pair in pairs], dtype=int)
+
+
+def _batch_distances(pairs, length_1, length_2, max_distance):
+    """Calculates distances of `pairs` of words of lengths `length_1` and
+    `length_2`, following `damerau_levenshtein_distance` for all of them.
+    """
+    size = len(pairs)
+    # characters are numbered consecutively to index `last_encountered_cols`
+    chars = np.frombuffer(
+        "".join(word_1 + word_2 for word_1, word_2 in pairs).encode(
+            "utf-32-le"
+        ),
+        dtype="<u4",
+    ).reshape(size, length_1 + length_2)
+    alphabet, codes = np.unique(chars, return_inverse=True)
+    codes = codes.reshape(size, length_1 + length_2)
+    codes_1, codes_2 = codes[:, :length_1], codes[:, length_1:]
+
+    inf = length_1 + length_2
+    table = np.full((size, length_2 + 2, length_1 + 2), inf, dtype=np.intp)
+    table[:, 1, 1:] = np.arange(length_1 + 1)
+    table[:, 1:, 1] = np.arange(length_2 + 1)
+
+    pair_indices = np.arange(size)
+    last_encountered_cols = np.ones((size, len(alphabet)), dtype=np.intp)
+    for col in range(2, length_1 + 2):
+        chars_1 = codes_1[:, col - 2]
+        last_rows = np.ones(size, dtype=np.intp)
+        for row in range(2, length_2 + 2):
+            chars_2 = codes_2[:, row - 2]
+            last_encountered_col = last_encountered_cols[pair_indices, chars_2]
+            equal = chars_1 == chars_2
+
+            distances = np.minimum(
+                table[:, row - 1, col], table[:, row, col - 1]
+            )
+            distances += 1  # addition or deletion
+            np.minimum(
+                distances, table[:, row - 1, col - 1] + ~equal, out=distances
+            )
+            transposition = (
+                table[pair_indices, last_rows - 1, last_encountered_col - 1]
+                + (col - last_encountered_col - 1)
+                + (row - last_rows - 1)
+                + 1
+            )
+            np.minimum(distances, transposition, out=distances)
+            table[:, row, col] = distances
+
+            last_rows[equal] = row
+        last_encountered_cols[pair_indices, chars_1] = col
+
+        # column minimums never decrease, the distances can only get larger
+        if (
+            max_distance is not None
+            and (table[:, 1:, col].min(axis=1) > max_distance).all()
+        ):
+            return np.full(size, max_distance + 1)
+
+    distances = table[:, length_2 + 1, length_1 + 1]
+    if max_distance is not None:
+        distances = np.minimum(distances, max_distance + 1)
+    return distances
+
+
+def select(keys, filter_func):
+    """Returns a boolean array telling which of the `keys` to keep.
+
+    `filter_func` is either a regular expression the keys have to match, or
+    a function returning `True` for keys to keep, called once per key.
+    """
+    keys = pd.Index(keys)
+    if isinstance(filter_func, str):
+        return np.asarray(keys.astype(str).str.match(filter_func), dtype=bool)
+    return np.fromiter(
+        (bool(filter_func(key)) for key in keys), dtype=bool, count=len(keys)
+    )
+
+
 def validate_input_file_path(func):
     """Wrapper function that checks if the first argument of the
-    decorated function is a filename of a file that exists.
+    decorated function is a filename of a file (or an archive directory) that
+    exists.
     """
 
     @wraps(func)
     def wrapper(*args, **kwargs):
         file_to_open = args[0]
 
-        if not isfile(file_to_open):
+        if not exists(file_to_open):
             exit(
                 f"The file {file_to_open} does not exist. Please run"
                 + "`typetest` to generate more test results, or provide"
                 + "a custom path to results file/directory"
             )
 
-        func(*args, **kwargs)
+        return func(*args, **kwargs)
 
     return wrapper
 
@@ -74,11 +201,7 @@ def validate_input_file_path(func):
 def create_least_typed_words_and_worst_words_test_files(
     input_file, least_typed_words_output_file, worst_words_output_file
 ):
-    data_frame = pd.read_csv(
-        input_file,
-        header=None,
-        names=["word", "duration", "wpm", "timestamp"],
-    )
+    data_frame = read("word_speeds", input_file)
 
     counter = Counter(sample(list(data_frame["word"]), k=len(data_frame)))
     with open(least_typed_words_output_file, "w") as f:
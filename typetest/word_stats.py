@@ -0,0 +1,248 @@
+"""Per-word statistics updated incrementally after every test.
+
+For every word the store keeps the number of times it was typed correctly
+and a P² sketch of the median typing speed (Jain and Chlamtac, 1985), which
+takes constant space and constant time per added speed, and the number of
+times it was mistyped. Updating the store after a test therefore costs time
+proportional to the words of the test, not to the size of the results
+history.
+"""
+import os
+import csv
+import json
+import random
+import sqlite3
+
+from statistics import median
+
+from typetest.locking import locked
+
+# desired marker positions of the median sketch, relative to the count
+increments = [0, 0.25, 0.5, 0.75, 1]
+
+
+class MedianSketch:
+    """Streaming estimate of the median of added values.
+
+    The first five values are kept as they are. From then on five markers
+    hold the minimum, the quartiles, the median and the maximum, adjusted
+    with piecewise parabolic interpolation as values are added.
+    """
+
+    __slots__ = ("count", "heights", "positions")
+
+    def __init__(self, count=0, heights=None, positions=None):
+        self.count = count
+        self.heights = heights or []
+        self.positions = positions
+
+    def add(self, value):
+        self.count += 1
+        heights, positions = self.heights, self.positions
+
+        if positions is None:  # still collecting the first values
+            heights.append(value)
+            heights.sort()
+            if self.count == 5:
+                self.positions = [1, 2, 3, 4, 5]
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            positions[i] += 1
+
+        for i in range(1, 4):
+            desired = 1 + (self.count - 1) * increments[i]
+            d = desired - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (
+                d <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + d * (heights[i + d] - heights[i]) / (
+                        positions[i + d] - positions[i]
+                    )
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def median(self):
+        if self.positions is None:
+            return median(self.heights) if self.heights else None
+        return self.heights[2]
+
+    def to_list(self):
+        return [self.count, self.heights, self.positions]
+
+
+class WordStats:
+    """Typing counts, median speeds and mistype counts of words."""
+
+    def __init__(self, sketches=None, mistypes=None):
+        self.sketches = sketches or {}
+        self.mistypes = mistypes or {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(
+            {word: MedianSketch(*s) for word, s in data["speeds"].items()},
+            data["mistypes"],
+        )
+
+    def save(self, path):
+        """Replaces the store at `path` atomically."""
+        speeds = {w: s.to_list() for w, s in self.sketches.items()}
+        with open(path + ".tmp", "w") as f:
+            json.dump({"speeds": speeds, "mistypes": self.mistypes}, f)
+        os.replace(path + ".tmp", path)
+
+    def add(self, word, wpm):
+        sketch = self.sketches.get(word)
+        if sketch is None:
+            sketch = self.sketches[word] = MedianSketch()
+        sketch.add(float(wpm))
+
+    def add_mistype(self, word):
+        self.mistypes[word] = self.mistypes.get(word, 0) + 1
+
+    def add_rows(self, rows):
+        """Adds `word_speeds` and `mistyped_words` rows of
+        `typetest.results.test_rows`.
+        """
+        for word, _, wpm, _ in rows["word_speeds"]:
+            self.add(word, wpm)
+        for word, _, _ in rows["mistyped_words"]:
+            self.add_mistype(word)
+
+    def least_typed_words(self):
+        """Returns words sorted by the number of times they were typed,
+        least typed first. Words typed equally often are shuffled.
+        """
+        words = list(self.sketches)
+        random.shuffle(words)
+        return sorted(words, key=lambda word: self.sketches[word].count)
+
+    def worst_words(self):
+        """Returns words sorted by their median typing speed, slowest
+        first.
+        """
+        return sorted(self.sketches, key=lambda w: self.sketches[w].median())
+
+
+def history(word_speeds):
+    """Yields `(word, wpm)` of every word typed, read from `word_speeds`,
+    either a csv file or an SQLite database.
+    """
+    from typetest.database import is_database
+
+    if is_database(word_speeds):
+        connection = sqlite3.connect(word_speeds)
+        try:
+            yield from connection.execute(
+                "SELECT word, wpm FROM word_speeds ORDER BY rowid"
+            )
+        finally:
+            connection.close()
+    elif os.path.isfile(word_speeds):
+        with open(word_speeds) as f:
+            for row in filter(None, csv.reader(f)):
+                yield row[0], row[2]
+
+
+def mistypes(mistyped_words):
+    """Yields every word mistyped, read from `mistyped_words`, either a csv
+    file or an SQLite database.
+    """
+    from typetest.database import is_database
+
+    if is_database(mistyped_words):
+        connection = sqlite3.connect(mistyped_words)
+        try:
+            for (word,) in connection.execute(
+                "SELECT word FROM mistyped_words ORDER BY rowid"
+            ):
+                yield word
+        finally:
+            connection.close()
+    elif os.path.isfile(mistyped_words):
+        with open(mistyped_words) as f:
+            for row in filter(None, csv.reader(f)):
+                yield row[0]
+
+
+def build(word_speeds, mistyped_words):
+    """Returns `WordStats` of the whole `word_speeds` and `mistyped_words`
+    histories, see `history` and `mistypes`.
+    """
+    stats = WordStats()
+    for word, wpm in history(word_speeds):
+        stats.add(word, wpm)
+    for word in mistypes(mistyped_words):
+        stats.add_mistype(word)
+    return stats
+
+
+def load_or_build(stats_file, word_speeds, mistyped_words):
+    """Returns the stats of the store at `stats_file`. If there is none
+    yet, builds it from the histories, see `build`, and saves it so that it
+    is built only once.
+    """
+    with locked(stats_file + ".lock"):
+        if os.path.isfile(stats_file):
+            return WordStats.load(stats_file)
+        stats = build(word_speeds, mistyped_words)
+        stats.save(stats_file)
+        return stats
+
+
+def update_test_files(
+    stats_file,
+    rows,
+    word_speeds,
+    mistyped_words,
+    least_typed_words_output_file,
+    worst_words_output_file,
+    in_history=True,
+):
+    """Adds word speeds and mistyped words of `rows` of a test to the store
+    at `stats_file` and rewrites the least typed words and worst words test
+    files from it. Returns the updated stats.
+
+    The first time, the store is built from the whole `word_speeds` and
+    `mistyped_words` histories, which already contain the rows of the test
+    unless `in_history` is `False`.
+    """
+    with locked(stats_file + ".lock"):
+        if os.path.isfile(stats_file):
+            stats = WordStats.load(stats_file)
+            stats.add_rows(rows)
+        else:
+            stats = build(word_speeds, mistyped_words)
+            if not in_history:
+                stats.add_rows(rows)
+        stats.save(stats_file)
+
+    with open(least_typed_words_output_file, "w") as f:
+        f.write(" ".join(stats.least_typed_words()))
+    with open(worst_words_output_file, "w") as f:
+        f.write(" ".join(stats.worst_words()))
+    return stats
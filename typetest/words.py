@@ -0,0 +1,158 @@
+"""Sources of test words."""
+import io
+import os
+import mmap
+import codecs
+import random
+import hashlib
+
+from stat import S_ISREG
+from collections import deque
+
+
+def has_word(words, index):
+    """Returns `True` if `words` has a word at `index`."""
+    try:
+        words[index]
+    except IndexError:
+        return False
+    return True
+
+
+def new_decoder():
+    """Returns an incremental decoder of utf-8 translating newlines."""
+    return io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")(), translate=True
+    )
+
+
+class WordStream:
+    """Whitespace delimited words of `file`, read lazily in chunks.
+
+    Only a window of words around the word being typed is kept in memory.
+    Words are indexed from the beginning of the test, and reading past the
+    window reads more of `file`. Words before the index given to `discard`
+    are dropped. Regular files are memory mapped, anything else (pipes,
+    terminals) is read as data becomes available.
+
+    When `shuffle` is set, the words of every chunk are shuffled among
+    themselves.
+    """
+
+    def __init__(self, file, chunk_size=1 << 16, shuffle=False):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.shuffle = shuffle
+        self.words = deque()
+        self.offset = 0  # index of the first word in the window
+        self.map = None
+
+        try:
+            fileno = file.fileno()
+            status = os.fstat(fileno)
+            if S_ISREG(status.st_mode) and status.st_size > 0:
+                self.map = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+
+        self.sha1 = hashlib.sha1()
+        self.hashed = 0  # bytes of the file hashed, past its end once final
+        self._rewind()
+        self._hash_state = self._decoder.getstate()  # decoding `hashed`
+
+    def _rewind(self):
+        """Starts reading words from the beginning of the file."""
+        self.position = 0
+        self.eof = False
+        self._partial = ""
+        self._decoder = new_decoder()
+
+    def _read_chunk(self):
+        """Reads, decodes and splits the next chunk of the file into words.
+        Returns `False` if the end of the file has been reached.
+        """
+        if self.eof:
+            return False
+
+        if self.map is not None:
+            start, stop = self.position, self.position + self.chunk_size
+            data = self.map[start:stop]
+        elif hasattr(self.file, "buffer"):
+            data = self.file.buffer.read1(self.chunk_size)
+        else:
+            data = self.file.read(self.chunk_size)
+            data = data.encode("utf-8") if isinstance(data, str) else data
+        final = not data
+        text = self._decoder.decode(data, final=final)
+        if self.position == self.hashed:  # not read before a restart
+            self.sha1.update(text.encode("utf-8"))
+            self.hashed += len(data) or 1
+            self._hash_state = self._decoder.getstate()
+        self.position += len(data)
+
+        text = self._partial + text
+        words = text.split()
+        if words and not final and not text[-1].isspace():
+            self._partial = words.pop()  # the rest is in the next chunk
+        else:
+            self._partial = ""
+
+        if self.shuffle:
+            random.shuffle(words)
+        self.words.extend(words)
+        self.eof = final
+        return True
+
+    def __getitem__(self, index):
+        if index < self.offset:
+            raise IndexError(f"word {index} was discarded")
+
+        while index >= self.offset + len(self.words):
+            if not self._read_chunk():
+                raise IndexError(f"the test has no word {index}")
+
+        return self.words[index - self.offset]
+
+    def discard(self, index):
+        """Drops all words before `index` from the window."""
+        while self.offset < index and self.words:
+            self.words.popleft()
+            self.offset += 1
+
+    def restart(self, shuffle=False):
+        """Makes the first word of the test the word at index 0 again,
+        shuffling the words from now on if `shuffle` is set.
+
+        Memory mapped files are read again from the beginning. Streams can't
+        be rewound, so the test restarts with the oldest word in the window.
+        """
+        self.shuffle = self.shuffle or shuffle
+
+        if self.map is not None:
+            self.words.clear()
+            self._rewind()
+        elif shuffle:
+            random.shuffle(self.words)
+        self.offset = 0
+
+    def hexdigest(self):
+        """Returns the sha1 hash of the test text.
+
+        Memory mapped files are hashed entirely, hashing the part not read
+        yet now, so their hash does not depend on how far the test went.
+        Streams are hashed only as far as they have been read.
+        """
+        if self.map is not None and self.hashed <= len(self.map):
+            decoder = new_decoder()
+            decoder.setstate(self._hash_state)
+            for start in range(self.hashed, len(self.map), self.chunk_size):
+                stop = start + self.chunk_size
+                text = decoder.decode(self.map[start:stop])
+                self.sha1.update(text.encode("utf-8"))
+            self.sha1.update(decoder.decode(b"", final=True).encode("utf-8"))
+            self.hashed = len(self.map) + 1
+        return self.sha1.hexdigest()
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()